@@ -0,0 +1,129 @@
+"""
+Caché de consultas costosas de eventos.
+Las claves se invalidan desde apps.eventos.signals cuando cambian los datos.
+"""
+import time
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+from .models import CategoriaEvento, Evento
+
+# Eventos populares: ranking por número de inscritos
+EVENTOS_POPULARES_DEFAULT = 3
+EVENTOS_POPULARES_MAX = 20
+EVENTOS_POPULARES_TTL = 60  # segundos
+
+
+def clave_eventos_populares(top_n):
+    return f'eventos:populares:{top_n}'
+
+
+def obtener_ids_eventos_populares(top_n):
+    """
+    Retorna los IDs de los top_n eventos no finalizados con más inscritos,
+    en orden de ranking. El ranking se calcula en BD (Count + ORDER BY + LIMIT)
+    y se guarda en caché por EVENTOS_POPULARES_TTL segundos.
+    """
+    clave = clave_eventos_populares(top_n)
+    ids = cache.get(clave)
+    if ids is None:
+        ids = list(
+            Evento.objects
+            .filter(fecha_fin__gt=timezone.now())
+            .order_by('-inscritos_count', 'fecha_inicio', 'id')
+            .values_list('id', flat=True)[:top_n]
+        )
+        cache.set(clave, ids, EVENTOS_POPULARES_TTL)
+    return ids
+
+
+def invalidar_eventos_populares():
+    """Elimina el ranking en caché para todos los valores de top_n."""
+    cache.delete_many([
+        clave_eventos_populares(top_n)
+        for top_n in range(1, EVENTOS_POPULARES_MAX + 1)
+    ])
+
+
+# Estadísticas públicas de la plataforma (landing): eventos, categorías y usuarios
+ESTADISTICAS_PLATAFORMA_CLAVE = 'eventos:estadisticas_plataforma'
+ESTADISTICAS_PLATAFORMA_TTL = 300  # segundos; acota el desfase de eventos_proximos
+
+
+def obtener_estadisticas_plataforma():
+    """
+    Retorna los contadores públicos de la plataforma:
+        {'total_eventos', 'eventos_proximos', 'total_categorias', 'total_usuarios'}
+
+    Se calculan con una sola consulta agregada por tabla y se guardan en caché
+    por ESTADISTICAS_PLATAFORMA_TTL segundos. Las señales de eventos, categorías
+    y usuarios invalidan la caché cuando se crean o eliminan registros.
+    """
+    estadisticas = cache.get(ESTADISTICAS_PLATAFORMA_CLAVE)
+    if estadisticas is None:
+        eventos = Evento.objects.aggregate(
+            total_eventos=Count('id'),
+            eventos_proximos=Count('id', filter=Q(fecha_inicio__gte=timezone.now())),
+        )
+        estadisticas = {
+            **eventos,
+            'total_categorias': CategoriaEvento.objects.count(),
+            'total_usuarios': get_user_model().objects.count(),
+        }
+        cache.set(ESTADISTICAS_PLATAFORMA_CLAVE, estadisticas, ESTADISTICAS_PLATAFORMA_TTL)
+    return estadisticas
+
+
+def invalidar_estadisticas_plataforma():
+    """Elimina los contadores de la plataforma en caché."""
+    cache.delete(ESTADISTICAS_PLATAFORMA_CLAVE)
+
+
+# Resumen de reportes del organizador (mis_eventos_reportes)
+RESUMEN_ORGANIZADOR_TTL = 300  # segundos
+
+
+def _version_resumen_organizador(organizador_id):
+    """
+    Versión de las entradas en caché de un organizador. Las claves incluyen la
+    versión, así que invalidar (cambiarla) descarta todos los rangos de fecha
+    a la vez sin tener que enumerarlos.
+    """
+    return cache.get_or_set(
+        f'eventos:resumen_organizador:version:{organizador_id}', time.time_ns, timeout=None
+    )
+
+
+def obtener_resumen_organizador(organizador_id, eventos, inicio=None, fin=None):
+    """
+    Retorna el bloque de resumen de mis_eventos_reportes:
+        {'total_eventos', 'total_inscritos', 'total_confirmados', 'promedio_ocupacion'}
+
+    `eventos` es el queryset ya anotado (total_inscritos_anotado,
+    confirmados_anotado, ocupacion_anotada) y filtrado por rango; el resumen
+    se calcula con una sola consulta agregada y se guarda por organizador y rango.
+    """
+    version = _version_resumen_organizador(organizador_id)
+    clave = f"eventos:resumen_organizador:{organizador_id}:{version}:{inicio or '-'}:{fin or '-'}"
+    resumen = cache.get(clave)
+    if resumen is None:
+        datos = eventos.order_by().aggregate(
+            total_eventos=Count('id'),
+            total_inscritos=Sum('total_inscritos_anotado'),
+            total_confirmados=Sum('confirmados_anotado'),
+            promedio_ocupacion=Avg('ocupacion_anotada'),
+        )
+        resumen = {
+            'total_eventos': datos['total_eventos'],
+            'total_inscritos': datos['total_inscritos'] or 0,
+            'total_confirmados': datos['total_confirmados'] or 0,
+            'promedio_ocupacion': round(datos['promedio_ocupacion'] or 0, 2),
+        }
+        cache.set(clave, resumen, RESUMEN_ORGANIZADOR_TTL)
+    return resumen
+
+
+def invalidar_resumen_organizador(organizador_id):
+    """Descarta los resúmenes en caché del organizador (todas las fechas)."""
+    cache.set(f'eventos:resumen_organizador:version:{organizador_id}', time.time_ns(), timeout=None)
@@ -0,0 +1,141 @@
+"""
+Comando de gestión para medir emails por segundo del mensaje del organizador
+a los inscritos.
+
+Compara tres estrategias sobre los mismos destinatarios:
+- por_mensaje: un send_mail por destinatario (una conexión SMTP por email,
+  la implementación anterior).
+- lotes: enviar_lote_emails por cada lote de --lote destinatarios, en serie
+  (una conexión SMTP por lote).
+- lotes_paralelos: los mismos lotes repartidos en --workers hilos, como los
+  repartiría el chord entre workers de Celery.
+
+El servidor SMTP es un receptor local que acepta y descarta todo;
+--latencia-conexion simula el costo de abrir la conexión (TLS, login) de un
+servidor real. Con --backend locmem se usa el backend en memoria de Django.
+
+Uso:
+    python manage.py benchmark_emails --emails 2000 --lote 100 --workers 4 --latencia-conexion 20
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from apps.eventos.tasks import enviar_lote_emails
+
+HOST = '127.0.0.1'
+
+
+class ReceptorSMTP:
+    """Servidor SMTP mínimo en un hilo aparte: acepta todos los mensajes y los descarta."""
+
+    def __init__(self, latencia_conexion):
+        self.latencia_conexion = latencia_conexion
+        self.mensajes = 0
+        self.conexiones = 0
+        self.loop = asyncio.new_event_loop()
+        self.listo = threading.Event()
+        self.hilo = threading.Thread(target=self._ejecutar, daemon=True)
+
+    def __enter__(self):
+        self.hilo.start()
+        self.listo.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.hilo.join()
+
+    def _ejecutar(self):
+        asyncio.set_event_loop(self.loop)
+        self.servidor = self.loop.run_until_complete(asyncio.start_server(self._atender, HOST, 0))
+        self.puerto = self.servidor.sockets[0].getsockname()[1]
+        self.listo.set()
+        self.loop.run_forever()
+
+    async def _atender(self, reader, writer):
+        self.conexiones += 1
+        await asyncio.sleep(self.latencia_conexion)
+        writer.write(b'220 benchmark ESMTP\r\n')
+        try:
+            while linea := await reader.readline():
+                comando = linea[:4].upper()
+                if comando == b'EHLO':
+                    writer.write(b'250-benchmark\r\n250 8BITMIME\r\n')
+                elif comando == b'DATA':
+                    writer.write(b'354 fin con <CRLF>.<CRLF>\r\n')
+                    await reader.readuntil(b'\r\n.\r\n')
+                    self.mensajes += 1
+                    writer.write(b'250 OK\r\n')
+                elif comando == b'QUIT':
+                    writer.write(b'221 Bye\r\n')
+                    break
+                else:
+                    writer.write(b'250 OK\r\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+class Command(BaseCommand):
+    help = 'Mide emails por segundo: un send_mail por destinatario frente a lotes con conexión reutilizada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=1000, help='Destinatarios (default: 1000)')
+        parser.add_argument('--lote', type=int, default=100, help='Destinatarios por lote (default: 100)')
+        parser.add_argument('--workers', type=int, default=4, help='Hilos para lotes_paralelos (default: 4)')
+        parser.add_argument('--latencia-conexion', type=float, default=10, help='Milisegundos para abrir cada conexión SMTP (default: 10)')
+        parser.add_argument('--backend', choices=['smtp', 'locmem'], default='smtp', help='Receptor de los emails (default: smtp)')
+
+    def handle(self, *args, **options):
+        emails = [f'benchmark_{i}@example.com' for i in range(options['emails'])]
+        lotes = [emails[i:i + options['lote']] for i in range(0, len(emails), options['lote'])]
+
+        estrategias = {
+            'por_mensaje': lambda: [
+                send_mail('Benchmark', 'Mensaje', settings.DEFAULT_FROM_EMAIL, [email]) for email in emails
+            ],
+            'lotes': lambda: [enviar_lote_emails('Benchmark', 'Mensaje', lote) for lote in lotes],
+            'lotes_paralelos': lambda: self._en_paralelo(lotes, options['workers']),
+        }
+
+        self.stdout.write(
+            f"{len(emails)} emails, lotes de {options['lote']}, {options['workers']} workers, "
+            f"backend {options['backend']}\n"
+        )
+        for nombre, estrategia in estrategias.items():
+            if options['backend'] == 'locmem':
+                with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+                    total = self._medir(estrategia)
+                conexiones = '-'
+            else:
+                with ReceptorSMTP(options['latencia_conexion'] / 1000) as receptor, override_settings(
+                    EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                    EMAIL_HOST=HOST,
+                    EMAIL_PORT=receptor.puerto,
+                    EMAIL_USE_TLS=False,
+                    EMAIL_USE_SSL=False,
+                    EMAIL_HOST_USER='',
+                    EMAIL_HOST_PASSWORD='',
+                ):
+                    total = self._medir(estrategia)
+                conexiones = receptor.conexiones
+            self.stdout.write(
+                f"  {nombre:<16} {len(emails) / total:>9.1f} emails/s  "
+                f"total={total:>7.2f} s  conexiones={conexiones}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('\nBenchmark completado.'))
+
+    def _en_paralelo(self, lotes, workers):
+        with ThreadPoolExecutor(workers) as ejecutor:
+            return list(ejecutor.map(lambda lote: enviar_lote_emails('Benchmark', 'Mensaje', lote), lotes))
+
+    def _medir(self, estrategia):
+        inicio = time.perf_counter()
+        estrategia()
+        return time.perf_counter() - inicio
@@ -0,0 +1,52 @@
+"""
+Comando de gestión para recalcular el contador Evento.inscritos_count.
+Repara desviaciones entre el contador y las inscripciones reales.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from apps.eventos.models import Evento, Inscripcion
+
+
+class Command(BaseCommand):
+    help = 'Recalcula Evento.inscritos_count a partir de las inscripciones existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo reporta los eventos desincronizados, sin modificarlos',
+        )
+
+    def handle(self, *args, **options):
+        desincronizados = (
+            Evento.objects
+            .annotate(inscritos_reales=Count('inscripciones'))
+            .exclude(inscritos_count=F('inscritos_reales'))
+            .values_list('id', 'titulo', 'inscritos_count', 'inscritos_reales')
+        )
+
+        # El valor se recalcula dentro del UPDATE para no pisar inscripciones concurrentes
+        conteo_real = Coalesce(
+            Subquery(
+                Inscripcion.objects
+                .filter(evento=OuterRef('pk'))
+                .values('evento')
+                .annotate(total=Count('id'))
+                .values('total')
+            ),
+            Value(0)
+        )
+
+        total = 0
+        for evento_id, titulo, contador, reales in desincronizados.iterator():
+            total += 1
+            self.stdout.write(f'Evento {evento_id} "{titulo}": contador={contador}, reales={reales}')
+            if not options['dry_run']:
+                Evento.objects.filter(pk=evento_id).update(inscritos_count=conteo_real)
+
+        if options['dry_run']:
+            mensaje = f'{total} eventos con el contador desincronizado (sin cambios).'
+        else:
+            mensaje = f'Se corrigió el contador de {total} eventos.'
+        self.stdout.write(self.style.SUCCESS(mensaje))
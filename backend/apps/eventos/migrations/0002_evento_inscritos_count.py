@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='inscritos_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0002_evento_inscritos_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='version_recordatorios',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
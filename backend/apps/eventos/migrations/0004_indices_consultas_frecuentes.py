@@ -0,0 +1,71 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+# Las columnas de las claves foráneas (organizador_id, usuario_id, evento_id) no
+# figuran en las migraciones versionadas de esta app, así que los índices que las
+# usan no se pueden crear con AddIndex: se registran solo en el estado y se crean
+# con SQL únicamente si las columnas existen en la base de datos.
+INDICES_SOBRE_CLAVES_FORANEAS = [
+    # (tabla, nombre, columnas, condición del índice parcial)
+    ('eventos_evento', 'evento_organizador_fin_idx', ['organizador_id', 'fecha_fin'], None),
+    ('eventos_inscripcion', 'inscripcion_asistio_idx', ['usuario_id', 'evento_id'], 'asistencia_confirmada'),
+]
+
+
+def crear_indices_claves_foraneas(apps, schema_editor):
+    conexion = schema_editor.connection
+    qn = schema_editor.quote_name
+    for tabla, nombre, columnas, condicion in INDICES_SOBRE_CLAVES_FORANEAS:
+        with conexion.cursor() as cursor:
+            existentes = {c.name for c in conexion.introspection.get_table_description(cursor, tabla)}
+        if not set(columnas) <= existentes:
+            continue
+        sql = f"CREATE INDEX {qn(nombre)} ON {qn(tabla)} ({', '.join(qn(c) for c in columnas)})"
+        if condicion:
+            sql += f" WHERE {qn(condicion)}"
+        schema_editor.execute(sql)
+
+
+def borrar_indices_claves_foraneas(apps, schema_editor):
+    for _, nombre, _, _ in INDICES_SOBRE_CLAVES_FORANEAS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(nombre)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0003_evento_version_recordatorios'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['fecha_inicio'], name='evento_fecha_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['fecha_fin'], name='evento_fecha_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(django.db.models.functions.text.Upper('codigo_confirmacion'), name='evento_codigo_upper_idx'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='evento',
+                    index=models.Index(fields=['organizador', 'fecha_fin'], name='evento_organizador_fin_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='inscripcion',
+                    index=models.Index(condition=models.Q(('asistencia_confirmada', True)), fields=['usuario', 'evento'], name='inscripcion_asistio_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(crear_indices_claves_foraneas, borrar_indices_claves_foraneas),
+            ],
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Upper
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -8,6 +10,10 @@ import string
 
 Usuario = settings.AUTH_USER_MODEL
 
+
+class SinCuposDisponibles(Exception):
+    """Se lanza cuando un evento ya alcanzó su aforo."""
+
 class CategoriaEvento(models.Model):
     nombre = models.CharField(max_length=50, unique=True)
 
@@ -29,6 +35,12 @@ class Evento(models.Model):
     foto = models.ImageField(upload_to='eventos/', null=True, blank=True)
     asistentes = models.ManyToManyField(Usuario, through='Inscripcion', related_name='eventos_asistidos')
     codigo_confirmacion = models.CharField(max_length=10, unique=True, editable=False)
+    # Contador desnormalizado de inscripciones. Se mantiene con Evento.reservar_cupo()
+    # y las señales de Inscripcion; se repara con el comando recalcular_inscritos.
+    inscritos_count = models.PositiveIntegerField(default=0, editable=False)
+    # Token de versión de los recordatorios programados con ETA. Se incrementa
+    # cada vez que cambia fecha_inicio; los recordatorios con otra versión se ignoran.
+    version_recordatorios = models.PositiveIntegerField(default=0, editable=False)
 
     # Relaciones
     organizador = models.ForeignKey(
@@ -62,6 +74,15 @@ class Evento(models.Model):
         verbose_name = "Evento"
         verbose_name_plural = "Eventos"
         ordering = ['fecha_inicio']
+        indexes = [
+            # Filtros por rango de fechas (listado, próximos, en curso, finalizados)
+            models.Index(fields=['fecha_inicio'], name='evento_fecha_inicio_idx'),
+            models.Index(fields=['fecha_fin'], name='evento_fecha_fin_idx'),
+            # Eventos de un organizador activos/pasados: organizador=X AND fecha_fin </>= ahora
+            models.Index(fields=['organizador', 'fecha_fin'], name='evento_organizador_fin_idx'),
+            # codigo_confirmacion__iexact se traduce a UPPER(codigo_confirmacion) = UPPER(%s)
+            models.Index(Upper('codigo_confirmacion'), name='evento_codigo_upper_idx'),
+        ]
 
     def __str__(self):
         return f"{self.titulo} - {self.fecha_inicio.strftime('%d/%m/%Y')}"
@@ -78,8 +99,29 @@ class Evento(models.Model):
 
     # Método útil para lógica de inscripción
     def tiene_cupos_disponibles(self):
-        inscripciones_count = self.inscripciones.count()
-        return inscripciones_count < self.aforo
+        return self.inscritos_count < self.aforo
+
+    @staticmethod
+    def reservar_cupo(evento_id):
+        """
+        Reserva un cupo con un único UPDATE condicional:
+        UPDATE ... SET inscritos_count = inscritos_count + 1
+        WHERE id = evento_id AND inscritos_count < aforo
+        Retorna True si se reservó el cupo, False si el evento está lleno.
+        """
+        actualizados = Evento.objects.filter(
+            pk=evento_id,
+            inscritos_count__lt=F('aforo')
+        ).update(inscritos_count=F('inscritos_count') + 1)
+        return actualizados == 1
+
+    @staticmethod
+    def liberar_cupo(evento_id):
+        """Descuenta un cupo del contador (nunca por debajo de cero)."""
+        Evento.objects.filter(
+            pk=evento_id,
+            inscritos_count__gt=0
+        ).update(inscritos_count=F('inscritos_count') - 1)
 
 class Inscripcion(models.Model):
     usuario = models.ForeignKey(
@@ -100,12 +142,38 @@ class Inscripcion(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['usuario', 'evento'], name='unique_inscripcion')
         ]
+        indexes = [
+            # Eventos a los que un usuario asistió: usuario=X AND asistencia_confirmada
+            models.Index(
+                fields=['usuario', 'evento'],
+                condition=Q(asistencia_confirmada=True),
+                name='inscripcion_asistio_idx'
+            ),
+        ]
         verbose_name = "Inscripción"
         verbose_name_plural = "Inscripciones"
 
     def __str__(self):
         return f"{self.usuario} inscrito en {self.evento}"
 
+    @classmethod
+    def inscribir(cls, usuario, evento):
+        """
+        Crea la inscripción y reserva el cupo en la misma transacción.
+        - Lanza IntegrityError si el usuario ya está inscrito (unique_inscripcion).
+        - Lanza SinCuposDisponibles si el evento está lleno.
+        En ambos casos no queda nada escrito en BD.
+        """
+        with transaction.atomic():
+            inscripcion = cls(usuario=usuario, evento=evento)
+            # Evita que la señal post_save vuelva a incrementar el contador
+            inscripcion._cupo_reservado = True
+            inscripcion.save()
+            if not Evento.reservar_cupo(evento.pk):
+                raise SinCuposDisponibles("No hay cupos disponibles para este evento.")
+        evento.inscritos_count += 1
+        return inscripcion
+
 class Reseña(models.Model):
     evento = models.ForeignKey(
         Evento,
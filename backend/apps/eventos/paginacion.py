@@ -0,0 +1,233 @@
+"""
+Clases de paginación de la API de eventos.
+"""
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime
+from urllib import parse
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class ReportesOrganizadorPagination(PageNumberPagination):
+    """Páginas del listado de eventos en los reportes del organizador."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def datos_paginacion(self):
+        """Bloque de metadatos de la página actual para incluir en la respuesta."""
+        return {
+            'count': self.page.paginator.count,
+            'page': self.page.number,
+            'num_pages': self.page.paginator.num_pages,
+            'page_size': self.page.paginator.per_page,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginación por cursor con posición compuesta (keyset). El cursor de DRF
+    solo guarda el valor del primer campo del orden y recorre las filas que
+    empatan en él con OFFSET (hasta offset_cutoff); aquí el cursor guarda el
+    valor de todos los campos del orden de la fila límite, y la página se
+    obtiene con un filtro sobre la clave completa:
+
+        (a > x) OR (a = x AND id > y)   para el orden (a, id)
+
+    El orden debe terminar en id (posición única) y sus campos no pueden ser
+    nulos. Cada página cuesta lo mismo sin importar su profundidad ni cuántas
+    filas empaten en el primer campo, y no hay COUNT(*).
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        posicion = self.cursor.position if self.cursor else None
+
+        queryset = queryset.order_by(*(_invertir_orden(self.ordering) if reverse else self.ordering))
+        if posicion is not None:
+            try:
+                queryset = queryset.filter(self._filtro_posicion(posicion, reverse))
+            except (ValidationError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        resultados = list(queryset[:self.page_size + 1])
+        hay_mas = len(resultados) > self.page_size
+        self.page = resultados[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = posicion is not None, hay_mas
+        else:
+            self.has_next, self.has_previous = hay_mas, posicion is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _filtro_posicion(self, posicion, reverse):
+        """Filas estrictamente posteriores a `posicion` en el sentido de lectura."""
+        filtro = Q()
+        iguales = Q()
+        for campo, valor in zip(self.ordering, posicion):
+            nombre = campo.lstrip('-')
+            ascendente = not campo.startswith('-')
+            operador = 'gt' if ascendente != reverse else 'lt'
+            filtro |= iguales & Q(**{f'{nombre}__{operador}': valor})
+            iguales &= Q(**{nombre: valor})
+        return filtro
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        posicion = self._get_position_from_instance(self.page[-1], self.ordering) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=posicion))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        posicion = self._get_position_from_instance(self.page[0], self.ordering) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=posicion))
+
+    def decode_cursor(self, request):
+        codificado = request.query_params.get(self.cursor_query_param)
+        if codificado is None:
+            return None
+        try:
+            tokens = parse.parse_qs(b64decode(codificado.encode('ascii')).decode('ascii'), keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            posicion = tokens.get('p', [None])[0]
+            if posicion is not None:
+                posicion = json.loads(posicion)
+                if (
+                    not isinstance(posicion, list)
+                    or len(posicion) != len(self.ordering)
+                    or not all(isinstance(valor, str) for valor in posicion)
+                ):
+                    raise ValueError('Posición inválida')
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=posicion)
+
+    def encode_cursor(self, cursor):
+        tokens = {}
+        if cursor.reverse:
+            tokens['r'] = '1'
+        if cursor.position is not None:
+            tokens['p'] = json.dumps(cursor.position)
+        codificado = b64encode(parse.urlencode(tokens).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, codificado)
+
+    def _get_position_from_instance(self, instance, ordering):
+        posicion = []
+        for campo in ordering:
+            nombre = campo.lstrip('-')
+            valor = instance[nombre] if isinstance(instance, dict) else getattr(instance, nombre)
+            posicion.append(valor.isoformat() if isinstance(valor, datetime) else str(valor))
+        return posicion
+
+
+def _invertir_orden(ordering):
+    return tuple(campo[1:] if campo.startswith('-') else f'-{campo}' for campo in ordering)
+
+
+class InscritosCursorPagination(KeysetCursorPagination):
+    """
+    Paginación por cursor del listado de inscritos de un evento, sin COUNT ni
+    OFFSET. El orden se fija por solicitud (ORDEN_INSCRITOS de la vista).
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('fecha_inscripcion', 'id')
+
+    def __init__(self, ordering=None):
+        if ordering:
+            self.ordering = ordering
+
+    def get_ordering(self, request, queryset, view):
+        # El orden lo decide la vista (parámetro validado), no OrderingFilter
+        return self.ordering
+
+    def datos_paginacion(self):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+        }
+
+
+class OrdenFijoCursorPagination(KeysetCursorPagination):
+    """
+    Base de la paginación por cursor de los listados, sobre un orden fijo y
+    único (el último campo es siempre id).
+    El parámetro ?ordering no aplica en este modo: el cursor solo es estable
+    sobre el orden con el que se generó.
+    """
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+
+class EventosCursorPagination(OrdenFijoCursorPagination):
+    ordering = ('fecha_inicio', 'id')
+
+
+class InscripcionesCursorPagination(OrdenFijoCursorPagination):
+    ordering = ('-fecha_inscripcion', 'id')
+
+
+class ReseñasCursorPagination(OrdenFijoCursorPagination):
+    ordering = ('-fecha', 'id')
+
+
+class PaginacionSeleccionableMixin:
+    """
+    Permite elegir la paginación de un ViewSet por vista o por solicitud:
+
+    - pagination_class: paginación por páginas (la de settings por defecto).
+    - cursor_pagination_class: paginación por cursor del ViewSet.
+    - paginacion_por_defecto: 'paginas' o 'cursor' cuando la solicitud no indica nada.
+
+    La solicitud elige con ?paginacion=cursor|paginas; si trae ?cursor= se
+    asume paginación por cursor.
+    """
+    cursor_pagination_class = None
+    paginacion_por_defecto = 'paginas'
+
+    def modo_paginacion(self):
+        params = self.request.query_params if self.request is not None else {}
+        modo = params.get('paginacion')
+        if modo not in ('cursor', 'paginas'):
+            modo = 'cursor' if 'cursor' in params else self.paginacion_por_defecto
+        if modo == 'cursor' and self.cursor_pagination_class is None:
+            modo = 'paginas'
+        return modo
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.modo_paginacion() == 'cursor':
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
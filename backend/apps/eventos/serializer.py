@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
+from django.db import IntegrityError
 from django.utils import timezone
-from .models import Evento, CategoriaEvento, Inscripcion, Reseña
+from .models import Evento, CategoriaEvento, Inscripcion, Reseña, SinCuposDisponibles
 from apps.usuarios.models import Usuario
 from apps.usuarios.serializer import UsuarioSerializer
 from backend.security_utils import sanitize_text, sanitize_html
@@ -70,7 +71,7 @@ class UsuarioInscritoSerializer(serializers.ModelSerializer):
         if request and hasattr(request, 'user'):
             # Verificar si el usuario es el organizador del evento
             evento = self.context.get('evento')
-            if evento and evento.organizador == request.user:
+            if evento and evento.organizador_id == request.user.id:
                 return obj.email
         return None
     
@@ -80,7 +81,7 @@ class UsuarioInscritoSerializer(serializers.ModelSerializer):
         if request and hasattr(request, 'user'):
             # Verificar si el usuario es el organizador del evento
             evento = self.context.get('evento')
-            if evento and evento.organizador == request.user:
+            if evento and evento.organizador_id == request.user.id:
                 return obj.codigo_estudiantil
         return None
 
@@ -171,32 +172,35 @@ class EventoSerializer(serializers.ModelSerializer):
             return super().to_representation(instance)
     
     def get_numero_inscritos(self, obj):
-        """Retorna el número de inscritos en el evento"""
-        # Verificar que el objeto esté guardado antes de acceder a relaciones
+        """Retorna el número de inscritos en el evento (contador inscritos_count)"""
         if not obj.pk:
             return 0
-        try:
-            return obj.inscripciones.count()
-        except Exception:
-            return 0
+        return obj.inscritos_count
     
     def get_inscritos(self, obj):
-        """Retorna la lista de usuarios inscritos con sus nombres y estado de confirmación"""
+        """
+        Retorna la lista de usuarios inscritos con sus nombres y estado de confirmación.
+        Usa la lista precargada 'inscripciones_prefetch' si el queryset la trae.
+        """
         # Verificar que el objeto esté guardado antes de acceder a relaciones
         if not obj.pk:
             return []
         try:
-            inscripciones = obj.inscripciones.select_related('usuario').all()
+            inscripciones = getattr(obj, 'inscripciones_prefetch', None)
+            if inscripciones is None:
+                inscripciones = obj.inscripciones.select_related('usuario').all()
             # Pasar el contexto con el request y el evento para que el serializer pueda verificar si es organizador
             request = self.context.get('request')
             
+            usuarios_data = UsuarioInscritoSerializer(
+                [inscripcion.usuario for inscripcion in inscripciones],
+                many=True,
+                context={'request': request, 'evento': obj}
+            ).data
+            
             # Crear lista con información del usuario y estado de confirmación
             inscritos_data = []
-            for inscripcion in inscripciones:
-                usuario_data = UsuarioInscritoSerializer(
-                    inscripcion.usuario,
-                    context={'request': request, 'evento': obj}
-                ).data
+            for inscripcion, usuario_data in zip(inscripciones, usuarios_data):
                 # Agregar información de la inscripción
                 usuario_data['asistencia_confirmada'] = inscripcion.asistencia_confirmada
                 inscritos_data.append(usuario_data)
@@ -209,14 +213,19 @@ class EventoSerializer(serializers.ModelSerializer):
         """Retorna el código de confirmación solo si el usuario es el organizador"""
         request = self.context.get('request')
         if request and hasattr(request, 'user') and request.user.is_authenticated:
-            if obj.organizador == request.user:
+            if obj.organizador_id == request.user.id:
                 return obj.codigo_confirmacion
         return None
     
     def get_is_favorito(self, obj):
-        """Retorna True si el evento está marcado como favorito por el usuario autenticado"""
+        """
+        Retorna True si el evento está marcado como favorito por el usuario autenticado.
+        Usa la anotación 'is_favorito_anotado' (Exists) si está presente.
+        """
         request = self.context.get('request')
         if request and hasattr(request, 'user') and request.user.is_authenticated:
+            if hasattr(obj, 'is_favorito_anotado'):
+                return obj.is_favorito_anotado
             from .models import Favorito
             return Favorito.objects.filter(usuario=request.user, evento=obj).exists()
         return False
@@ -330,7 +339,13 @@ class InscripcionSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
             validated_data['usuario'] = request.user
-        return Inscripcion.objects.create(**validated_data)
+        # Crea la inscripción reservando el cupo de forma atómica
+        try:
+            return Inscripcion.inscribir(validated_data['usuario'], validated_data['evento'])
+        except SinCuposDisponibles:
+            raise serializers.ValidationError({'evento': 'No hay cupos disponibles para este evento.'})
+        except IntegrityError:
+            raise serializers.ValidationError("Este usuario ya está inscrito en el evento.")
 
     def validate(self, attrs):
         request = self.context.get('request')
@@ -350,46 +365,23 @@ class InscripcionDetalleSerializer(serializers.ModelSerializer):
         model = Inscripcion
         fields = ['id', 'usuario', 'evento', 'fecha_inscripcion', 'asistencia_confirmada', 'fecha_confirmacion']
 
-class EstadisticasEventosSerializer(serializers.ModelSerializer):
+class EstadisticasEventosSerializer(serializers.Serializer):
     """
     Serializador para estadísticas de eventos.
-    Extiende del modelo Evento para tener acceso a las consultas.
+    Recibe el diccionario de apps.eventos.cache.obtener_estadisticas_plataforma().
     """
-    total_eventos = serializers.SerializerMethodField()
-    eventos_proximos = serializers.SerializerMethodField()
-
-    class Meta:
-        model = Evento
-        fields = ['total_eventos', 'eventos_proximos']
-
-    def get_total_eventos(self, obj):
-        """
-        Retorna el total de eventos en el sistema.
-        """
-        return Evento.objects.count()
-
-    def get_eventos_proximos(self, obj):
-        """
-        Retorna el número de eventos con fecha_inicio >= hoy.
-        """
-        return Evento.objects.filter(fecha_inicio__gte=timezone.now()).count()
+    total_eventos = serializers.IntegerField(read_only=True)
+    eventos_proximos = serializers.IntegerField(
+        read_only=True,
+        help_text='Número de eventos con fecha_inicio >= ahora'
+    )
 
-class EstadisticasCategoriasSerializer(serializers.ModelSerializer):
+class EstadisticasCategoriasSerializer(serializers.Serializer):
     """
     Serializador para estadísticas de categorías.
-    Extiende del modelo CategoriaEvento para tener acceso a las consultas.
+    Recibe el diccionario de apps.eventos.cache.obtener_estadisticas_plataforma().
     """
-    total_categorias = serializers.SerializerMethodField()
-
-    class Meta:
-        model = CategoriaEvento
-        fields = ['total_categorias']
-
-    def get_total_categorias(self, obj):
-        """
-        Retorna el total de categorías en el sistema.
-        """
-        return CategoriaEvento.objects.count()
+    total_categorias = serializers.IntegerField(read_only=True)
 
 
 
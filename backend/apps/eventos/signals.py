@@ -0,0 +1,69 @@
+"""
+Señales de la app eventos.
+Mantienen la caché (apps.eventos.cache) coherente con los cambios en BD.
+"""
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import CategoriaEvento, Evento, Inscripcion, Reseña
+from .cache import invalidar_eventos_populares, invalidar_estadisticas_plataforma, invalidar_resumen_organizador
+
+
+@receiver(post_save, sender=Inscripcion)
+def incrementar_inscritos_count(sender, instance, created, **kwargs):
+    """
+    Mantiene Evento.inscritos_count para inscripciones creadas fuera de
+    Inscripcion.inscribir() (admin, shell, fixtures). Inscribir ya reservó el cupo.
+    """
+    if created and not getattr(instance, '_cupo_reservado', False):
+        Evento.objects.filter(pk=instance.evento_id).update(
+            inscritos_count=F('inscritos_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Inscripcion)
+def decrementar_inscritos_count(sender, instance, **kwargs):
+    """Libera el cupo de la inscripción eliminada."""
+    Evento.liberar_cupo(instance.evento_id)
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+def invalidar_cache_por_inscripcion(sender, instance, **kwargs):
+    """Una inscripción creada o eliminada cambia el ranking de populares."""
+    invalidar_eventos_populares()
+
+
+@receiver(post_save, sender=Evento)
+@receiver(post_delete, sender=Evento)
+def invalidar_cache_por_evento(sender, instance, **kwargs):
+    """
+    Crear, editar o eliminar un evento puede cambiar el ranking de populares
+    y los contadores de la plataforma (total y próximos).
+    """
+    invalidar_eventos_populares()
+    invalidar_estadisticas_plataforma()
+    invalidar_resumen_organizador(instance.organizador_id)
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+@receiver(post_save, sender=Reseña)
+@receiver(post_delete, sender=Reseña)
+def invalidar_resumen_por_actividad(sender, instance, **kwargs):
+    """Inscripciones y reseñas cambian el resumen de reportes del organizador del evento."""
+    if sender._meta.get_field('evento').is_cached(instance):
+        organizador_id = instance.evento.organizador_id
+    else:
+        organizador_id = (
+            Evento.objects.filter(pk=instance.evento_id).values_list('organizador_id', flat=True).first()
+        )
+    if organizador_id:
+        invalidar_resumen_organizador(organizador_id)
+
+
+@receiver(post_save, sender=CategoriaEvento)
+@receiver(post_delete, sender=CategoriaEvento)
+def invalidar_cache_por_categoria(sender, instance, **kwargs):
+    """Crear o eliminar una categoría cambia el total de categorías."""
+    invalidar_estadisticas_plataforma()
@@ -1,5 +1,5 @@
-from celery import shared_task
-from django.core.mail import send_mail
+from celery import chord, shared_task
+from django.core.mail import EmailMessage, get_connection, send_mail
 from django.conf import settings
 from .models import Evento, Inscripcion
 import logging
@@ -13,28 +13,13 @@ def send_email_task(event_id, message, user_email):
     return send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user_email])
 
 
-@shared_task
-def send_message_to_inscritos(event_id, subject, message, organizador_nombre):
-    """
-    Tarea Celery para enviar un mensaje por email a todos los inscritos de un evento.
-    
-    Args:
-        event_id: ID del evento
-        subject: Asunto del mensaje
-        message: Contenido del mensaje
-        organizador_nombre: Nombre del organizador que envía el mensaje
-    """
-    try:
-        evento = Evento.objects.get(pk=event_id)
-        
-        # Obtener todos los inscritos con sus emails
-        inscripciones = Inscripcion.objects.filter(evento=evento).select_related('usuario')
-        
-        emails_enviados = 0
-        emails_fallidos = 0
-        
-        # Construir el mensaje completo
-        mensaje_completo = f"""
+# Destinatarios por subtarea de envío (una conexión SMTP por lote)
+TAMANO_LOTE_EMAILS = 100
+
+
+def _mensaje_inscritos(evento, message, organizador_nombre):
+    """Cuerpo del email que el organizador envía a los inscritos."""
+    return f"""
 Hola,
 
 El organizador del evento "{evento.titulo}" ({organizador_nombre}) te ha enviado el siguiente mensaje:
@@ -54,29 +39,136 @@ Si tienes alguna pregunta, puedes contactar al organizador a través de la plata
 Saludos,
 Equipo Eventify
 """
+
+
+class _MensajesDelLote(list):
+    """
+    Lista de mensajes que recuerda cuántos entregó ya el backend al
+    recorrerla, para saber desde dónde reintentar si send_messages falla a
+    mitad del lote (los backends de Django envían en orden).
+    """
+    recorridos = 0
+
+    def __iter__(self):
+        for indice, mensaje in enumerate(list.__iter__(self)):
+            self.recorridos = indice
+            yield mensaje
+
+
+@shared_task
+def enviar_lote_emails(subject, cuerpo, emails, lote=1, total_lotes=1):
+    """
+    Envía el mismo mensaje a un lote de destinatarios (un email por
+    destinatario) con una sola conexión SMTP y un solo send_messages.
+    Si el envío del lote falla, los mensajes ya entregados no se repiten: el
+    que falló cuenta como fallido y el resto se envía de a uno, para que un
+    destinatario rechazado no corte el lote.
+    Retorna {'enviados', 'fallidos'}.
+    """
+    try:
+        conexion = get_connection(fail_silently=False)
+        conexion.open()
+    except Exception as e:
+        logger.error(f"Error abriendo la conexión SMTP para un lote de {len(emails)} emails: {str(e)}")
+        return {'enviados': 0, 'fallidos': len(emails)}
+
+    mensajes = _MensajesDelLote(
+        EmailMessage(subject, cuerpo, settings.DEFAULT_FROM_EMAIL, [email], connection=conexion)
+        for email in emails
+    )
+    try:
+        try:
+            enviados = conexion.send_messages(mensajes) or 0
+            fallidos = len(mensajes) - enviados
+        except Exception as e:
+            fallido = mensajes.recorridos
+            logger.error(f"Error enviando email a {mensajes[fallido].to[0]}: {str(e)}")
+            enviados_resto, fallidos_resto = _enviar_de_a_uno(conexion, mensajes[fallido + 1:])
+            enviados = fallido + enviados_resto
+            fallidos = 1 + fallidos_resto
+    finally:
+        conexion.close()
+
+    logger.info(f"📧 [EMAILS] Lote {lote}/{total_lotes} enviado: {enviados} enviados, {fallidos} fallidos")
+    return {'enviados': enviados, 'fallidos': fallidos}
+
+
+def _enviar_de_a_uno(conexion, mensajes):
+    """Reintento tras un fallo del lote: un send_messages por mensaje."""
+    enviados = fallidos = 0
+    if mensajes:
+        # La conexión puede haber quedado inutilizable tras el error
+        conexion.close()
+        try:
+            conexion.open()
+        except Exception as e:
+            logger.error(f"Error reabriendo la conexión SMTP: {str(e)}")
+    for mensaje in mensajes:
+        try:
+            enviados += conexion.send_messages([mensaje]) or 0
+        except Exception as e:
+            logger.error(f"Error enviando email a {mensaje.to[0]}: {str(e)}")
+            fallidos += 1
+    return enviados, fallidos
+
+
+@shared_task
+def resumen_envio_emails(resultados, evento_titulo, total_inscritos):
+    """Callback del chord: suma los resultados de todos los lotes."""
+    enviados = sum(resultado['enviados'] for resultado in resultados)
+    fallidos = sum(resultado['fallidos'] for resultado in resultados)
+    logger.info(
+        f"📧 [EMAILS] Envío a inscritos de '{evento_titulo}' completado: "
+        f"{enviados} enviados, {fallidos} fallidos en {len(resultados)} lote(s)"
+    )
+    return {
+        'evento': evento_titulo,
+        'emails_enviados': enviados,
+        'emails_fallidos': fallidos,
+        'total_inscritos': total_inscritos,
+        'lotes': len(resultados)
+    }
+
+
+@shared_task
+def send_message_to_inscritos(event_id, subject, message, organizador_nombre):
+    """
+    Tarea Celery para enviar un mensaje por email a todos los inscritos de un evento.
+    Reparte los destinatarios en lotes de TAMANO_LOTE_EMAILS que se envían en
+    paralelo (un chord de enviar_lote_emails) y resumen_envio_emails suma el
+    resultado final.
+    
+    Args:
+        event_id: ID del evento
+        subject: Asunto del mensaje
+        message: Contenido del mensaje
+        organizador_nombre: Nombre del organizador que envía el mensaje
+    """
+    try:
+        evento = Evento.objects.get(pk=event_id)
         
-        # Enviar email a cada inscrito
-        for inscripcion in inscripciones:
-            usuario = inscripcion.usuario
-            if usuario.email:
-                try:
-                    send_mail(
-                        subject,
-                        mensaje_completo,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [usuario.email],
-                        fail_silently=False
-                    )
-                    emails_enviados += 1
-                except Exception as e:
-                    logger.error(f"Error enviando email a {usuario.email} para evento {evento.titulo}: {str(e)}")
-                    emails_fallidos += 1
+        inscripciones = Inscripcion.objects.filter(evento=evento)
+        total_inscritos = inscripciones.count()
+        emails = list(
+            inscripciones.exclude(usuario__email='').values_list('usuario__email', flat=True).order_by('id')
+        )
+        lotes = [emails[i:i + TAMANO_LOTE_EMAILS] for i in range(0, len(emails), TAMANO_LOTE_EMAILS)]
         
+        if not lotes:
+            return resumen_envio_emails([], evento.titulo, total_inscritos)
+        
+        cuerpo = _mensaje_inscritos(evento, message, organizador_nombre)
+        chord(
+            enviar_lote_emails.s(subject, cuerpo, lote, numero, len(lotes))
+            for numero, lote in enumerate(lotes, start=1)
+        )(resumen_envio_emails.s(evento.titulo, total_inscritos))
+        
+        logger.info(f"📧 [EMAILS] {len(emails)} emails para '{evento.titulo}' repartidos en {len(lotes)} lote(s)")
         return {
             'evento': evento.titulo,
-            'emails_enviados': emails_enviados,
-            'emails_fallidos': emails_fallidos,
-            'total_inscritos': inscripciones.count()
+            'destinatarios': len(emails),
+            'total_inscritos': total_inscritos,
+            'lotes': len(lotes)
         }
         
     except Evento.DoesNotExist:
@@ -85,4 +177,3 @@ Equipo Eventify
     except Exception as e:
         logger.error(f"Error en send_message_to_inscritos para evento {event_id}: {str(e)}")
         raise
-
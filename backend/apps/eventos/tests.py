@@ -1,3 +1,777 @@
-from django.test import TestCase
+import threading
+import unittest
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.celery import app as celery_app
+from apps.notificaciones.models import Notificacion, UsuarioNotificacion
+from apps.usuarios.models import Rol, Usuario
+from . import tasks
+from .models import CategoriaEvento, Evento, Favorito, Inscripcion, Reseña, SinCuposDisponibles
+
+
+def crear_usuario(username, **extra):
+    """Crea un usuario de prueba con el rol por defecto (pk=1)."""
+    Rol.objects.get_or_create(pk=1, defaults={'nombre': 'estudiante'})
+    return Usuario.objects.create(
+        username=username,
+        email=f'{username}@example.com',
+        **extra
+    )
+
+
+def crear_evento(organizador, categoria=None, dias=5, aforo=50, **extra):
+    """Crea un evento futuro de prueba."""
+    inicio = timezone.now() + timedelta(days=dias)
+    return Evento.objects.create(
+        titulo=extra.pop('titulo', f'Evento {dias}'),
+        descripcion='Descripción',
+        fecha_inicio=inicio,
+        fecha_fin=inicio + timedelta(hours=2),
+        aforo=aforo,
+        ubicacion='Auditorio',
+        organizador=organizador,
+        categoria=categoria,
+        **extra
+    )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EventoListadoConsultasTests(TestCase):
+    """
+    El listado de eventos debe costar un número constante de consultas,
+    sin importar cuántos eventos o inscritos tenga la página.
+    """
+    url = '/api/events-utils/eventos/'
+
+    def setUp(self):
+        self.organizador = crear_usuario('organizador')
+        self.usuario = crear_usuario('asistente')
+        self.categoria = CategoriaEvento.objects.create(nombre='Tecnología')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+    def _crear_eventos(self, cantidad, inscritos_por_evento=3):
+        for i in range(cantidad):
+            evento = crear_evento(self.organizador, self.categoria, dias=i + 1)
+            for j in range(inscritos_por_evento):
+                Inscripcion.objects.create(
+                    usuario=crear_usuario(f'u{evento.id}_{j}'),
+                    evento=evento
+                )
+            Favorito.objects.create(usuario=self.usuario, evento=evento)
+
+    def _consultas_listado(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_listado_con_consultas_constantes(self):
+        self._crear_eventos(2)
+        consultas_pocos, _ = self._consultas_listado()
+
+        self._crear_eventos(6, inscritos_por_evento=5)
+        consultas_muchos, response = self._consultas_listado()
+
+        self.assertEqual(consultas_pocos, consultas_muchos)
+        # COUNT de paginación + página de eventos + prefetch de inscripciones
+        self.assertEqual(consultas_muchos, 3)
+        self.assertEqual(len(response.data['results']), 8)
+
+    def test_listado_conserva_valores_del_serializer(self):
+        self._crear_eventos(1, inscritos_por_evento=2)
+        otro = crear_evento(self.organizador, self.categoria, dias=9, titulo='Sin favorito')
+
+        _, response = self._consultas_listado()
+        resultados = {e['id']: e for e in response.data['results']}
+
+        con_inscritos = next(e for e in resultados.values() if e['id'] != otro.id)
+        self.assertEqual(con_inscritos['numero_inscritos'], 2)
+        self.assertEqual(len(con_inscritos['inscritos']), 2)
+        self.assertTrue(con_inscritos['is_favorito'])
+        # El usuario no es organizador: no ve código ni emails
+        self.assertIsNone(con_inscritos['codigo_confirmacion'])
+        self.assertIsNone(con_inscritos['inscritos'][0]['email'])
+
+        self.assertEqual(resultados[otro.id]['numero_inscritos'], 0)
+        self.assertFalse(resultados[otro.id]['is_favorito'])
+
+    def test_organizador_ve_codigo_y_emails(self):
+        self._crear_eventos(1, inscritos_por_evento=1)
+        self.client.force_authenticate(user=self.organizador)
+
+        _, response = self._consultas_listado()
+        evento = response.data['results'][0]
+
+        self.assertIsNotNone(evento['codigo_confirmacion'])
+        self.assertIsNotNone(evento['inscritos'][0]['email'])
+        self.assertFalse(evento['is_favorito'])
+
+    def test_listado_anonimo(self):
+        self._crear_eventos(2)
+        self.client.force_authenticate(user=None)
+
+        consultas, response = self._consultas_listado()
+
+        self.assertEqual(consultas, 3)
+        self.assertFalse(response.data['results'][0]['is_favorito'])
+
+    def test_paginacion_por_cursor_sin_count(self):
+        self._crear_eventos(5, inscritos_por_evento=1)
+        # Dos eventos a la misma hora: el desempate por id mantiene el orden estable
+        empate = Evento.objects.order_by('fecha_inicio').first()
+        otro = crear_evento(self.organizador, self.categoria, titulo='Empate')
+        Evento.objects.filter(id=otro.id).update(fecha_inicio=empate.fecha_inicio)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'paginacion': 'cursor', 'page_size': 4})
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+        self.assertNotIn('count', response.data)
+
+        vistos = []
+        while True:
+            vistos += [e['id'] for e in response.data['results']]
+            if not response.data['next']:
+                break
+            # El enlace siguiente trae ?cursor=, que selecciona el modo por sí solo
+            response = self.client.get(response.data['next'].replace('paginacion=cursor', ''))
+
+        esperado = list(Evento.objects.order_by('fecha_inicio', 'id').values_list('id', flat=True))
+        self.assertEqual(vistos, esperado)
+
+    def test_cursor_con_empates_sin_offset(self):
+        self._crear_eventos(5, inscritos_por_evento=0)
+        # Todos a la misma hora: la posición del cursor es (fecha_inicio, id)
+        Evento.objects.update(fecha_inicio=timezone.now() + timedelta(days=1))
+        esperado = list(Evento.objects.order_by('id').values_list('id', flat=True))
+
+        vistos = []
+        response = self.client.get(self.url, {'paginacion': 'cursor', 'page_size': 2})
+        while True:
+            vistos += [e['id'] for e in response.data['results']]
+            if not response.data['next']:
+                break
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(response.data['next'])
+            self.assertFalse(any('OFFSET' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(vistos, esperado)
+
+        # Hacia atrás con los enlaces anteriores
+        vistos = []
+        while True:
+            vistos = [e['id'] for e in response.data['results']] + vistos
+            if not response.data['previous']:
+                break
+            response = self.client.get(response.data['previous'])
+        self.assertEqual(vistos, esperado)
+
+        self.assertEqual(self.client.get(self.url, {'cursor': 'no-es-un-cursor'}).status_code, 404)
+
+    def test_paginacion_por_paginas_por_defecto(self):
+        self._crear_eventos(1, inscritos_por_evento=0)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data['count'], 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EventosPopularesTests(TestCase):
+    """Ranking de eventos populares calculado en BD y cacheado."""
+    url = '/api/events-utils/eventos/eventos_populares/'
+
+    def setUp(self):
+        cache.clear()
+        self.organizador = crear_usuario('organizador')
+        self.client = APIClient()
+        self.eventos = [crear_evento(self.organizador, dias=i + 1) for i in range(5)]
+        # Inscritos: evento[3] -> 3, evento[1] -> 2, evento[4] -> 1
+        for indice, cantidad in ((3, 3), (1, 2), (4, 1)):
+            for j in range(cantidad):
+                Inscripcion.objects.create(
+                    usuario=crear_usuario(f'p{indice}_{j}'),
+                    evento=self.eventos[indice]
+                )
+
+    def _ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [e['id'] for e in response.data]
+
+    def test_ranking_por_numero_de_inscritos(self):
+        ids = self._ids(self.client.get(self.url))
+        self.assertEqual(ids, [self.eventos[3].id, self.eventos[1].id, self.eventos[4].id])
+
+    def test_top_n_parametrizable(self):
+        ids = self._ids(self.client.get(self.url, {'top_n': 1}))
+        self.assertEqual(ids, [self.eventos[3].id])
+
+        ids = self._ids(self.client.get(self.url, {'top_n': 'x'}))
+        self.assertEqual(len(ids), 3)
+
+    def test_excluye_eventos_finalizados(self):
+        pasado = self.eventos[3]
+        Evento.objects.filter(pk=pasado.pk).update(
+            fecha_inicio=timezone.now() - timedelta(days=2),
+            fecha_fin=timezone.now() - timedelta(days=1),
+        )
+        cache.clear()
+        ids = self._ids(self.client.get(self.url))
+        self.assertNotIn(pasado.id, ids)
+
+    def test_cache_se_invalida_con_inscripciones(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        # Con el ranking en caché solo se cargan los eventos y sus inscripciones
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        for j in range(4):
+            Inscripcion.objects.create(
+                usuario=crear_usuario(f'nuevo_{j}'),
+                evento=self.eventos[0]
+            )
+        ids = self._ids(self.client.get(self.url))
+        self.assertEqual(ids[0], self.eventos[0].id)
+
+        Inscripcion.objects.filter(evento=self.eventos[0]).delete()
+        ids = self._ids(self.client.get(self.url))
+        self.assertNotIn(self.eventos[0].id, ids)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class InscritosCountTests(TestCase):
+    """Contador desnormalizado inscritos_count y reserva atómica de cupos."""
+
+    def setUp(self):
+        self.organizador = crear_usuario('organizador')
+        self.usuario = crear_usuario('asistente')
+        self.evento = crear_evento(self.organizador, aforo=2)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        self.url = f'/api/events-utils/eventos/{self.evento.id}/'
+
+    def _contador(self):
+        self.evento.refresh_from_db(fields=['inscritos_count'])
+        return self.evento.inscritos_count
+
+    def test_inscribirse_incrementa_el_contador(self):
+        response = self.client.post(self.url + 'inscribirse/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['inscripcion']['evento']['numero_inscritos'], 1)
+        self.assertEqual(self._contador(), 1)
+
+    def test_inscribirse_incluye_al_nuevo_inscrito(self):
+        Evento.objects.filter(pk=self.evento.pk).update(aforo=10)
+        previos = [crear_usuario(f'previo_{i}') for i in range(2)]
+        for usuario in previos:
+            Inscripcion.inscribir(usuario, self.evento)
+
+        response = self.client.post(self.url + 'inscribirse/')
+
+        evento = response.data['inscripcion']['evento']
+        self.assertEqual(evento['numero_inscritos'], 3)
+        self.assertEqual(
+            sorted(inscrito['id'] for inscrito in evento['inscritos']),
+            sorted(usuario.id for usuario in [*previos, self.usuario])
+        )
+
+    def test_inscribirse_no_carga_la_lista_de_inscritos(self):
+        Evento.objects.filter(pk=self.evento.pk).update(aforo=10)
+        for i in range(3):
+            Inscripcion.inscribir(crear_usuario(f'previo_{i}'), self.evento)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(self.url + 'inscribirse/')
+
+        sentencias = [
+            q['sql'] for q in consultas.captured_queries
+            if not q['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))
+        ]
+        fin_reserva = next(i for i, sql in enumerate(sentencias) if sql.startswith('UPDATE "eventos_evento"'))
+        # Reserva: el evento (get_object), el INSERT de la inscripción y el UPDATE condicional del cupo
+        reserva = sentencias[:fin_reserva + 1]
+        self.assertEqual(len(reserva), 3)
+        self.assertTrue(reserva[0].startswith('SELECT'))
+        self.assertNotIn('eventos_inscripcion', reserva[0])
+        self.assertTrue(reserva[1].startswith('INSERT INTO "eventos_inscripcion"'))
+
+    def test_inscripcion_duplicada_no_altera_el_contador(self):
+        self.client.post(self.url + 'inscribirse/')
+        response = self.client.post(self.url + 'inscribirse/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Ya estás inscrito en este evento.')
+        self.assertEqual(self._contador(), 1)
+
+    def test_evento_lleno_rechaza_inscripcion(self):
+        for i in range(2):
+            Inscripcion.inscribir(crear_usuario(f'lleno_{i}'), self.evento)
+
+        response = self.client.post(self.url + 'inscribirse/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'No hay cupos disponibles para este evento.')
+        self.assertFalse(Inscripcion.objects.filter(usuario=self.usuario).exists())
+        self.assertEqual(self._contador(), 2)
+        with self.assertRaises(SinCuposDisponibles):
+            Inscripcion.inscribir(crear_usuario('otro'), self.evento)
+
+    def test_desinscribirse_libera_el_cupo(self):
+        self.client.post(self.url + 'inscribirse/')
+        response = self.client.delete(self.url + 'desinscribirse/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._contador(), 0)
+
+    def test_inscripciones_por_viewset_respetan_el_aforo(self):
+        url = '/api/events-utils/inscripciones/'
+        for i in range(2):
+            usuario = crear_usuario(f'vs_{i}')
+            self.client.force_authenticate(user=usuario)
+            response = self.client.post(url, {'evento': self.evento.id, 'usuario': usuario.id})
+            self.assertEqual(response.status_code, 201)
+
+        self.client.force_authenticate(user=self.usuario)
+        response = self.client.post(url, {'evento': self.evento.id, 'usuario': self.usuario.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._contador(), 2)
+
+    def test_recalcular_inscritos_repara_desviaciones(self):
+        Inscripcion.objects.create(usuario=self.usuario, evento=self.evento)
+        Evento.objects.filter(pk=self.evento.pk).update(inscritos_count=7)
+
+        salida = StringIO()
+        call_command('recalcular_inscritos', '--dry-run', stdout=salida)
+        self.assertEqual(self._contador(), 7)
+        self.assertIn('contador=7, reales=1', salida.getvalue())
+
+        call_command('recalcular_inscritos', stdout=StringIO())
+        self.assertEqual(self._contador(), 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EstadisticasPlataformaTests(TestCase):
+    """Contadores públicos servidos desde una única instantánea en caché."""
+    endpoints = {
+        '/api/events-utils/eventos/estadisticas/': {'total_eventos': 2, 'eventos_proximos': 1},
+        '/api/events-utils/categorias/estadisticas/': {'total_categorias': 1},
+        '/api/events-utils/categorias/count_categories/': {'total': 1},
+        '/api/users-utils/usuarios/estadisticas/': {'total_usuarios': 1},
+        '/api/users-utils/usuarios/count_users/': {'total': 1},
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.organizador = crear_usuario('organizador')
+        CategoriaEvento.objects.create(nombre='Tecnología')
+        crear_evento(self.organizador)
+        crear_evento(self.organizador, dias=-3)
+        self.client = APIClient()
+
+    def test_endpoints_comparten_la_instantanea(self):
+        with CaptureQueriesContext(connection) as ctx:
+            for url, esperado in self.endpoints.items():
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200, url)
+                self.assertEqual(response.data, esperado)
+        # Eventos (total + próximos en un solo agregado), categorías y usuarios
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_señales_invalidan_la_instantanea(self):
+        self.client.get('/api/events-utils/eventos/estadisticas/')
+
+        crear_evento(self.organizador, dias=8)
+        CategoriaEvento.objects.create(nombre='Arte')
+        crear_usuario('nuevo')
+
+        self.assertEqual(
+            self.client.get('/api/events-utils/eventos/estadisticas/').data,
+            {'total_eventos': 3, 'eventos_proximos': 2}
+        )
+        self.assertEqual(self.client.get('/api/events-utils/categorias/count_categories/').data, {'total': 2})
+        self.assertEqual(self.client.get('/api/users-utils/usuarios/count_users/').data, {'total': 2})
+
+        Usuario.objects.get(username='nuevo').delete()
+        self.assertEqual(self.client.get('/api/users-utils/usuarios/count_users/').data, {'total': 1})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class MisEventosReportesTests(TestCase):
+    """Reportes del organizador con un número constante de consultas y resumen en caché."""
+    url = '/api/events-utils/eventos/mis_eventos_reportes/'
+
+    def setUp(self):
+        cache.clear()
+        self.organizador = crear_usuario('organizador')
+        self.asistentes = [crear_usuario(f'asistente_{i}') for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organizador)
+
+    def _crear_eventos(self, cantidad, desde=1):
+        eventos = []
+        for dias in range(desde, desde + cantidad):
+            evento = crear_evento(self.organizador, dias=dias, aforo=4)
+            for asistente in self.asistentes[:2]:
+                Inscripcion.inscribir(asistente, evento)
+            Inscripcion.objects.filter(evento=evento, usuario=self.asistentes[0]).update(asistencia_confirmada=True)
+            Reseña.objects.create(evento=evento, usuario=self.asistentes[0], puntuacion=4)
+            Reseña.objects.create(evento=evento, usuario=self.asistentes[1], puntuacion=5)
+            eventos.append(evento)
+        return eventos
+
+    def test_metricas_por_evento_y_resumen(self):
+        self._crear_eventos(2)
+        crear_evento(crear_usuario('otro'), dias=3)
+
+        data = self.client.get(self.url).data
+        self.assertEqual(data['resumen'], {
+            'total_eventos': 2, 'total_inscritos': 4, 'total_confirmados': 2, 'promedio_ocupacion': 50.0,
+        })
+        evento = data['eventos'][0]
+        self.assertEqual(
+            (evento['total_inscritos'], evento['confirmados'], evento['pendientes'],
+             evento['porcentaje_confirmacion'], evento['porcentaje_ocupacion'], evento['promedio_calificacion']),
+            (2, 1, 1, 50.0, 50.0, 4.5)
+        )
+
+    def test_consultas_constantes_y_resumen_en_cache(self):
+        self._crear_eventos(2)
+        # resumen agregado + COUNT del paginador + página
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+
+        self._crear_eventos(8, desde=10)
+        cache.clear()
+        with self.assertNumQueries(3):
+            data = self.client.get(self.url).data
+        self.assertEqual(len(data['eventos']), 10)
+
+        # Segunda lectura: el resumen sale de la caché
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_inscripcion_invalida_el_resumen(self):
+        evento = self._crear_eventos(1)[0]
+        self.assertEqual(self.client.get(self.url).data['resumen']['total_inscritos'], 2)
+
+        Inscripcion.inscribir(self.asistentes[2], evento)
+        self.assertEqual(self.client.get(self.url).data['resumen']['total_inscritos'], 3)
+
+    def test_paginacion_y_filtro_de_fechas(self):
+        self._crear_eventos(3)
+
+        data = self.client.get(self.url, {'page_size': 2}).data
+        self.assertEqual(len(data['eventos']), 2)
+        self.assertEqual(data['paginacion']['count'], 3)
+        self.assertIsNotNone(data['paginacion']['next'])
+        self.assertEqual(data['resumen']['total_eventos'], 3)
+
+        dia = timezone.localdate(timezone.now() + timedelta(days=2)).isoformat()
+        data = self.client.get(self.url, {'inicio': dia, 'fin': dia}).data
+        self.assertEqual(data['resumen']['total_eventos'], 1)
+        self.assertEqual(len(data['eventos']), 1)
+
+        self.assertEqual(self.client.get(self.url, {'inicio': '2025-02-30'}).status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ReporteOrganizadorTests(TestCase):
+    """Reporte de un evento: estadísticas en una consulta e inscritos por cursor."""
+
+    def setUp(self):
+        self.organizador = crear_usuario('organizador')
+        self.evento = crear_evento(self.organizador, aforo=20)
+        self.url = f'/api/events-utils/eventos/{self.evento.id}/reporte_organizador/'
+        for i in range(7):
+            asistente = crear_usuario(f'asistente_{i}', first_name='Ana' if i == 3 else 'Luis')
+            inscripcion = Inscripcion.inscribir(asistente, self.evento)
+            if i < 2:
+                inscripcion.asistencia_confirmada = True
+                inscripcion.fecha_confirmacion = timezone.now()
+                inscripcion.save()
+            if i < 3:
+                Reseña.objects.create(evento=self.evento, usuario=asistente, puntuacion=3 + i)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organizador)
+
+    def test_estadisticas_y_pagina_en_dos_consultas(self):
+        with self.assertNumQueries(2):
+            data = self.client.get(self.url, {'page_size': 3}).data
+
+        self.assertEqual(data['estadisticas'], {
+            'total_inscritos': 7, 'confirmados': 2, 'pendientes': 5, 'porcentaje_confirmacion': 28.57,
+            'cupos_disponibles': 13, 'porcentaje_ocupacion': 35.0, 'promedio_calificacion': 4.0,
+            'total_reseñas': 3,
+        })
+        self.assertEqual([i['username'] for i in data['inscritos']], ['asistente_0', 'asistente_1', 'asistente_2'])
+
+    def test_cursor_recorre_todos_sin_repetir(self):
+        vistos = []
+        respuesta = self.client.get(self.url, {'page_size': 3, 'ordering': '-username'})
+        while True:
+            vistos += [i['username'] for i in respuesta.data['inscritos']]
+            siguiente = respuesta.data['paginacion']['next']
+            if not siguiente:
+                break
+            respuesta = self.client.get(siguiente)
+
+        self.assertEqual(vistos, [f'asistente_{i}' for i in range(6, -1, -1)])
+
+    def test_busqueda_y_filtro_de_asistencia(self):
+        data = self.client.get(self.url, {'search': 'ana'}).data
+        self.assertEqual([i['username'] for i in data['inscritos']], ['asistente_3'])
+        # Las estadísticas siguen cubriendo a todo el evento
+        self.assertEqual(data['estadisticas']['total_inscritos'], 7)
+
+        data = self.client.get(self.url, {'asistencia': 'confirmada'}).data
+        self.assertEqual(len(data['inscritos']), 2)
+        self.assertEqual(self.client.get(self.url, {'ordering': 'email'}).status_code, 400)
+
+    def test_csv_en_streaming(self):
+        response = self.client.get(self.url, {'formato': 'csv', 'asistencia': 'pendiente'})
+
+        self.assertTrue(response.streaming)
+        filas = b''.join(response.streaming_content).decode('utf-8').strip().splitlines()
+        self.assertEqual(filas[0].split(',')[:3], ['Nombre', 'Usuario', 'Email'])
+        self.assertEqual(len(filas), 6)
+
+    def test_solo_el_organizador(self):
+        self.client.force_authenticate(user=crear_usuario('intruso'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Requiere bloqueos de fila de PostgreSQL')
+class InscripcionConcurrenteTests(TransactionTestCase):
+    """Muchas inscripciones simultáneas no deben sobrepasar el aforo."""
+
+    def test_inscripciones_concurrentes_no_sobrepasan_el_aforo(self):
+        organizador = crear_usuario('organizador')
+        evento = crear_evento(organizador, aforo=5)
+        usuarios = [crear_usuario(f'concurrente_{i}') for i in range(20)]
+        barrera = threading.Barrier(len(usuarios))
+        resultados = []
+
+        def inscribir(usuario):
+            try:
+                barrera.wait()
+                Inscripcion.inscribir(usuario, Evento.objects.get(pk=evento.pk))
+                resultados.append('ok')
+            except SinCuposDisponibles:
+                resultados.append('lleno')
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=inscribir, args=(u,)) for u in usuarios]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        evento.refresh_from_db()
+        self.assertEqual(resultados.count('ok'), 5)
+        self.assertEqual(resultados.count('lleno'), 15)
+        self.assertEqual(evento.inscritos_count, 5)
+        self.assertEqual(Inscripcion.objects.filter(evento=evento).count(), 5)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'EXPLAIN (FORMAT JSON) de PostgreSQL')
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PlanesDeConsultaTests(TestCase):
+    """
+    Ejecuta los endpoints más frecuentes sobre un conjunto de datos sembrado y
+    pasa cada SELECT capturado por EXPLAIN. Falla si alguna consulta recorre
+    secuencialmente una de las tablas indexadas para ese acceso.
+
+    Se desactiva enable_seqscan durante el EXPLAIN: así PostgreSQL solo elige
+    un Seq Scan cuando ningún índice sirve para la consulta, sin depender del
+    tamaño de la tabla ni de las estadísticas.
+    """
+    EVENTOS_SEMBRADOS = 400
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = crear_usuario('organizador')
+        cls.usuario = crear_usuario('asistente')
+        ahora = timezone.now()
+        Evento.objects.bulk_create([
+            Evento(
+                titulo=f'Evento {i}',
+                descripcion='Descripción',
+                fecha_inicio=ahora + timedelta(days=i - cls.EVENTOS_SEMBRADOS // 2),
+                fecha_fin=ahora + timedelta(days=i - cls.EVENTOS_SEMBRADOS // 2, hours=2),
+                aforo=100,
+                ubicacion='Auditorio',
+                organizador=cls.organizador if i % 20 == 0 else cls.usuario,
+                codigo_confirmacion=f'C{i:05d}',
+            )
+            for i in range(cls.EVENTOS_SEMBRADOS)
+        ])
+        eventos = list(Evento.objects.order_by('id'))
+        cls.evento = eventos[-1]
+        Inscripcion.objects.bulk_create([
+            Inscripcion(usuario=cls.organizador, evento=evento, asistencia_confirmada=i % 3 == 0)
+            for i, evento in enumerate(eventos)
+        ])
+        notificaciones = Notificacion.objects.bulk_create([
+            Notificacion(evento=evento, tipo='evento', etiqueta='general', mensaje='Cambio')
+            for evento in eventos[:100]
+        ])
+        UsuarioNotificacion.objects.bulk_create([
+            UsuarioNotificacion(usuario=cls.organizador, notificacion=n, leida=i % 2 == 0)
+            for i, n in enumerate(notificaciones)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organizador)
+
+    def _recorridos_secuenciales(self, sql):
+        """Retorna las tablas que el plan de `sql` recorre con Seq Scan."""
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+                plan = cursor.fetchone()[0][0]['Plan']
+            finally:
+                cursor.execute('RESET enable_seqscan')
+
+        tablas, pendientes = set(), [plan]
+        while pendientes:
+            nodo = pendientes.pop()
+            if nodo['Node Type'] == 'Seq Scan':
+                tablas.add(nodo['Relation Name'])
+            pendientes.extend(nodo.get('Plans', []))
+        return tablas
+
+    def _assert_sin_recorrido_secuencial(self, peticion, tablas):
+        with CaptureQueriesContext(connection) as ctx:
+            response = peticion()
+        self.assertLess(response.status_code, 400)
+
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects)
+        for sql in selects:
+            recorridas = self._recorridos_secuenciales(sql) & tablas
+            self.assertFalse(recorridas, f'Seq Scan sobre {recorridas} en:\n{sql}')
+
+    def test_listado_por_rango_de_fechas(self):
+        ahora = timezone.now()
+        self._assert_sin_recorrido_secuencial(
+            lambda: self.client.get('/api/events-utils/eventos/', {
+                'fecha_inicio__gte': ahora.isoformat(),
+                'fecha_inicio__lte': (ahora + timedelta(days=7)).isoformat(),
+            }),
+            {'eventos_evento', 'eventos_inscripcion'}
+        )
+
+    def test_eventos_del_organizador(self):
+        for accion in ('eventos_creados', 'eventos_pasados_creados'):
+            with self.subTest(accion=accion):
+                self._assert_sin_recorrido_secuencial(
+                    lambda: self.client.get(f'/api/events-utils/eventos/{accion}/'),
+                    {'eventos_evento'}
+                )
+
+    def test_eventos_asistidos(self):
+        self._assert_sin_recorrido_secuencial(
+            lambda: self.client.get('/api/events-utils/eventos/eventos_asistidos/'),
+            {'eventos_inscripcion'}
+        )
+
+    def test_confirmar_por_codigo(self):
+        self._assert_sin_recorrido_secuencial(
+            lambda: self.client.post(
+                '/api/events-utils/eventos/confirmar-por-codigo/',
+                {'codigo': self.evento.codigo_confirmacion.lower()}
+            ),
+            {'eventos_evento', 'eventos_inscripcion'}
+        )
+
+    def test_conteo_de_notificaciones(self):
+        self._assert_sin_recorrido_secuencial(
+            lambda: self.client.get('/api/notifications-utils/notificaciones/conteo/'),
+            {'notificaciones_usuarionotificacion'}
+        )
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class MensajeInscritosTests(TestCase):
+    """Envío de mensajes del organizador a los inscritos en lotes paralelos."""
+
+    def setUp(self):
+        self.organizador = crear_usuario('organizador_mensajes')
+        self.evento = crear_evento(self.organizador)
+        for i in range(5):
+            Inscripcion.objects.create(usuario=crear_usuario(f'inscrito_mensajes_{i}'), evento=self.evento)
+        sin_email = crear_usuario('sin_email')
+        Usuario.objects.filter(pk=sin_email.pk).update(email='')
+        Inscripcion.objects.create(usuario=sin_email, evento=self.evento)
+
+    def test_envio_en_lotes(self):
+        conexiones = []
+        get_connection_original = tasks.get_connection
+
+        def contar_conexion(*args, **kwargs):
+            conexiones.append(get_connection_original(*args, **kwargs))
+            return conexiones[-1]
+
+        # El chord se ejecuta en el proceso de la prueba
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+
+        with mock.patch.object(tasks, 'TAMANO_LOTE_EMAILS', 2), \
+                mock.patch.object(tasks, 'get_connection', side_effect=contar_conexion):
+            resultado = tasks.send_message_to_inscritos(self.evento.id, 'Asunto', 'Hola', 'Organizador')
+
+        self.assertEqual(resultado['lotes'], 3)
+        self.assertEqual(resultado['destinatarios'], 5)
+        # Una conexión por lote y un email por destinatario
+        self.assertEqual(len(conexiones), 3)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f'inscrito_mensajes_{i}@example.com' for i in range(5)])
+
+    def test_resumen_suma_los_lotes(self):
+        resumen = tasks.resumen_envio_emails(
+            [{'enviados': 2, 'fallidos': 0}, {'enviados': 1, 'fallidos': 1}], 'Evento', 6
+        )
+
+        self.assertEqual(resumen, {
+            'evento': 'Evento', 'emails_enviados': 3, 'emails_fallidos': 1, 'total_inscritos': 6, 'lotes': 2
+        })
+
+    def test_un_send_messages_por_lote(self):
+        emails = ['a@example.com', 'b@example.com', 'c@example.com']
+        send_messages = locmem.EmailBackend.send_messages
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', autospec=True, side_effect=send_messages) as envio:
+            resultado = tasks.enviar_lote_emails('Asunto', 'Hola', emails, 2, 3)
+
+        self.assertEqual(resultado, {'enviados': 3, 'fallidos': 0})
+        self.assertEqual(envio.call_count, 1)
+        self.assertEqual([m.to[0] for m in mail.outbox], emails)
+
+    def test_fallo_de_un_destinatario_no_corta_el_lote(self):
+        def rechazar_b(mensajes):
+            for mensaje in mensajes:
+                if mensaje.to[0] == 'b@example.com':
+                    raise Exception('rechazado')
+                mail.outbox.append(mensaje)
+            return len(mensajes)
+
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', side_effect=rechazar_b) as envio:
+            resultado = tasks.enviar_lote_emails('Asunto', 'Hola', ['a@example.com', 'b@example.com', 'c@example.com'])
+
+        self.assertEqual(resultado, {'enviados': 2, 'fallidos': 1})
+        # El lote completo y después solo el resto, sin repetir el ya entregado
+        self.assertEqual(envio.call_count, 2)
+        self.assertEqual([m.to[0] for m in mail.outbox], ['a@example.com', 'c@example.com'])
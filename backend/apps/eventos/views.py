@@ -4,12 +4,24 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import serializers
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.db import models
+from django.db import IntegrityError
+from django.db.models import Avg, Case, Count, Exists, F, OuterRef, Prefetch, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce
+from rest_framework.generics import get_object_or_404
 from django.conf import settings
-from .models import Evento, CategoriaEvento, Inscripcion, Reseña
+from .models import Evento, CategoriaEvento, Inscripcion, Reseña, Favorito, SinCuposDisponibles
 from .serializer import EventoSerializer, CategoriaEventoSerializer, InscripcionSerializer, InscripcionDetalleSerializer, EstadisticasEventosSerializer, EstadisticasCategoriasSerializer, ReseñaSerializer
 from .tasks import send_email_task, send_message_to_inscritos
-from apps.notificaciones.tasks import notificar_cambio_evento
+from .cache import obtener_ids_eventos_populares, obtener_estadisticas_plataforma, obtener_resumen_organizador, EVENTOS_POPULARES_DEFAULT, EVENTOS_POPULARES_MAX
+from .paginacion import (
+    EventosCursorPagination, InscripcionesCursorPagination, InscritosCursorPagination,
+    PaginacionSeleccionableMixin, ReportesOrganizadorPagination, ReseñasCursorPagination,
+)
+from apps.reportes.exportacion import TAMANO_CHUNK_EXPORTACION, generar_lineas_csv, respuesta_streaming
+from apps.notificaciones.tasks import notificar_cambios_evento
+from apps.notificaciones.recordatorios import programar_recordatorios, reprogramar_recordatorios
 
 class CategoriaEventoViewSet(viewsets.ModelViewSet):
     """
@@ -37,7 +49,7 @@ class CategoriaEventoViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def count_categories(self, request):
         """Retorna el total de categorías disponibles."""
-        total = CategoriaEvento.objects.count()
+        total = obtener_estadisticas_plataforma()['total_categorias']
         return Response({'total': total})
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
@@ -46,21 +58,20 @@ class CategoriaEventoViewSet(viewsets.ModelViewSet):
         Endpoint para obtener estadísticas de categorías.
         Accesible públicamente sin autenticación.
         """
-        # Crear una instancia ficticia para el serializer
-        categoria = CategoriaEvento.objects.first() if CategoriaEvento.objects.exists() else None
-        
-        serializer = EstadisticasCategoriasSerializer(categoria)
+        serializer = EstadisticasCategoriasSerializer(obtener_estadisticas_plataforma())
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 
-class EventoViewSet(viewsets.ModelViewSet):
+class EventoViewSet(PaginacionSeleccionableMixin, viewsets.ModelViewSet):
     """
     ViewSet para el modelo Evento.
     - Cualquier persona puede ver eventos (list, retrieve)
     - Solo usuarios autenticados pueden crear/editar/eliminar eventos
+    - ?paginacion=cursor pagina por (fecha_inicio, id) sin COUNT
     """
     queryset = Evento.objects.all()
     serializer_class = EventoSerializer
+    cursor_pagination_class = EventosCursorPagination
 
     # 🔍 Búsqueda textual
     search_fields = ['titulo', 'descripcion', 'ubicacion', 'categoria__nombre']
@@ -150,16 +161,46 @@ class EventoViewSet(viewsets.ModelViewSet):
                     # Solo eventos donde el usuario NO está inscrito
                     queryset = queryset.exclude(id__in=inscripciones)
         
+        # Solo list y retrieve serializan eventos desde este queryset; las
+        # acciones de escritura (inscribirse, desinscribirse, ...) usan
+        # get_object() y no deben cargar la lista de inscritos
+        if self.action in ('list', 'retrieve'):
+            return self.anotar_para_serializer(queryset)
         return queryset
 
+    def anotar_para_serializer(self, queryset):
+        """
+        Agrega al queryset los datos que EventoSerializer necesita por fila,
+        para que serializar una página cueste un número constante de consultas:
+        - organizador y categoria con select_related
+        - is_favorito_anotado: Exists() sobre Favorito del usuario autenticado
+        - inscripciones_prefetch: lista de inscripciones con su usuario
+        """
+        user = self.request.user
+        if user.is_authenticated:
+            is_favorito = Exists(
+                Favorito.objects.filter(usuario=user, evento=OuterRef('pk'))
+            )
+        else:
+            is_favorito = Value(False, output_field=models.BooleanField())
+        
+        return queryset.select_related('organizador', 'categoria').annotate(
+            is_favorito_anotado=is_favorito,
+        ).prefetch_related(
+            Prefetch(
+                'inscripciones',
+                queryset=Inscripcion.objects.select_related('usuario'),
+                to_attr='inscripciones_prefetch'
+            )
+        )
+
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def estadisticas(self, request):
         """
         Endpoint para obtener estadísticas de eventos.
         Accesible públicamente sin autenticación.
         """
-        evento = Evento.objects.first() if Evento.objects.exists() else None
-        serializer = EstadisticasEventosSerializer(evento)
+        serializer = EstadisticasEventosSerializer(obtener_estadisticas_plataforma())
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def get_permissions(self):
@@ -207,6 +248,13 @@ class EventoViewSet(viewsets.ModelViewSet):
         except Exception as e:
             # Si falla el envío del email, no debe impedir la creación del evento
             logger.error(f"Error al enviar email de confirmación: {str(e)}")
+        
+        # Programar los recordatorios (1 día, 1 hora y 15 minutos antes) con ETA
+        try:
+            programar_recordatorios(event)
+        except Exception as e:
+            # Si falla, la tarea periódica programar_recordatorios_proximos los encolará
+            logger.error(f"Error al programar recordatorios del evento {event.id}: {str(e)}")
 
     def perform_update(self, serializer):
         """
@@ -265,27 +313,31 @@ class EventoViewSet(viewsets.ModelViewSet):
                 'valor_nuevo': evento_actualizado.fecha_fin.strftime('%d/%m/%Y %H:%M') if evento_actualizado.fecha_fin else None
             })
         
+        # Si cambió la fecha de inicio, invalidar los recordatorios programados y reprogramarlos
+        if evento_actualizado.fecha_inicio != fecha_inicio_anterior:
+            try:
+                reprogramar_recordatorios(evento_actualizado)
+            except Exception as e:
+                logger.error(f"❌ [UPDATE] Error al reprogramar recordatorios del evento {evento_actualizado.id}: {str(e)}")
+        
         if not campos_cambiados:
             logger.info(f"ℹ️  [UPDATE] No se detectaron cambios en ubicación, fecha_inicio o fecha_fin para el evento {evento_actualizado.id}")
         else:
             logger.info(f"🔔 [UPDATE] Se detectaron {len(campos_cambiados)} cambio(s). Enviando notificaciones...")
         
-        # Enviar notificaciones para cada campo cambiado
-        for cambio in campos_cambiados:
-            try:
-                logger.info(f"📤 [UPDATE] Enviando tarea Celery para notificar cambio de '{cambio['campo']}' en evento {evento_actualizado.id}")
-                notificar_cambio_evento.delay(
-                    evento_actualizado.id,
-                    cambio['campo'],
-                    cambio['valor_anterior'],
-                    cambio['valor_nuevo']
-                )
-                logger.info(f"✅ [UPDATE] Tarea Celery enviada exitosamente para cambio de '{cambio['campo']}'")
-            except Exception as e:
-                # Si falla la notificación, no debe impedir la actualización del evento
-                logger.error(f"❌ [UPDATE] Error al enviar tarea Celery para cambio de {cambio['campo']} en evento {evento_actualizado.id}: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
+        if not campos_cambiados:
+            return
+        
+        # Una sola tarea con todos los cambios: una notificación y un fan-out
+        try:
+            logger.info(f"📤 [UPDATE] Enviando tarea Celery para notificar cambios de {', '.join(c['campo'] for c in campos_cambiados)} en evento {evento_actualizado.id}")
+            notificar_cambios_evento.delay(evento_actualizado.id, campos_cambiados)
+            logger.info(f"✅ [UPDATE] Tarea Celery enviada exitosamente")
+        except Exception as e:
+            # Si falla la notificación, no debe impedir la actualización del evento
+            logger.error(f"❌ [UPDATE] Error al enviar tarea Celery de cambios en evento {evento_actualizado.id}: {str(e)}")
+            import traceback
+            logger.error(traceback.format_exc())
 
     def create(self, request, *args, **kwargs):
         """
@@ -342,26 +394,22 @@ class EventoViewSet(viewsets.ModelViewSet):
         """
         evento = self.get_object()
         
-        # Verificar si ya está inscrito
-        if Inscripcion.objects.filter(usuario=request.user, evento=evento).exists():
+        # Crear la inscripción y reservar el cupo en una sola transacción.
+        # La restricción unique_inscripcion detecta inscripciones duplicadas y el
+        # UPDATE condicional sobre inscritos_count evita sobrepasar el aforo.
+        try:
+            inscripcion = Inscripcion.inscribir(request.user, evento)
+        except IntegrityError:
             return Response(
                 {'error': 'Ya estás inscrito en este evento.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Verificar si hay cupos disponibles
-        if not evento.tiene_cupos_disponibles():
+        except SinCuposDisponibles:
             return Response(
                 {'error': 'No hay cupos disponibles para este evento.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Crear la inscripción
-        inscripcion = Inscripcion.objects.create(
-            usuario=request.user,
-            evento=evento
-        )
-        
         serializer = InscripcionDetalleSerializer(inscripcion)
         return Response(
             {
@@ -529,19 +577,25 @@ class EventoViewSet(viewsets.ModelViewSet):
         """
         Retorna los eventos más populares (con más inscritos).
         Ordenados por número de inscritos descendente.
+        Parámetros: top_n (query param, opcional, por defecto 3, máximo 20)
         """
-        ahora = timezone.now()
-        eventos = Evento.objects.filter(fecha_fin__gt=ahora)
-        
-        # Ordenar por número de inscritos (descendente)
-        eventos_ordenados = sorted(
-            eventos,
-            key=lambda e: e.inscripciones.count(),
-            reverse=True
+        try:
+            top_n = int(request.query_params.get('top_n', EVENTOS_POPULARES_DEFAULT))
+        except (TypeError, ValueError):
+            top_n = EVENTOS_POPULARES_DEFAULT
+        top_n = max(1, min(top_n, EVENTOS_POPULARES_MAX))
+        
+        # El ranking (solo IDs) se calcula en BD y se cachea; los datos del
+        # serializer dependen del usuario, así que se cargan en cada petición
+        ids_populares = obtener_ids_eventos_populares(top_n)
+        eventos = self.anotar_para_serializer(
+            Evento.objects.filter(id__in=ids_populares, fecha_fin__gt=timezone.now())
         )
-        
-        # Tomar solo los primeros 3
-        eventos_populares = eventos_ordenados[:3]
+        eventos_por_id = {evento.id: evento for evento in eventos}
+        eventos_populares = [
+            eventos_por_id[evento_id] for evento_id in ids_populares
+            if evento_id in eventos_por_id
+        ]
         
         serializer = self.get_serializer(eventos_populares, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -629,10 +683,10 @@ class EventoViewSet(viewsets.ModelViewSet):
         ahora = timezone.now()
         
         # Obtener eventos donde el usuario es organizador y que aún no han finalizado
-        eventos_creados = Evento.objects.filter(
+        eventos_creados = self.anotar_para_serializer(Evento.objects.filter(
             organizador=request.user,
             fecha_fin__gte=ahora
-        ).order_by('fecha_inicio')
+        )).order_by('fecha_inicio')
         
         serializer = self.get_serializer(eventos_creados, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -690,10 +744,10 @@ class EventoViewSet(viewsets.ModelViewSet):
             )
         
         # Obtener eventos futuros creados por el usuario
-        eventos = Evento.objects.filter(
+        eventos = self.anotar_para_serializer(Evento.objects.filter(
             organizador=usuario,
             fecha_fin__gte=ahora
-        ).order_by('fecha_inicio')
+        )).order_by('fecha_inicio')
         
         serializer = self.get_serializer(eventos, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -737,10 +791,10 @@ class EventoViewSet(viewsets.ModelViewSet):
         eventos_compartidos_ids = set(inscripciones_usuario_actual) & set(inscripciones_otro_usuario)
         
         # Filtrar eventos futuros
-        eventos_compartidos = Evento.objects.filter(
+        eventos_compartidos = self.anotar_para_serializer(Evento.objects.filter(
             id__in=eventos_compartidos_ids,
             fecha_fin__gte=ahora
-        ).order_by('fecha_inicio')
+        )).order_by('fecha_inicio')
         
         serializer = self.get_serializer(eventos_compartidos, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -786,10 +840,10 @@ class EventoViewSet(viewsets.ModelViewSet):
         eventos_compartidos_ids = set(inscripciones_usuario_actual) & set(inscripciones_otro_usuario)
         
         # Filtrar eventos pasados
-        eventos_compartidos = Evento.objects.filter(
+        eventos_compartidos = self.anotar_para_serializer(Evento.objects.filter(
             id__in=eventos_compartidos_ids,
             fecha_fin__lt=ahora
-        ).order_by('-fecha_fin')
+        )).order_by('-fecha_fin')
         
         serializer = self.get_serializer(eventos_compartidos, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -804,10 +858,10 @@ class EventoViewSet(viewsets.ModelViewSet):
         ahora = timezone.now()
         
         # Obtener eventos pasados donde el usuario es organizador
-        eventos_pasados = Evento.objects.filter(
+        eventos_pasados = self.anotar_para_serializer(Evento.objects.filter(
             organizador=request.user,
             fecha_fin__lt=ahora
-        ).order_by('-fecha_fin')
+        )).order_by('-fecha_fin')
         
         serializer = self.get_serializer(eventos_pasados, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -944,52 +998,103 @@ class EventoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    # Órdenes permitidos para el listado de inscritos de reporte_organizador
+    ORDEN_INSCRITOS = {
+        'fecha_inscripcion': ('fecha_inscripcion', 'id'),
+        '-fecha_inscripcion': ('-fecha_inscripcion', '-id'),
+        'username': ('username_orden', 'id'),
+        '-username': ('-username_orden', '-id'),
+    }
+
     @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
     def reporte_organizador(self, request, pk=None):
         """ 
         Retorna un reporte detallado de asistencia para un evento específico.
         Solo accesible por el organizador del evento.
+        Query params opcionales del listado de inscritos:
+        - search: busca en usuario, nombre, apellido, email y código estudiantil
+        - asistencia: confirmada | pendiente
+        - ordering: fecha_inscripcion, -fecha_inscripcion, username, -username
+        - cursor, page_size: paginación por cursor
+        - formato=csv: descarga en streaming de todos los inscritos filtrados
         """
-        evento = self.get_object()
+        # Evento y estadísticas en una sola consulta (sin el prefetch de
+        # inscripciones de get_queryset)
+        total_reseñas = (
+            Reseña.objects
+            .filter(evento=OuterRef('pk'))
+            .order_by()
+            .values('evento')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        evento = get_object_or_404(
+            self.anotar_para_reportes(Evento.objects.select_related('categoria')).annotate(
+                total_reseñas_anotado=Coalesce(Subquery(total_reseñas, output_field=models.IntegerField()), 0)
+            ),
+            pk=pk
+        )
+        self.check_object_permissions(request, evento)
     
         # Verificar que el usuario es el organizador
-        if evento.organizador != request.user:
+        if evento.organizador_id != request.user.id:
             return Response(
                 {'error': 'Solo el organizador puede ver este reporte.'},
                 status=status.HTTP_403_FORBIDDEN
             )
     
-        # Obtener todas las inscripciones
-        inscripciones = evento.inscripciones.select_related('usuario').all()
+        orden = request.query_params.get('ordering', 'fecha_inscripcion')
+        if orden not in self.ORDEN_INSCRITOS:
+            return Response(
+                {'error': f"Orden inválido. Opciones: {', '.join(self.ORDEN_INSCRITOS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
     
-        # Calcular estadísticas
-        total_inscritos = inscripciones.count()
-        confirmados = inscripciones.filter(asistencia_confirmada=True).count()
-        pendientes = total_inscritos - confirmados
-        porcentaje_confirmacion = (confirmados / total_inscritos * 100) if total_inscritos > 0 else 0
-        cupos_disponibles = evento.aforo - total_inscritos
-        porcentaje_ocupacion = (total_inscritos / evento.aforo * 100) if evento.aforo > 0 else 0
+        inscripciones = Inscripcion.objects.filter(evento_id=evento.id).annotate(
+            username_orden=F('usuario__username')
+        )
+        busqueda = request.query_params.get('search', '').strip()
+        if busqueda:
+            inscripciones = inscripciones.filter(
+                Q(usuario__username__icontains=busqueda)
+                | Q(usuario__first_name__icontains=busqueda)
+                | Q(usuario__last_name__icontains=busqueda)
+                | Q(usuario__email__icontains=busqueda)
+                | Q(usuario__codigo_estudiantil__icontains=busqueda)
+            )
+        asistencia = request.query_params.get('asistencia')
+        if asistencia in ('confirmada', 'pendiente'):
+            inscripciones = inscripciones.filter(asistencia_confirmada=(asistencia == 'confirmada'))
+        inscripciones = inscripciones.values(
+            'id', 'username_orden', 'fecha_inscripcion', 'asistencia_confirmada', 'fecha_confirmacion',
+            'usuario__id', 'usuario__first_name', 'usuario__last_name',
+            'usuario__email', 'usuario__codigo_estudiantil',
+        )
     
-        # Obtener reseñas del evento
-        from django.db.models import Avg
-        reseñas = Reseña.objects.filter(evento=evento)
-        promedio_calificacion = reseñas.aggregate(promedio=Avg('puntuacion'))['promedio'] or 0
-        total_reseñas = reseñas.count()
+        if request.query_params.get('formato') == 'csv':
+            return self._inscritos_csv(request, evento, inscripciones.order_by(*self.ORDEN_INSCRITOS[orden]))
     
-        # Preparar lista de inscritos con detalles
-        inscritos_detalle = []
-        for inscripcion in inscripciones:
-            usuario = inscripcion.usuario
-            inscritos_detalle.append({
-                'id': usuario.id,
-                'username': usuario.username,
-                'nombre_completo': f"{usuario.first_name} {usuario.last_name}".strip() or usuario.username,
-                'email': usuario.email,
-                'codigo_estudiantil': usuario.codigo_estudiantil,
-                'fecha_inscripcion': inscripcion.fecha_inscripcion.isoformat(),
-                'asistencia_confirmada': inscripcion.asistencia_confirmada,
-                'fecha_confirmacion': inscripcion.fecha_confirmacion.isoformat() if inscripcion.fecha_confirmacion else None,
-            })
+        paginador = InscritosCursorPagination(self.ORDEN_INSCRITOS[orden])
+        pagina = paginador.paginate_queryset(inscripciones, request, view=self)
+    
+        inscritos_detalle = [
+            {
+                'id': i['usuario__id'],
+                'username': i['username_orden'],
+                'nombre_completo': f"{i['usuario__first_name']} {i['usuario__last_name']}".strip() or i['username_orden'],
+                'email': i['usuario__email'],
+                'codigo_estudiantil': i['usuario__codigo_estudiantil'],
+                'fecha_inscripcion': i['fecha_inscripcion'].isoformat(),
+                'asistencia_confirmada': i['asistencia_confirmada'],
+                'fecha_confirmacion': i['fecha_confirmacion'].isoformat() if i['fecha_confirmacion'] else None,
+            }
+            for i in pagina
+        ]
+    
+        # Calcular estadísticas
+        total_inscritos = evento.total_inscritos_anotado
+        confirmados = evento.confirmados_anotado
+        porcentaje_confirmacion = (confirmados / total_inscritos * 100) if total_inscritos > 0 else 0
     
         # Datos del evento
         evento_data = {
@@ -1008,39 +1113,113 @@ class EventoViewSet(viewsets.ModelViewSet):
             'estadisticas': {
                 'total_inscritos': total_inscritos,
                 'confirmados': confirmados,
-                'pendientes': pendientes,
+                'pendientes': total_inscritos - confirmados,
                 'porcentaje_confirmacion': round(porcentaje_confirmacion, 2),
-                'cupos_disponibles': cupos_disponibles,
-                'porcentaje_ocupacion': round(porcentaje_ocupacion, 2),
-                'promedio_calificacion': round(promedio_calificacion, 2) if promedio_calificacion else 0,
-                'total_reseñas': total_reseñas,
+                'cupos_disponibles': evento.aforo - total_inscritos,
+                'porcentaje_ocupacion': round(evento.ocupacion_anotada, 2),
+                'promedio_calificacion': round(evento.promedio_anotado, 2) if evento.promedio_anotado else 0,
+                'total_reseñas': evento.total_reseñas_anotado,
             },
             'inscritos': inscritos_detalle,
+            'paginacion': paginador.datos_paginacion(),
         }, status=status.HTTP_200_OK)
 
+    def _inscritos_csv(self, request, evento, inscripciones):
+        """Lista de inscritos en CSV, leída por bloques y enviada en streaming."""
+        headers = [
+            'Nombre', 'Usuario', 'Email', 'Código Estudiantil',
+            'Fecha Inscripción', 'Asistencia Confirmada', 'Fecha Confirmación',
+        ]
+        rows = (
+            {
+                'Nombre': f"{i['usuario__first_name']} {i['usuario__last_name']}".strip() or i['username_orden'],
+                'Usuario': i['username_orden'],
+                'Email': i['usuario__email'],
+                'Código Estudiantil': i['usuario__codigo_estudiantil'] or 'N/A',
+                'Fecha Inscripción': i['fecha_inscripcion'].strftime('%Y-%m-%d %H:%M'),
+                'Asistencia Confirmada': 'Sí' if i['asistencia_confirmada'] else 'No',
+                'Fecha Confirmación': i['fecha_confirmacion'].strftime('%Y-%m-%d %H:%M') if i['fecha_confirmacion'] else 'N/A',
+            }
+            for i in inscripciones.iterator(chunk_size=TAMANO_CHUNK_EXPORTACION)
+        )
+        return respuesta_streaming(
+            request,
+            generar_lineas_csv(headers, rows),
+            'text/csv; charset=utf-8',
+            f'reporte_evento_{evento.id}.csv'
+        )
+
+    @staticmethod
+    def anotar_para_reportes(queryset):
+        """
+        Agrega al queryset las métricas de reportes por evento, calculadas en
+        la misma consulta:
+        - total_inscritos_anotado y confirmados_anotado: conteos condicionales
+        - promedio_anotado: promedio de reseñas en una subconsulta (no multiplica
+          filas con el JOIN de inscripciones)
+        - ocupacion_anotada: porcentaje de aforo ocupado (0 si el aforo es 0)
+        """
+        promedio_reseñas = (
+            Reseña.objects
+            .filter(evento=OuterRef('pk'))
+            .order_by()
+            .values('evento')
+            .annotate(promedio=Avg('puntuacion'))
+            .values('promedio')
+        )
+        return queryset.annotate(
+            total_inscritos_anotado=Count('inscripciones'),
+            confirmados_anotado=Count('inscripciones', filter=Q(inscripciones__asistencia_confirmada=True)),
+            promedio_anotado=Subquery(promedio_reseñas, output_field=models.FloatField()),
+        ).annotate(
+            ocupacion_anotada=Case(
+                When(aforo__gt=0, then=Cast('total_inscritos_anotado', models.FloatField()) * 100 / F('aforo')),
+                default=Value(0.0),
+                output_field=models.FloatField(),
+            ),
+        )
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def mis_eventos_reportes(self, request):
         """
         Retorna un resumen de reportes para todos los eventos creados por el usuario.
         Útil para mostrar una vista general en el frontend.
-    """
-        from django.db.models import Count, Q, Avg
+        Query params opcionales:
+        - inicio, fin (YYYY-MM-DD): filtran por fecha de inicio del evento
+        - page, page_size: paginación del listado de eventos (el resumen cubre todos)
+        """
+        inicio = request.query_params.get('inicio')
+        fin = request.query_params.get('fin')
+        for nombre, valor in (('inicio', inicio), ('fin', fin)):
+            try:
+                fecha_valida = not valor or parse_date(valor) is not None
+            except ValueError:
+                fecha_valida = False
+            if not fecha_valida:
+                return Response(
+                    {'error': f'Formato de fecha {nombre} inválido (YYYY-MM-DD).'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
     
-        # Obtener eventos del organizador
         eventos = Evento.objects.filter(organizador=request.user)
+        if inicio:
+            eventos = eventos.filter(fecha_inicio__date__gte=inicio)
+        if fin:
+            eventos = eventos.filter(fecha_inicio__date__lte=fin)
+        eventos = self.anotar_para_reportes(eventos)
+    
+        # Estadísticas generales: una consulta agregada, en caché por organizador
+        resumen = obtener_resumen_organizador(request.user.id, eventos, inicio, fin)
+    
+        paginador = ReportesOrganizadorPagination()
+        pagina = paginador.paginate_queryset(eventos.order_by('fecha_inicio', 'id'), request, view=self)
     
+        ahora = timezone.now()
         reportes = []
-        for evento in eventos:
-            total_inscritos = evento.inscripciones.count()
-            confirmados = evento.inscripciones.filter(asistencia_confirmada=True).count()
+        for evento in pagina:
+            total_inscritos = evento.total_inscritos_anotado
+            confirmados = evento.confirmados_anotado
             porcentaje_confirmacion = (confirmados / total_inscritos * 100) if total_inscritos > 0 else 0
-            porcentaje_ocupacion = (total_inscritos / evento.aforo * 100) if evento.aforo > 0 else 0
-        
-            # Promedio de calificaciones
-            promedio = Reseña.objects.filter(evento=evento).aggregate(
-                promedio=Avg('puntuacion')
-            )['promedio'] or 0
         
             reportes.append({
                 'evento_id': evento.id,
@@ -1052,36 +1231,28 @@ class EventoViewSet(viewsets.ModelViewSet):
                 'confirmados': confirmados,
                 'pendientes': total_inscritos - confirmados,
                 'porcentaje_confirmacion': round(porcentaje_confirmacion, 2),
-                'porcentaje_ocupacion': round(porcentaje_ocupacion, 2),
-                'promedio_calificacion': round(promedio, 2),
-                'estado': 'finalizado' if evento.fecha_fin < timezone.now() else 'activo',
+                'porcentaje_ocupacion': round(evento.ocupacion_anotada, 2),
+                'promedio_calificacion': round(evento.promedio_anotado or 0, 2),
+                'estado': 'finalizado' if evento.fecha_fin < ahora else 'activo',
             })
     
-     # Estadísticas generales
-        total_eventos = len(reportes)
-        total_inscritos_general = sum(r['total_inscritos'] for r in reportes)
-        total_confirmados_general = sum(r['confirmados'] for r in reportes)
-        promedio_ocupacion = sum(r['porcentaje_ocupacion'] for r in reportes) / total_eventos if total_eventos > 0 else 0
-    
         return Response({
-            'resumen': {
-                'total_eventos': total_eventos,
-                'total_inscritos': total_inscritos_general,
-                'total_confirmados': total_confirmados_general,
-                'promedio_ocupacion': round(promedio_ocupacion, 2),
-            },
+            'resumen': resumen,
             'eventos': reportes,
+            'paginacion': paginador.datos_paginacion(),
         }, status=status.HTTP_200_OK)
         
     
-class InscripcionViewSet(viewsets.ModelViewSet):
+class InscripcionViewSet(PaginacionSeleccionableMixin, viewsets.ModelViewSet):
     """
     ViewSet para el modelo Inscripcion.
     - Solo usuarios autenticados pueden inscribirse en eventos.
     - Se valida que no haya inscripciones duplicadas.
+    - ?paginacion=cursor pagina por (-fecha_inscripcion, id) sin COUNT
     """
     queryset = Inscripcion.objects.all()
     permission_classes = [IsAuthenticated]
+    cursor_pagination_class = InscripcionesCursorPagination
 
     # 🔍 Búsqueda y filtros
     search_fields = ['usuario__nombre', 'evento__titulo']
@@ -1098,25 +1269,22 @@ class InscripcionViewSet(viewsets.ModelViewSet):
         """
         Asigna automáticamente el usuario autenticado
         antes de guardar la inscripción.
-        Valida que haya cupos disponibles.
+        El cupo se reserva de forma atómica en InscripcionSerializer.create().
         """
-        evento = serializer.validated_data.get('evento')
-        if evento and not evento.tiene_cupos_disponibles():
-            raise serializers.ValidationError(
-                {'evento': 'No hay cupos disponibles para este evento.'}
-            )
         serializer.save(usuario=self.request.user)
 
 
-class ReseñaViewSet(viewsets.ModelViewSet):
+class ReseñaViewSet(PaginacionSeleccionableMixin, viewsets.ModelViewSet):
     """
     ViewSet para el modelo Reseña.
     - Los usuarios pueden crear reseñas para eventos finalizados donde asistieron
     - Cualquiera puede ver las reseñas (list, retrieve)
     - Solo el autor puede editar/eliminar su reseña
+    - ?paginacion=cursor pagina por (-fecha, id) sin COUNT
     """
     serializer_class = ReseñaSerializer
     permission_classes = [IsAuthenticated]
+    cursor_pagination_class = ReseñasCursorPagination
     
     # Filtros
     filterset_fields = ['evento', 'usuario', 'puntuacion']
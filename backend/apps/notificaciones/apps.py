@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class NotificacionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.notificaciones'
+
+    def ready(self):
+        # Registrar las señales de invalidación de contadores
+        from . import signals  # noqa: F401
@@ -1,15 +1,13 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import UntypedToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from jwt import decode as jwt_decode
-from django.conf import settings
+from . import identidad_ws, presencia
+import asyncio
 import json
 
-
-User = get_user_model()
-
+# Segundos que el consumer retiene una notificación antes de enviarla; los
+# reenvíos de la misma notificación (cambios agrupados) dentro de la ventana
+# salen en un solo frame con los datos más recientes
+VENTANA_AGRUPACION_WS = 0.5
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
@@ -27,6 +25,9 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """
         self.user = None
         self.group_name = None
+        self.tarea_latido = None
+        self.pendientes = {}
+        self.tareas_envio = set()
         
         # Intentar obtener token del query string primero (localStorage)
         query_string = self.scope.get('query_string', b'').decode()
@@ -61,6 +62,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
 
             await self.accept()
             print(f"✅ Usuario {user.username} (ID: {user.id}) conectado al grupo: {self.group_name}")
+            
+            # Marcar al usuario en línea para que el fan-out le publique
+            await self._actualizar_presencia(presencia.registrar_conexion)
+            self.tarea_latido = asyncio.create_task(self._latir())
         
             await self.send(text_data=json.dumps({
                 'type': 'connection_established',
@@ -79,13 +84,32 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """
         Desconecta al usuario de su grupo cuando cierra la conexión.
         """
+        if self.tarea_latido:
+            self.tarea_latido.cancel()
+        # Lo pendiente ya está persistido; el cliente lo verá al sincronizar
+        for tarea in self.tareas_envio:
+            tarea.cancel()
         if self.group_name and self.user:
+            await self._actualizar_presencia(presencia.registrar_desconexion)
             await self.channel_layer.group_discard(
                 self.group_name,
                 self.channel_name
             )
             print(f"🔌 Usuario {self.user.username} (ID: {self.user.id}) desconectado del grupo: {self.group_name}")
             
+    async def _actualizar_presencia(self, operacion):
+        """La presencia es una optimización: si la caché falla, la conexión sigue."""
+        try:
+            await operacion(self.user.id, self.channel_name)
+        except Exception as e:
+            print(f"⚠️  [PRESENCIA] Error actualizando presencia de usuario {self.user.id}: {str(e)}")
+
+    async def _latir(self):
+        """Renueva la presencia mientras la conexión siga abierta."""
+        while True:
+            await asyncio.sleep(presencia.PRESENCIA_LATIDO)
+            await self._actualizar_presencia(presencia.latido)
+
     async def receive(self, text_data=None, bytes_data=None):
         pass
 
@@ -113,54 +137,70 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """
         Método llamado cuando se envía una notificación al grupo del usuario.
         Este método será invocado por Celery o cualquier otro proceso.
+        La notificación se retiene VENTANA_AGRUPACION_WS: si en ese tiempo
+        llega otra vez el mismo ID (cambios agrupados del mismo evento), solo
+        se envía la versión más reciente.
         """
-        print(f"🔔 [CONSUMER] send_notification llamado")
-        print(f"🔔 [CONSUMER] Usuario: {self.user.username if hasattr(self, 'user') else 'desconocido'}")
-        print(f"🔔 [CONSUMER] Grupo: {self.group_name if hasattr(self, 'group_name') else 'desconocido'}")
-        
         notification_data = event.get('notification', {})
-        print(f"🔔 [CONSUMER] Datos recibidos: {notification_data}")
+        notificacion_id = notification_data.get('id')
+        print(f"🔔 [CONSUMER] send_notification llamado para usuario {self.user.username if self.user else 'desconocido'}: {notification_data}")
+        
+        if notificacion_id is None:
+            await self._enviar_notificacion(notification_data)
+            return
+        
+        agrupada = notificacion_id in self.pendientes
+        self.pendientes[notificacion_id] = notification_data
+        if agrupada:
+            print(f"🧩 [CONSUMER] Notificación {notificacion_id} agrupada con el envío pendiente")
+            return
         
+        tarea = asyncio.create_task(self._enviar_tras_ventana(notificacion_id))
+        self.tareas_envio.add(tarea)
+        tarea.add_done_callback(self.tareas_envio.discard)
+
+    async def _enviar_tras_ventana(self, notificacion_id):
+        await asyncio.sleep(VENTANA_AGRUPACION_WS)
+        await self._enviar_notificacion(self.pendientes.pop(notificacion_id))
+
+    async def _enviar_notificacion(self, notification_data):
         await self.send(text_data=json.dumps({
             'type': 'notification',
             'data': notification_data
         }))
         print(f"✅ [CONSUMER] Mensaje enviado al WebSocket")
 
-    # Fixed indentation and verified by AI
-    @database_sync_to_async
-    def get_user_from_token(self, token):
+    async def send_conteo(self, event):
         """
-        Valida el token JWT y retorna el usuario asociado.
+        Envía al cliente los contadores de notificaciones actualizados
+        (tras leer o eliminar notificaciones en lote).
+        """
+        await self.send(text_data=json.dumps({
+            'type': 'notification_count',
+            'data': event.get('conteo', {})
+        }))
+
+    async def get_user_from_token(self, token):
+        """
+        Valida el token JWT y retorna la identidad (id, username) del usuario.
+        El token se decodifica una sola vez; la identidad se busca primero en
+        la caché del proceso (sin salir del event loop) y solo si no está se
+        pasa a un hilo para consultar la caché compartida o la base de datos.
         """
         if not token:
             print("❌ [get_user_from_token] Token no encontrado en cookies")
             return None
 
         try:
-            # Validar el token
-            UntypedToken(token)
-            
-            # Decodificar el token para obtener el user_id
-            decoded_data = jwt_decode(
-                token,
-                settings.SECRET_KEY,
-                algorithms=["HS256"]
-            )
-            
-            user_id = decoded_data.get('user_id')
-            if user_id:
-                try:
-                    user = User.objects.get(id=user_id)
-                    return user
-                except User.DoesNotExist:
-                    print(f"❌ Usuario con ID {user_id} no encontrado")
-                    return None
-            return None
-            
-        except (InvalidToken, TokenError) as e:
-            print(f"❌ Token inválido o expirado: {str(e)}")
-            return None
+            datos = identidad_ws.decodificar_token(token)
+            if datos is None:
+                return None
+
+            identidad = identidad_ws.identidad_local(datos)
+            if identidad is None:
+                identidad = await database_sync_to_async(identidad_ws.resolver_identidad)(datos)
+            return identidad
+
         except Exception as e:
             print(f"❌ Error inesperado al validar token: {str(e)}")
             return None
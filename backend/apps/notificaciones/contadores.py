@@ -0,0 +1,182 @@
+"""
+Contadores de notificaciones por usuario (leídas / no leídas) en la caché
+(Redis en producción), para que /notificaciones/conteo/ no consulte la base
+de datos en cada sondeo del frontend.
+
+- Se guardan dos enteros por usuario; el total es su suma.
+- Un contador solo existe si alguien lo leyó recientemente (TTL). Las
+  operaciones de escritura modifican solo los contadores que ya existen con
+  incr/decr atómicos; si no existe, la siguiente lectura lo calcula de la base
+  de datos.
+- reconciliar_contadores() corrige las diferencias que puedan acumularse
+  (carreras entre una lectura que siembra el contador y un incremento).
+"""
+import logging
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q
+from .models import UsuarioNotificacion
+
+logger = logging.getLogger(__name__)
+
+# Segundos que un contador sin actividad permanece en caché
+CONTADORES_TTL = 60 * 60 * 24
+
+# Usuarios revisados por operación de caché durante la reconciliación
+TAMANO_LOTE_RECONCILIACION = 1000
+
+NO_LEIDAS = 'no_leidas'
+LEIDAS = 'leidas'
+
+
+def clave_contador(usuario_id, campo):
+    return f'notificaciones:conteo:{usuario_id}:{campo}'
+
+
+def _conteos_db(usuario_ids):
+    """Conteos reales {usuario_id: {'no_leidas': n, 'leidas': m}} en una consulta."""
+    conteos = {usuario_id: {NO_LEIDAS: 0, LEIDAS: 0} for usuario_id in usuario_ids}
+    filas = (
+        UsuarioNotificacion.objects
+        .filter(usuario_id__in=conteos.keys())
+        .values('usuario_id')
+        .annotate(
+            no_leidas=Count('id', filter=Q(leida=False)),
+            leidas=Count('id', filter=Q(leida=True)),
+        )
+        .order_by()
+    )
+    for fila in filas:
+        conteos[fila['usuario_id']] = {NO_LEIDAS: fila['no_leidas'], LEIDAS: fila['leidas']}
+    return conteos
+
+
+def _sumar(clave, delta):
+    """incr/decr atómico solo si el contador existe."""
+    try:
+        cache.incr(clave, delta)
+    except ValueError:
+        pass
+
+
+def obtener_conteo(usuario_id):
+    """
+    Retorna {'total', 'no_leidas', 'leidas'} del usuario. Se lee de la caché
+    y, si falta algún contador, se calcula con una consulta y se guarda.
+    """
+    claves = {campo: clave_contador(usuario_id, campo) for campo in (NO_LEIDAS, LEIDAS)}
+    en_cache = cache.get_many(claves.values())
+
+    if len(en_cache) == len(claves):
+        valores = {campo: en_cache[clave] for campo, clave in claves.items()}
+    else:
+        valores = _conteos_db([usuario_id])[usuario_id]
+        cache.set_many({claves[campo]: valor for campo, valor in valores.items()}, CONTADORES_TTL)
+
+    no_leidas = max(valores[NO_LEIDAS], 0)
+    leidas = max(valores[LEIDAS], 0)
+    return {'total': no_leidas + leidas, 'no_leidas': no_leidas, 'leidas': leidas}
+
+
+def sumar_no_leidas(usuario_ids, cantidad=1):
+    """
+    Suma `cantidad` notificaciones no leídas a cada usuario. Una sola lectura
+    (get_many) decide qué contadores existen; solo esos se incrementan.
+    """
+    claves = [clave_contador(usuario_id, NO_LEIDAS) for usuario_id in usuario_ids]
+    for clave in cache.get_many(claves):
+        _sumar(clave, cantidad)
+
+
+def marcar_no_leidas(usuario_ids):
+    """
+    Una notificación leída vuelve a estar sin leer para cada usuario (cambio
+    agrupado en una notificación existente): pasa de leídas a no leídas.
+    """
+    claves = [clave_contador(usuario_id, campo) for usuario_id in usuario_ids for campo in (NO_LEIDAS, LEIDAS)]
+    for clave in cache.get_many(claves):
+        _sumar(clave, 1 if clave.endswith(f':{NO_LEIDAS}') else -1)
+
+
+def marcar_leidas(usuario_id, cantidad=1):
+    """Pasa `cantidad` notificaciones del usuario de no leídas a leídas."""
+    if cantidad:
+        _sumar(clave_contador(usuario_id, NO_LEIDAS), -cantidad)
+        _sumar(clave_contador(usuario_id, LEIDAS), cantidad)
+
+
+def restar(usuario_id, no_leidas=0, leidas=0):
+    """Descuenta notificaciones eliminadas del usuario."""
+    if no_leidas:
+        _sumar(clave_contador(usuario_id, NO_LEIDAS), -no_leidas)
+    if leidas:
+        _sumar(clave_contador(usuario_id, LEIDAS), -leidas)
+
+
+def usuarios_notificados(notificaciones):
+    """
+    IDs de los usuarios con filas UsuarioNotificacion de `notificaciones`
+    (queryset de Notificacion). Se consulta antes de un borrado en cascada
+    para invalidar después los contadores de esos usuarios.
+    """
+    return list(
+        UsuarioNotificacion.objects.filter(notificacion__in=notificaciones)
+        .values_list('usuario_id', flat=True).distinct()
+    )
+
+
+def invalidar(usuario_ids):
+    """Descarta los contadores; la siguiente lectura los recalcula."""
+    cache.delete_many([
+        clave_contador(usuario_id, campo)
+        for usuario_id in usuario_ids
+        for campo in (NO_LEIDAS, LEIDAS)
+    ])
+
+
+def reconciliar_contadores(tamano_lote=TAMANO_LOTE_RECONCILIACION):
+    """
+    Compara los contadores existentes con la base de datos y corrige los que
+    difieren. Recorre los usuarios por lotes: una lectura de caché por lote y
+    una consulta agrupada solo para los usuarios con contadores.
+    Retorna (usuarios revisados, contadores corregidos).
+    """
+    revisados = corregidos = 0
+    usuario_ids = get_user_model().objects.order_by('id').values_list('id', flat=True)
+
+    lote = []
+    for usuario_id in usuario_ids.iterator(chunk_size=tamano_lote):
+        lote.append(usuario_id)
+        if len(lote) == tamano_lote:
+            r, c = _reconciliar_lote(lote)
+            revisados, corregidos = revisados + r, corregidos + c
+            lote = []
+    if lote:
+        r, c = _reconciliar_lote(lote)
+        revisados, corregidos = revisados + r, corregidos + c
+
+    if corregidos:
+        logger.info(f"🔢 [CONTADORES] {corregidos} contadores corregidos de {revisados} usuarios")
+    return revisados, corregidos
+
+
+def _reconciliar_lote(usuario_ids):
+    claves = {
+        clave_contador(usuario_id, campo): (usuario_id, campo)
+        for usuario_id in usuario_ids
+        for campo in (NO_LEIDAS, LEIDAS)
+    }
+    en_cache = cache.get_many(claves.keys())
+    if not en_cache:
+        return 0, 0
+
+    con_contador = {claves[clave][0] for clave in en_cache}
+    reales = _conteos_db(con_contador)
+    correcciones = {}
+    for clave, valor in en_cache.items():
+        usuario_id, campo = claves[clave]
+        if valor != reales[usuario_id][campo]:
+            correcciones[clave] = reales[usuario_id][campo]
+    if correcciones:
+        cache.set_many(correcciones, CONTADORES_TTL)
+    return len(con_contador), len(correcciones)
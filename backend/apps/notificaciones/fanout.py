@@ -0,0 +1,175 @@
+"""
+Fan-out de notificaciones.
+Crea las relaciones UsuarioNotificacion de una notificación para muchos
+destinatarios con inserciones masivas por lotes, en lugar de un
+get_or_create por usuario, y las entrega por WebSocket en una sola pasada
+del event loop.
+"""
+import asyncio
+import logging
+import time
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from apps.eventos.models import Inscripcion
+from . import contadores, presencia
+from .models import UsuarioNotificacion
+
+logger = logging.getLogger(__name__)
+
+# Filas por INSERT masivo
+TAMANO_LOTE_FANOUT = 500
+
+# Máximo de group_send simultáneos contra el channel layer
+CONCURRENCIA_ENTREGA = 100
+
+
+def destinatarios_evento(evento):
+    """
+    Retorna los IDs de los usuarios que deben recibir notificaciones de un evento:
+    el organizador primero y luego los inscritos, sin duplicados.
+    Solo consulta IDs (no instancia usuarios).
+    """
+    inscritos_ids = Inscripcion.objects.filter(
+        evento_id=evento.id
+    ).values_list('usuario_id', flat=True)
+    # dict.fromkeys deduplica en O(n) conservando el orden
+    return list(dict.fromkeys([evento.organizador_id, *inscritos_ids]))
+
+
+def crear_usuario_notificaciones(notificacion, usuario_ids, tamano_lote=TAMANO_LOTE_FANOUT, actualizada_en=None):
+    """
+    Crea un UsuarioNotificacion (no leído) por cada usuario, en lotes de
+    `tamano_lote` filas con bulk_create(ignore_conflicts=True). Las relaciones
+    que ya existían se omiten, así que reintentar la operación es seguro y no
+    vuelve a sumar en los contadores de no leídas.
+    Todas las filas llevan actualizada_en = fecha_envio (o `actualizada_en`
+    si se indica), la misma marca del cursor que se envía en el payload del
+    WebSocket.
+
+    Retorna estadísticas del fan-out:
+        {
+            'destinatarios': total de usuarios únicos,
+            'nuevas': relaciones creadas,
+            'lotes': [{'lote': 1, 'filas': 500, 'ms': 12.3}, ...]
+        }
+    """
+    usuario_ids = list(dict.fromkeys(usuario_ids))
+    actualizada_en = actualizada_en or notificacion.fecha_envio
+    estadisticas = {'destinatarios': len(usuario_ids), 'lotes': []}
+
+    existentes = set(
+        UsuarioNotificacion.objects.filter(notificacion=notificacion).values_list('usuario_id', flat=True)
+    )
+    nuevos = [usuario_id for usuario_id in usuario_ids if usuario_id not in existentes]
+    estadisticas['nuevas'] = len(nuevos)
+
+    for numero, inicio in enumerate(range(0, len(nuevos), tamano_lote), start=1):
+        lote = nuevos[inicio:inicio + tamano_lote]
+        t_inicio = time.perf_counter()
+        UsuarioNotificacion.objects.bulk_create(
+            [
+                UsuarioNotificacion(
+                    usuario_id=usuario_id,
+                    notificacion=notificacion,
+                    leida=False,
+                    actualizada_en=actualizada_en
+                )
+                for usuario_id in lote
+            ],
+            ignore_conflicts=True
+        )
+        estadisticas['lotes'].append({
+            'lote': numero,
+            'filas': len(lote),
+            'ms': round((time.perf_counter() - t_inicio) * 1000, 2),
+        })
+
+    contadores.sumar_no_leidas(nuevos)
+
+    logger.info(
+        f"📦 [FANOUT] Notificación {notificacion.id}: {estadisticas['destinatarios']} destinatarios "
+        f"en {len(estadisticas['lotes'])} lote(s)"
+    )
+    return estadisticas
+
+
+async def _entregar_async(channel_layer, mensaje, usuario_ids, concurrencia):
+    """
+    Envía `mensaje` al grupo de cada usuario con como máximo `concurrencia`
+    group_send en vuelo. Retorna los IDs de usuario cuyo envío falló.
+    """
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def enviar(usuario_id):
+        async with semaforo:
+            await channel_layer.group_send(f"user_{usuario_id}", mensaje)
+
+    resultados = await asyncio.gather(
+        *(enviar(usuario_id) for usuario_id in usuario_ids),
+        return_exceptions=True
+    )
+    fallidos = []
+    for usuario_id, resultado in zip(usuario_ids, resultados):
+        if isinstance(resultado, Exception):
+            logger.error(f"⚠️  [FANOUT] Error al enviar WebSocket a usuario {usuario_id}: {resultado}")
+            fallidos.append(usuario_id)
+    return fallidos
+
+
+def entregar_notificacion(payload, usuario_ids, concurrencia=CONCURRENCIA_ENTREGA):
+    """
+    Entrega una notificación por WebSocket a los usuarios indicados que están
+    en línea (apps.notificaciones.presencia); a los demás no se les publica
+    nada y verán la notificación persistida al abrir la app.
+
+    Todos los group_send se ejecutan dentro de una única corrutina (un solo
+    puente async_to_sync), de forma concurrente y acotada por `concurrencia`.
+
+    Retorna:
+        {'entregadas': n, 'fallidas': m, 'omitidas': k}
+    """
+    conectados, desconectados = presencia.en_linea(usuario_ids)
+    estadisticas = {'entregadas': 0, 'fallidas': 0, 'omitidas': len(desconectados)}
+    if not conectados:
+        return estadisticas
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        logger.warning("⚠️  [FANOUT] No hay CHANNEL_LAYERS configurado; no se envía por WebSocket")
+        estadisticas['fallidas'] = len(conectados)
+        return estadisticas
+
+    mensaje = {
+        'type': 'send_notification',
+        'notification': payload
+    }
+    t_inicio = time.perf_counter()
+    fallidos = async_to_sync(_entregar_async)(channel_layer, mensaje, conectados, concurrencia)
+    estadisticas['entregadas'] = len(conectados) - len(fallidos)
+    estadisticas['fallidas'] = len(fallidos)
+    logger.info(
+        f"📡 [FANOUT] Notificación {payload.get('id')}: {estadisticas['entregadas']} entregadas, "
+        f"{estadisticas['fallidas']} fallidas, {estadisticas['omitidas']} omitidas (fuera de línea) "
+        f"en {round((time.perf_counter() - t_inicio) * 1000, 2)} ms"
+    )
+    return estadisticas
+
+
+def enviar_conteo(usuario_id, conteo):
+    """
+    Envía al usuario sus contadores actualizados ({'total', 'no_leidas',
+    'leidas'}) en un único mensaje WebSocket, para que la interfaz no tenga
+    que volver a consultarlos tras una operación masiva.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return False
+    try:
+        async_to_sync(channel_layer.group_send)(f"user_{usuario_id}", {
+            'type': 'send_conteo',
+            'conteo': conteo
+        })
+    except Exception as e:
+        logger.error(f"⚠️  [FANOUT] Error al enviar conteo por WebSocket a usuario {usuario_id}: {e}")
+        return False
+    return True
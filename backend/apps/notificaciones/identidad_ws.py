@@ -0,0 +1,140 @@
+"""
+Resolución del usuario de una conexión WebSocket a partir de su JWT.
+
+- El token se decodifica y valida una sola vez (AccessToken: firma,
+  expiración y tipo), sin una segunda decodificación manual.
+- La identidad (id, username) se guarda por (user_id, jti) en una caché LRU
+  del proceso y, si WS_IDENTIDAD_CACHE_COMPARTIDA está activo, en la caché de
+  Django (Redis en producción), con un TTL corto que nunca supera la
+  expiración del token. Las reconexiones con el mismo token no consultan la
+  base de datos.
+- WS_IDENTIDAD_TTL = 0 desactiva ambas cachés.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+logger = logging.getLogger(__name__)
+
+# Identidades guardadas como máximo en la caché local de cada proceso
+MAX_IDENTIDADES_LOCALES = 2048
+
+
+@dataclass(frozen=True)
+class IdentidadWS:
+    """Lo que el consumer necesita del usuario conectado."""
+    id: int
+    username: str
+
+
+@dataclass(frozen=True)
+class DatosToken:
+    user_id: int
+    jti: str
+    exp: int
+
+
+class CacheLRU:
+    """LRU acotada con expiración por entrada, segura entre hilos."""
+
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira <= time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor, ttl):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+
+identidades_locales = CacheLRU(MAX_IDENTIDADES_LOCALES)
+
+
+def clave_identidad(datos):
+    return f'ws:identidad:{datos.user_id}:{datos.jti}'
+
+
+def _ttl(datos):
+    """Segundos de caché: el TTL configurado, recortado a la vida restante del token."""
+    return min(settings.WS_IDENTIDAD_TTL, datos.exp - int(time.time()))
+
+
+def decodificar_token(token):
+    """
+    Valida el access token (una sola decodificación) y retorna DatosToken,
+    o None si es inválido, expiró o no identifica a un usuario.
+    """
+    try:
+        access = AccessToken(token)
+    except TokenError as e:
+        logger.info(f"🔑 [WS_AUTH] Token inválido o expirado: {e}")
+        return None
+
+    user_id = access.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return None
+    return DatosToken(user_id=user_id, jti=access.get(api_settings.JTI_CLAIM, ''), exp=access['exp'])
+
+
+def identidad_local(datos):
+    """Identidad desde la caché del proceso; no bloquea (apta para el event loop)."""
+    if settings.WS_IDENTIDAD_TTL <= 0:
+        return None
+    return identidades_locales.get(clave_identidad(datos))
+
+
+def resolver_identidad(datos):
+    """
+    Identidad desde la caché compartida o, si no está, desde la base de datos
+    (solo id y username). Guarda el resultado en las cachés. Es síncrona:
+    desde el consumer se llama con database_sync_to_async.
+    """
+    clave = clave_identidad(datos)
+    ttl = _ttl(datos)
+    compartida = ttl > 0 and settings.WS_IDENTIDAD_CACHE_COMPARTIDA
+
+    identidad = cache.get(clave) if compartida else None
+    if identidad is None:
+        fila = (
+            get_user_model().objects
+            .filter(**{api_settings.USER_ID_FIELD: datos.user_id})
+            .values('id', 'username')
+            .first()
+        )
+        if fila is None:
+            logger.info(f"🔑 [WS_AUTH] Usuario con ID {datos.user_id} no encontrado")
+            return None
+        identidad = IdentidadWS(**fila)
+        if compartida:
+            cache.set(clave, identidad, ttl)
+
+    if ttl > 0:
+        identidades_locales.set(clave, identidad, ttl)
+    return identidad
@@ -0,0 +1,167 @@
+"""
+Comando de gestión para medir conexiones WebSocket por segundo contra un
+Daphne local (ws/notifications/) con la capa de canales en memoria.
+
+Simula una tormenta de reconexiones: `--usuarios` usuarios con un access
+token cada uno abren `--conexiones` conexiones en total, con como máximo
+`--concurrencia` handshakes en vuelo. Cada conexión cuenta cuando llega el
+mensaje connection_established. Se ejecuta una vez con la caché de
+identidades desactivada (WS_IDENTIDAD_TTL=0: una consulta por conexión) y
+otra con la caché activa, cada una en un Daphne nuevo.
+
+Uso:
+    python manage.py benchmark_ws_connect --conexiones 2000 --usuarios 50 --concurrencia 100
+"""
+import asyncio
+import base64
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.usuarios.models import Rol, Usuario
+
+PREFIJO_USUARIOS = 'benchmark_ws_'
+HOST = '127.0.0.1'
+
+ESCENARIOS = {
+    'sin_cache': {'WS_IDENTIDAD_TTL': '0'},
+    'con_cache': {'WS_IDENTIDAD_TTL': '60'},
+}
+
+
+async def _leer_frame(reader):
+    """Lee un frame de texto del servidor (sin máscara) y retorna su contenido."""
+    _, segundo = await reader.readexactly(2)
+    largo = segundo & 0x7F
+    if largo == 126:
+        largo = int.from_bytes(await reader.readexactly(2), 'big')
+    elif largo == 127:
+        largo = int.from_bytes(await reader.readexactly(8), 'big')
+    return await reader.readexactly(largo)
+
+
+async def _conectar(puerto, token):
+    """Handshake WebSocket + primer mensaje; retorna la latencia en segundos."""
+    inicio = time.perf_counter()
+    reader, writer = await asyncio.open_connection(HOST, puerto)
+    try:
+        clave = base64.b64encode(os.urandom(16)).decode()
+        writer.write((
+            f'GET /ws/notifications/?token={token} HTTP/1.1\r\n'
+            f'Host: {HOST}:{puerto}\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Key: {clave}\r\n'
+            'Sec-WebSocket-Version: 13\r\n\r\n'
+        ).encode())
+        await writer.drain()
+        cabecera = await reader.readuntil(b'\r\n\r\n')
+        if b' 101 ' not in cabecera.split(b'\r\n', 1)[0]:
+            raise ConnectionError(cabecera.split(b'\r\n', 1)[0].decode())
+        if b'connection_established' not in await _leer_frame(reader):
+            raise ConnectionError('Conexión rechazada por el consumer')
+        latencia = time.perf_counter() - inicio
+        # Frame de cierre enmascarado (obligatorio desde el cliente)
+        writer.write(b'\x88\x80' + os.urandom(4))
+        await writer.drain()
+        return latencia
+    finally:
+        writer.close()
+
+
+async def _tormenta(puerto, tokens, conexiones, concurrencia):
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def una(i):
+        async with semaforo:
+            return await _conectar(puerto, tokens[i % len(tokens)])
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(una(i) for i in range(conexiones)), return_exceptions=True)
+    total = time.perf_counter() - inicio
+    latencias = [r for r in resultados if not isinstance(r, BaseException)]
+    return total, latencias, len(resultados) - len(latencias)
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def _esperar_puerto(puerto, proceso, timeout=30):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise CommandError('Daphne terminó al iniciar')
+        try:
+            socket.create_connection((HOST, puerto), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'Daphne no abrió el puerto {puerto}')
+
+
+class Command(BaseCommand):
+    help = 'Mide conexiones WebSocket por segundo contra un Daphne local, sin y con caché de identidades'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conexiones', type=int, default=1000, help='Conexiones totales por escenario (default: 1000)')
+        parser.add_argument('--usuarios', type=int, default=50, help='Usuarios/tokens distintos (default: 50)')
+        parser.add_argument('--concurrencia', type=int, default=50, help='Handshakes simultáneos (default: 50)')
+
+    def handle(self, *args, **options):
+        Rol.objects.get_or_create(pk=1, defaults={'nombre': 'estudiante'})
+        usuarios = [
+            Usuario.objects.get_or_create(
+                username=f'{PREFIJO_USUARIOS}{i}',
+                defaults={'email': f'{PREFIJO_USUARIOS}{i}@example.com'}
+            )[0]
+            for i in range(options['usuarios'])
+        ]
+        tokens = [str(AccessToken.for_user(usuario)) for usuario in usuarios]
+
+        try:
+            for escenario, entorno in ESCENARIOS.items():
+                total, latencias, fallidas = self._medir(entorno, tokens, options)
+                if not latencias:
+                    raise CommandError(f'{escenario}: ninguna conexión se completó')
+                latencias.sort()
+                self.stdout.write(
+                    f"  {escenario:<10} {len(latencias) / total:>8.1f} conexiones/s  "
+                    f"p50={statistics.median(latencias) * 1000:>7.1f} ms  "
+                    f"p95={latencias[int(len(latencias) * 0.95) - 1] * 1000:>7.1f} ms  "
+                    f"fallidas={fallidas}"
+                )
+        finally:
+            Usuario.objects.filter(username__startswith=PREFIJO_USUARIOS).delete()
+
+        self.stdout.write(self.style.SUCCESS('\nBenchmark completado.'))
+
+    def _medir(self, entorno, tokens, options):
+        puerto = _puerto_libre()
+        proceso = subprocess.Popen(
+            [sys.executable, '-m', 'daphne', '-b', HOST, '-p', str(puerto), 'backend.asgi:application'],
+            cwd=settings.BASE_DIR,
+            env={
+                **os.environ,
+                **entorno,
+                'CHANNEL_LAYER_EN_MEMORIA': 'True',
+                'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'),
+            },
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _esperar_puerto(puerto, proceso)
+            # Calentamiento: carga perezosa de módulos del primer connect
+            asyncio.run(_tormenta(puerto, tokens[:1], 1, 1))
+            return asyncio.run(_tormenta(puerto, tokens, options['conexiones'], options['concurrencia']))
+        finally:
+            proceso.terminate()
+            proceso.wait()
@@ -0,0 +1,14 @@
+"""
+Comando de gestión para encolar los recordatorios de los eventos próximos.
+Se ejecuta al desplegar para que los eventos existentes no dependan de la
+primera ejecución de la tarea periódica programar_recordatorios_proximos.
+"""
+from django.core.management.base import BaseCommand
+from apps.notificaciones.tasks import programar_recordatorios_proximos
+
+
+class Command(BaseCommand):
+    help = 'Encola con ETA los recordatorios de los eventos que inician dentro del horizonte de programación'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(programar_recordatorios_proximos()))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+# La columna usuario_id no figura en las migraciones versionadas de esta app, así
+# que el índice se registra solo en el estado y se crea con SQL únicamente si la
+# columna existe en la base de datos.
+def crear_indice_no_leidas(apps, schema_editor):
+    conexion = schema_editor.connection
+    with conexion.cursor() as cursor:
+        columnas = {c.name for c in conexion.introspection.get_table_description(cursor, 'notificaciones_usuarionotificacion')}
+    if 'usuario_id' not in columnas:
+        return
+    schema_editor.execute(
+        'CREATE INDEX "usuarionotif_no_leidas_idx" ON "notificaciones_usuarionotificacion" '
+        '("usuario_id", "notificacion_id") WHERE NOT "leida"'
+    )
+
+
+def borrar_indice_no_leidas(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS "usuarionotif_no_leidas_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='usuarionotificacion',
+                    index=models.Index(condition=models.Q(('leida', False)), fields=['usuario', 'notificacion'], name='usuarionotif_no_leidas_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(crear_indice_no_leidas, borrar_indice_no_leidas),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+# Igual que en 0002: la columna usuario_id no figura en las migraciones
+# versionadas, así que el índice se crea con SQL solo si la columna existe.
+def crear_indice_sync(apps, schema_editor):
+    conexion = schema_editor.connection
+    with conexion.cursor() as cursor:
+        columnas = {c.name for c in conexion.introspection.get_table_description(cursor, 'notificaciones_usuarionotificacion')}
+    if 'usuario_id' not in columnas:
+        return
+    schema_editor.execute(
+        'CREATE INDEX "usuarionotif_sync_idx" ON "notificaciones_usuarionotificacion" '
+        '("usuario_id", "actualizada_en", "id")'
+    )
+
+
+def borrar_indice_sync(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS "usuarionotif_sync_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0002_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuarionotificacion',
+            name='actualizada_en',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='usuarionotificacion',
+                    index=models.Index(fields=['usuario', 'actualizada_en', 'id'], name='usuarionotif_sync_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(crear_indice_sync, borrar_indice_sync),
+            ],
+        ),
+    ]
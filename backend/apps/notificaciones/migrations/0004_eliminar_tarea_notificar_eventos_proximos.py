@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+from django.db import migrations
+from django.utils import timezone
+
+
+# notificar_eventos_proximos ya no existe: los recordatorios se encolan con ETA.
+# El DatabaseScheduler de django_celery_beat solo agrega o actualiza las
+# entradas de CELERY_BEAT_SCHEDULE y nunca borra filas, así que la tarea
+# periódica antigua seguiría enviándose cada 15 segundos a los workers.
+def eliminar_tarea_periodica(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTasks = apps.get_model('django_celery_beat', 'PeriodicTasks')
+    eliminadas, _ = PeriodicTask.objects.filter(
+        task='apps.notificaciones.tasks.notificar_eventos_proximos'
+    ).delete()
+    if eliminadas:
+        # Avisar al scheduler que el calendario cambió
+        PeriodicTasks.objects.update_or_create(ident=1, defaults={'last_update': timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0003_usuarionotificacion_actualizada_en'),
+        ('django_celery_beat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(eliminar_tarea_periodica, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+# Ejecuciones simultáneas del mismo recordatorio pudieron crearlo dos veces.
+# Se conserva el más antiguo; los contadores en caché de los destinatarios de
+# las copias los corrige reconciliar_contadores_notificaciones.
+def borrar_recordatorios_duplicados(apps, schema_editor):
+    Notificacion = apps.get_model('notificaciones', 'Notificacion')
+    repetidos = (
+        Notificacion.objects
+        .filter(tipo='recordatorio', evento__isnull=False)
+        .values('evento', 'etiqueta')
+        .annotate(primero=Min('id'), copias=Count('id'))
+        .filter(copias__gt=1)
+        .order_by()
+    )
+    for grupo in repetidos:
+        Notificacion.objects.filter(
+            tipo='recordatorio',
+            evento=grupo['evento'],
+            etiqueta=grupo['etiqueta'],
+        ).exclude(id=grupo['primero']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0004_eliminar_tarea_notificar_eventos_proximos'),
+    ]
+
+    operations = [
+        migrations.RunPython(borrar_recordatorios_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notificacion',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('tipo', 'recordatorio')),
+                fields=('evento', 'etiqueta'),
+                name='unique_recordatorio_evento',
+            ),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 # Importamos el modelo Evento para hacer la relación
 from apps.eventos.models import Evento 
 
@@ -42,6 +43,15 @@ class Notificacion(models.Model):
 
     class Meta:
         ordering = ['-fecha_envio']
+        constraints = [
+            # Un solo recordatorio de cada etiqueta por evento, aunque su tarea
+            # se encole o se ejecute más de una vez al mismo tiempo
+            models.UniqueConstraint(
+                fields=['evento', 'etiqueta'],
+                condition=models.Q(tipo='recordatorio'),
+                name='unique_recordatorio_evento'
+            )
+        ]
         verbose_name = "Notificación"
         verbose_name_plural = "Notificaciones"
 
@@ -71,11 +81,26 @@ class UsuarioNotificacion(models.Model):
     )
 
     leida = models.BooleanField(default=False)
+    # Último cambio de la fila (creación o lectura); base del cursor de /sync/
+    actualizada_en = models.DateTimeField(default=timezone.now)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['usuario', 'notificacion'], name='unique_usuario_notificacion')
         ]
+        indexes = [
+            # Notificaciones no leídas de un usuario: usuario=X AND NOT leida
+            models.Index(
+                fields=['usuario', 'notificacion'],
+                condition=models.Q(leida=False),
+                name='usuarionotif_no_leidas_idx'
+            ),
+            # Cambios de un usuario posteriores a un cursor (actualizada_en, id)
+            models.Index(
+                fields=['usuario', 'actualizada_en', 'id'],
+                name='usuarionotif_sync_idx'
+            ),
+        ]
         verbose_name = "Usuario - Notificación"
         verbose_name_plural = "Usuarios - Notificaciones"
 
@@ -0,0 +1,9 @@
+"""
+Clases de paginación de la API de notificaciones.
+"""
+from apps.eventos.paginacion import OrdenFijoCursorPagination
+
+
+class NotificacionesCursorPagination(OrdenFijoCursorPagination):
+    """Feed de notificaciones: más recientes primero, por cursor."""
+    ordering = ('-fecha_envio', 'id')
@@ -0,0 +1,111 @@
+"""
+Presencia de usuarios conectados por WebSocket, en la caché compartida
+(Redis en producción).
+
+- Cada usuario en línea tiene una entrada en caché con sus conexiones
+  abiertas: {channel_name: expira_en}. Cada conexión solo escribe su propia
+  entrada: NotificationConsumer la agrega al conectar, la quita al
+  desconectar y la renueva con un latido cada PRESENCIA_LATIDO.
+- Una conexión que cierra no afecta a las demás del mismo usuario, y si la
+  clave expiró o se perdió, el latido de cada conexión abierta vuelve a
+  agregar su propia entrada (no un contador que luego se descuadra).
+- Si un proceso muere sin desconectar, su entrada deja de renovarse y vence
+  sola en PRESENCIA_TTL; las entradas vencidas se descartan al leer.
+- Las escrituras son leer-modificar-escribir; tras escribir se verifica que
+  la propia entrada quedó como se esperaba y, si otra conexión del mismo
+  usuario la pisó, se reintenta. Lo que aún se pierda lo repara el latido.
+- El fan-out consulta la presencia de todos los destinatarios con get_many y
+  solo publica en el channel layer para los que están en línea; los demás
+  verán la notificación persistida (UsuarioNotificacion) al abrir la app.
+
+Con WS_PRESENCIA desactivado (p. ej. caché locmem, que no se comparte entre el
+servidor ASGI y el worker de Celery) todos los destinatarios se consideran en
+línea.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+# Segundos sin latido tras los que una conexión se considera cerrada
+PRESENCIA_TTL = 90
+# Segundos entre latidos de cada conexión abierta
+PRESENCIA_LATIDO = 30
+
+# Escrituras de la propia entrada antes de dejar la reparación al latido
+INTENTOS_ESCRITURA = 3
+
+# Claves por operación get_many al filtrar destinatarios
+TAMANO_LOTE_PRESENCIA = 1000
+
+
+def clave_presencia(usuario_id):
+    return f'ws:presencia:{usuario_id}'
+
+
+def activa():
+    return settings.WS_PRESENCIA
+
+
+def _vigentes(conexiones, ahora):
+    """Conexiones cuya entrada no ha vencido."""
+    return {canal: expira for canal, expira in (conexiones or {}).items() if expira > ahora}
+
+
+async def _escribir(usuario_id, canal, abierta):
+    """Agrega (abierta) o quita la entrada de `canal` en la presencia del usuario."""
+    if not activa():
+        return
+    clave = clave_presencia(usuario_id)
+    for _ in range(INTENTOS_ESCRITURA):
+        ahora = time.time()
+        conexiones = _vigentes(await cache.aget(clave), ahora)
+        if abierta:
+            conexiones[canal] = ahora + PRESENCIA_TTL
+        else:
+            conexiones.pop(canal, None)
+
+        if conexiones:
+            await cache.aset(clave, conexiones, PRESENCIA_TTL)
+        else:
+            await cache.adelete(clave)
+
+        # Otra conexión del mismo usuario pudo escribir al mismo tiempo
+        if (canal in (await cache.aget(clave) or {})) == abierta:
+            return
+
+
+async def registrar_conexion(usuario_id, canal):
+    await _escribir(usuario_id, canal, abierta=True)
+
+
+async def latido(usuario_id, canal):
+    """Renueva la entrada de la conexión; la recrea si había vencido o se perdió."""
+    await _escribir(usuario_id, canal, abierta=True)
+
+
+async def registrar_desconexion(usuario_id, canal):
+    await _escribir(usuario_id, canal, abierta=False)
+
+
+def en_linea(usuario_ids):
+    """
+    Separa los destinatarios en (en_linea, fuera_de_linea) conservando el
+    orden, con una lectura de caché por cada TAMANO_LOTE_PRESENCIA usuarios.
+    """
+    usuario_ids = list(usuario_ids)
+    if not activa():
+        return usuario_ids, []
+
+    ahora = time.time()
+    conectados = set()
+    for inicio in range(0, len(usuario_ids), TAMANO_LOTE_PRESENCIA):
+        lote = usuario_ids[inicio:inicio + TAMANO_LOTE_PRESENCIA]
+        valores = cache.get_many([clave_presencia(usuario_id) for usuario_id in lote])
+        conectados.update(
+            usuario_id for usuario_id in lote
+            if _vigentes(valores.get(clave_presencia(usuario_id)), ahora)
+        )
+    return (
+        [usuario_id for usuario_id in usuario_ids if usuario_id in conectados],
+        [usuario_id for usuario_id in usuario_ids if usuario_id not in conectados],
+    )
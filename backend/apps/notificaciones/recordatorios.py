@@ -0,0 +1,101 @@
+"""
+Programación de recordatorios de eventos.
+En lugar de consultar los eventos próximos cada pocos segundos, cada
+recordatorio (1 día, 1 hora y 15 minutos antes del inicio) se encola una sola
+vez en Celery con `eta` igual al momento exacto en que debe enviarse.
+
+Cada recordatorio lleva la versión de Evento.version_recordatorios con la que
+se programó. Al reprogramar un evento la versión se incrementa, así que los
+recordatorios que ya estaban encolados para la fecha anterior se ignoran al
+ejecutarse.
+"""
+import logging
+from datetime import timedelta
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RECORDATORIOS = {
+    'recordatorio_1d': {
+        'antelacion': timedelta(days=1),
+        'mensaje_template': lambda e: f"El evento '{e.titulo}' inicia mañana. ¡No olvides asistir!",
+    },
+    'recordatorio_1h': {
+        'antelacion': timedelta(hours=1),
+        'mensaje_template': lambda e: f"El evento '{e.titulo}' inicia en 1 hora. ¡No te lo pierdas!",
+    },
+    'recordatorio_15m': {
+        'antelacion': timedelta(minutes=15),
+        'mensaje_template': lambda e: f"El evento '{e.titulo}' inicia en 15 minutos. ¡Prepárate!",
+    },
+}
+
+# Solo se encolan los recordatorios cuya ETA cae dentro de este horizonte;
+# los más lejanos los encola la tarea periódica programar_recordatorios_proximos.
+# Así ningún mensaje queda días en el broker (debe ser menor que el
+# visibility_timeout de Redis configurado en CELERY_BROKER_TRANSPORT_OPTIONS).
+HORIZONTE_PROGRAMACION = timedelta(hours=36)
+
+
+def _clave_programado(evento_id, etiqueta, version):
+    return f'recordatorios:programado:{evento_id}:{etiqueta}:{version}'
+
+
+def programar_recordatorios(evento, ahora=None):
+    """
+    Encola con `eta` los recordatorios del evento que aún no han pasado y que
+    caen dentro del horizonte de programación.
+
+    Es idempotente: cada (evento, etiqueta, versión) se encola como máximo una
+    vez gracias a cache.add, así que se puede llamar tantas veces como se quiera.
+
+    Retorna el número de recordatorios encolados.
+    """
+    from apps.notificaciones.tasks import enviar_recordatorio
+
+    ahora = ahora or timezone.now()
+    limite = ahora + HORIZONTE_PROGRAMACION
+    timeout = int(HORIZONTE_PROGRAMACION.total_seconds()) * 2
+    programados = 0
+
+    for etiqueta, config in RECORDATORIOS.items():
+        eta = evento.fecha_inicio - config['antelacion']
+        if eta <= ahora or eta > limite:
+            continue
+        clave = _clave_programado(evento.id, etiqueta, evento.version_recordatorios)
+        if not cache.add(clave, True, timeout):
+            continue
+        enviar_recordatorio.apply_async(
+            args=[evento.id, etiqueta, evento.version_recordatorios],
+            eta=eta
+        )
+        programados += 1
+        logger.info(f"⏰ [RECORDATORIOS] '{etiqueta}' del evento {evento.id} programado para {eta.isoformat()}")
+
+    return programados
+
+
+def reprogramar_recordatorios(evento):
+    """
+    Invalida los recordatorios programados para la fecha anterior del evento
+    y programa los de la nueva fecha.
+
+    Los recordatorios ya enviados se eliminan: su mensaje se refería a la
+    fecha anterior y, además, impedirían enviar el de la nueva fecha.
+    """
+    from apps.eventos.models import Evento
+    from apps.notificaciones import contadores
+    from apps.notificaciones.models import Notificacion
+
+    Evento.objects.filter(pk=evento.pk).update(version_recordatorios=F('version_recordatorios') + 1)
+    evento.refresh_from_db(fields=['version_recordatorios'])
+    recordatorios = Notificacion.objects.filter(evento=evento, etiqueta__in=RECORDATORIOS.keys())
+    # El borrado en cascada de UsuarioNotificacion no pasa por los contadores
+    usuarios_afectados = contadores.usuarios_notificados(recordatorios)
+    recordatorios.delete()
+    contadores.invalidar(usuarios_afectados)
+
+    logger.info(f"🔁 [RECORDATORIOS] Evento {evento.id} reprogramado (versión {evento.version_recordatorios})")
+    return programar_recordatorios(evento)
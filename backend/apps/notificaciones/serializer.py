@@ -1,17 +1,24 @@
 from rest_framework import serializers
-from .models import Notificacion, UsuarioNotificacion
+from .models import UsuarioNotificacion
 
 class NotificacionSerializer(serializers.ModelSerializer):
     """
-    Serializador para el modelo Notificacion.
+    Serializador de las notificaciones de un usuario.
     Solo lectura (GET).
+    Recibe filas UsuarioNotificacion con la notificación y su evento ya
+    cargados (select_related): el estado de lectura es un campo de la fila,
+    sin consultas por notificación. El id es el de la notificación.
     """
-    evento_titulo = serializers.CharField(source='evento.titulo', read_only=True)
-    evento_id = serializers.IntegerField(source='evento.id', read_only=True)
-    leida = serializers.SerializerMethodField()
+    id = serializers.IntegerField(source='notificacion_id', read_only=True)
+    tipo = serializers.CharField(source='notificacion.tipo', read_only=True)
+    etiqueta = serializers.CharField(source='notificacion.etiqueta', read_only=True, allow_null=True)
+    mensaje = serializers.CharField(source='notificacion.mensaje', read_only=True)
+    fecha_envio = serializers.DateTimeField(source='notificacion.fecha_envio', read_only=True)
+    evento_titulo = serializers.CharField(source='notificacion.evento.titulo', read_only=True)
+    evento_id = serializers.IntegerField(source='notificacion.evento_id', read_only=True)
     
     class Meta:
-        model = Notificacion
+        model = UsuarioNotificacion
         fields = [
             'id',
             'tipo',
@@ -32,16 +39,3 @@ class NotificacionSerializer(serializers.ModelSerializer):
             'evento_titulo',
             'leida'
         ]
-    
-    def get_leida(self, obj):
-        """
-        Obtiene el estado de lectura desde UsuarioNotificacion.
-        """
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            usuario_notificacion = UsuarioNotificacion.objects.filter(
-                usuario=request.user,
-                notificacion=obj
-            ).first()
-            return usuario_notificacion.leida if usuario_notificacion else False
-        return False
\ No newline at end of file
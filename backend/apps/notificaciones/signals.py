@@ -0,0 +1,24 @@
+"""
+Señales de la app notificaciones.
+Mantienen los contadores en caché (apps.notificaciones.contadores) coherentes
+cuando un borrado en cascada elimina filas UsuarioNotificacion.
+"""
+from django.db.models.signals import pre_delete, post_delete
+from django.dispatch import receiver
+from apps.eventos.models import Evento
+from . import contadores
+from .models import Notificacion
+
+
+@receiver(pre_delete, sender=Evento)
+def recordar_usuarios_notificados(sender, instance, **kwargs):
+    """Antes de eliminar el evento se anotan los usuarios con notificaciones suyas."""
+    instance._usuarios_notificados = contadores.usuarios_notificados(
+        Notificacion.objects.filter(evento_id=instance.pk)
+    )
+
+
+@receiver(post_delete, sender=Evento)
+def invalidar_contadores_por_evento(sender, instance, **kwargs):
+    """Sus notificaciones se eliminaron en cascada: los contadores se recalculan."""
+    contadores.invalidar(getattr(instance, '_usuarios_notificados', []))
@@ -0,0 +1,99 @@
+"""
+Sincronización incremental de notificaciones (GET /notificaciones/sync/?since=).
+
+Cada UsuarioNotificacion guarda en actualizada_en su último cambio (creación
+o lectura). El cursor es la pareja (actualizada_en, id) de la última fila
+entregada, codificada como "<microsegundos epoch>-<id>", y el cliente solo
+recibe las filas posteriores a él en ese orden.
+
+Una transacción que confirma tarde puede dejar filas con una marca anterior
+a otras ya entregadas; solo las marcas anteriores a ahora -
+MARGEN_SINCRONIZACION son definitivas al leer. Las páginas intermedias avanzan
+por posición (para no volver a pedir la misma página), pero su cursor lleva un
+tercer campo con el punto de reinicio: la marca más antigua que alguna página
+de la sincronización entregó sin ser definitiva. El cursor de la última página
+nunca pasa de ese punto ni de ahora - MARGEN_SINCRONIZACION, aunque el cursor
+recibido fuera posterior (p. ej. el de un payload por WebSocket): esas filas se
+vuelven a entregar en la siguiente sincronización (el cliente las aplica por
+id, así que repetirlas no tiene efecto).
+
+Las eliminaciones no se reportan: solo las hace el propio usuario.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db.models import Q
+from django.utils import timezone
+
+# Segundos hacia atrás que se vuelven a entregar al final de la sincronización
+MARGEN_SINCRONIZACION = timedelta(seconds=5)
+
+# Filas por respuesta de /sync/
+LIMITE_SINCRONIZACION = 200
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSEGUNDO = timedelta(microseconds=1)
+
+
+def _microsegundos(fecha):
+    return (fecha - _EPOCH) // _MICROSEGUNDO
+
+
+def _fecha(microsegundos, cursor):
+    try:
+        return _EPOCH + int(microsegundos) * _MICROSEGUNDO
+    except OverflowError as e:
+        raise ValueError(f'Cursor fuera de rango: {cursor}') from e
+
+
+def codificar_cursor(fecha, fila_id=0, reinicio=None):
+    cursor = f'{_microsegundos(fecha)}-{fila_id}'
+    if reinicio is not None:
+        cursor += f'-{_microsegundos(reinicio)}'
+    return cursor
+
+
+def decodificar_cursor(cursor):
+    """
+    Retorna (fecha, id, reinicio); reinicio es None salvo en los cursores de
+    páginas intermedias. Lanza ValueError si el cursor no es válido.
+    """
+    partes = str(cursor).split('-')
+    if len(partes) > 3:
+        raise ValueError(f'Cursor inválido: {cursor}')
+    microsegundos, fila_id, reinicio = partes + [''] * (3 - len(partes))
+    return (
+        _fecha(microsegundos, cursor),
+        int(fila_id or 0),
+        _fecha(reinicio, cursor) if reinicio else None,
+    )
+
+
+def cursor_actual():
+    """Cursor a partir del cual un cliente recién sincronizado debe pedir cambios."""
+    return codificar_cursor(timezone.now() - MARGEN_SINCRONIZACION)
+
+
+def cambios_desde(queryset, cursor, limite=LIMITE_SINCRONIZACION):
+    """
+    Filas de `queryset` (UsuarioNotificacion de un usuario) posteriores al
+    cursor, en orden (actualizada_en, id). Retorna (filas, siguiente_cursor,
+    hay_mas). Lanza ValueError si el cursor no es válido.
+    """
+    fecha, fila_id, reinicio = decodificar_cursor(cursor)
+    filas = list(
+        queryset
+        .filter(Q(actualizada_en__gt=fecha) | Q(actualizada_en=fecha, id__gt=fila_id))
+        .order_by('actualizada_en', 'id')[:limite + 1]
+    )
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+
+    ultimo = (filas[-1].actualizada_en, filas[-1].id) if filas else (fecha, fila_id)
+    # Hasta dónde esta página es definitiva, junto con las anteriores
+    seguro = min(ultimo, (timezone.now() - MARGEN_SINCRONIZACION, 0))
+    if reinicio is not None:
+        seguro = min(seguro, (reinicio, 0))
+
+    if not hay_mas:
+        return filas, codificar_cursor(*seguro), hay_mas
+    # Página intermedia: se avanza por posición y se recuerda el reinicio
+    return filas, codificar_cursor(*ultimo, reinicio=seguro[0] if seguro < ultimo else None), hay_mas
@@ -1,16 +1,52 @@
 from celery import shared_task
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from apps.eventos.models import Evento
 from apps.notificaciones.models import Notificacion, UsuarioNotificacion
-from datetime import timedelta
+from apps.notificaciones import contadores
+from apps.notificaciones.sincronizacion import codificar_cursor
+from apps.notificaciones.fanout import destinatarios_evento, crear_usuario_notificaciones, entregar_notificacion
+from apps.notificaciones.recordatorios import RECORDATORIOS, HORIZONTE_PROGRAMACION, programar_recordatorios
+from django.db import IntegrityError, transaction
 from django.utils import timezone
+from datetime import timedelta
 import pytz
 
+# Los cambios de un mismo evento notificados dentro de esta ventana se fusionan
+# en la notificación ya creada en lugar de crear una nueva
+VENTANA_AGRUPACION_CAMBIOS = timedelta(seconds=10)
+
+def _payload_notificacion(notificacion, evento, actualizada_en=None):
+    """
+    Construye el payload que se envía por WebSocket. Es el mismo para todos
+    los destinatarios, así que se arma una sola vez por notificación.
+    `actualizada_en` es la marca de la última modificación de las filas de
+    los destinatarios si es posterior al envío (cambio agrupado).
+    """
+    return {
+        'id': notificacion.id,
+        'tipo': notificacion.tipo,
+        'mensaje': notificacion.mensaje,
+        'evento_id': evento.id if evento else None,
+        'evento_titulo': evento.titulo if evento else None,
+        'fecha_envio': notificacion.fecha_envio.isoformat(),
+        'leida': False,
+        # Cursor para /notificaciones/sync/ al reconectar
+        'cursor': codificar_cursor(actualizada_en or notificacion.fecha_envio)
+    }
+
+
+def _resumen_entrega(entrega):
+    """Métricas de entrega por WebSocket para el resultado de la tarea."""
+    return (
+        f"{entrega['entregadas']} entregadas, {entrega['omitidas']} omitidas (fuera de línea), "
+        f"{entrega['fallidas']} fallidas"
+    )
+
+
 def _crear_y_enviar_notificacion(evento, etiqueta, mensaje):
     """
     Función auxiliar para crear una notificación y enviarla a los usuarios.
-    Retorna True si se creó y envió, False si ya existía.
+    Retorna las estadísticas de entrega de entregar_notificacion() si se creó
+    y envió, False si ya existía.
     """
     # Verificar si ya existe una notificación para este evento con esta etiqueta
     notificacion_existente = Notificacion.objects.filter(
@@ -21,118 +57,85 @@ def _crear_y_enviar_notificacion(evento, etiqueta, mensaje):
     if notificacion_existente:
         return False
     
-    # Crear la notificación (solo si no existe)
+    # Crear la notificación (solo si no existe). La restricción única
+    # unique_recordatorio_evento resuelve la carrera entre dos ejecuciones del
+    # mismo recordatorio que pasaron la comprobación anterior a la vez.
     try:
-        notificacion = Notificacion.objects.create(
-            evento=evento,
-            tipo='recordatorio',
-            etiqueta=etiqueta,
-            mensaje=mensaje
-        )
+        with transaction.atomic():
+            notificacion = Notificacion.objects.create(
+                evento=evento,
+                tipo='recordatorio',
+                etiqueta=etiqueta,
+                mensaje=mensaje
+            )
+    except IntegrityError:
+        return False
     except Exception as e:
         print(f"❌ Error al crear notificación para evento '{evento.titulo}': {str(e)}")
         return False
     
-    # Obtener todos los usuarios que deben recibir la notificación
-    usuarios_a_notificar = []
+    # Obtener los IDs de los usuarios que deben recibir la notificación
+    # (organizador + inscritos, sin duplicados)
+    usuario_ids = destinatarios_evento(evento)
     
-    # 1. Añadir el organizador
-    usuarios_a_notificar.append(evento.organizador)
+    # Crear las relaciones UsuarioNotificacion en lotes
+    crear_usuario_notificaciones(notificacion, usuario_ids)
     
-    # 2. Añadir todos los usuarios inscritos
-    inscripciones = evento.inscripciones.select_related('usuario').all()
+    # Enviar notificación por WebSocket al grupo de cada usuario en línea
+    return entregar_notificacion(_payload_notificacion(notificacion, evento), usuario_ids)
+
+
+@shared_task
+def enviar_recordatorio(evento_id, etiqueta, version):
+    """
+    Tarea encolada con `eta` por programar_recordatorios() para enviar un
+    recordatorio (1 día, 1 hora o 15 minutos antes) de un evento.
+
+    Si el evento se reprogramó después de encolar la tarea, su
+    version_recordatorios ya no coincide y el recordatorio se ignora.
+    """
+    try:
+        evento = Evento.objects.select_related('organizador').get(id=evento_id)
+    except Evento.DoesNotExist:
+        return f"Recordatorio ignorado. El evento {evento_id} ya no existe."
     
-    for inscripcion in inscripciones:
-        if inscripcion.usuario not in usuarios_a_notificar:
-            usuarios_a_notificar.append(inscripcion.usuario)
+    if evento.version_recordatorios != version:
+        return f"Recordatorio ignorado. El evento {evento_id} fue reprogramado (versión {version} obsoleta)."
     
-    # Crear las relaciones UsuarioNotificacion y enviar por WebSocket
-    for usuario in usuarios_a_notificar:
-        UsuarioNotificacion.objects.get_or_create(
-            usuario=usuario,
-            notificacion=notificacion,
-            defaults={'leida': False}
-        )
-        
-        # Enviar notificación por WebSocket al grupo del usuario
-        try:
-            channel_layer = get_channel_layer()
-            grupo_usuario = f"user_{usuario.id}"
-            
-            async_to_sync(channel_layer.group_send)(
-                grupo_usuario,
-                {
-                    'type': 'send_notification',
-                    'notification': {
-                        'id': notificacion.id,
-                        'tipo': notificacion.tipo,
-                        'mensaje': notificacion.mensaje,
-                        'evento_id': evento.id if evento else None,
-                        'evento_titulo': evento.titulo if evento else None,
-                        'fecha_envio': notificacion.fecha_envio.isoformat(),
-                        'leida': False
-                    }
-                }
-            )
-        except Exception as e:
-            print(f"⚠️  Error al enviar WebSocket a usuario {usuario.username}: {str(e)}")
+    if evento.fecha_inicio <= timezone.now():
+        return f"Recordatorio ignorado. El evento {evento_id} ya inició."
     
-    return True
+    mensaje = RECORDATORIOS[etiqueta]['mensaje_template'](evento)
+    entrega = _crear_y_enviar_notificacion(evento, etiqueta, mensaje)
+    if entrega:
+        return f"Recordatorio '{etiqueta}' enviado para el evento '{evento.titulo}': {_resumen_entrega(entrega)}."
+    return f"Recordatorio '{etiqueta}' ya enviado para el evento '{evento.titulo}'."
 
 
 @shared_task
-def notificar_eventos_proximos():
+def programar_recordatorios_proximos():
     """
-    Tarea que se ejecuta periódicamente para buscar eventos que inician en:
-    - 15 minutos
-    - 1 hora
-    - 1 día
-    
-    Crea notificaciones para los usuarios inscritos y el organizador.
+    Tarea periódica que encola los recordatorios de los eventos que entran en
+    el horizonte de programación (eventos creados con mucha antelación o cuyos
+    recordatorios no se pudieron encolar al crearlos).
+
+    Como programar_recordatorios() es idempotente, volver a pasar por el mismo
+    evento no duplica recordatorios.
     """
     ahora_utc = timezone.now()
-    notificaciones_creadas = 0
-    
-    # Definir los rangos de tiempo para cada tipo de recordatorio
-    recordatorios = [
-        {
-            'etiqueta': 'recordatorio_15m',
-            'mensaje_template': lambda e: f"El evento '{e.titulo}' inicia en 15 minutos. ¡Prepárate!",
-            'rango_min': timedelta(minutes=15, seconds=-30),
-            'rango_max': timedelta(minutes=15, seconds=30),
-        },
-        {
-            'etiqueta': 'recordatorio_1h',
-            'mensaje_template': lambda e: f"El evento '{e.titulo}' inicia en 1 hora. ¡No te lo pierdas!",
-            'rango_min': timedelta(hours=1, minutes=-2),
-            'rango_max': timedelta(hours=1, minutes=2),
-        },
-        {
-            'etiqueta': 'recordatorio_1d',
-            'mensaje_template': lambda e: f"El evento '{e.titulo}' inicia mañana. ¡No olvides asistir!",
-            'rango_min': timedelta(days=1, minutes=-30),
-            'rango_max': timedelta(days=1, minutes=30),
-        },
-    ]
-    
-    # Procesar cada tipo de recordatorio
-    for recordatorio in recordatorios:
-        rango_inicio = ahora_utc + recordatorio['rango_min']
-        rango_fin = ahora_utc + recordatorio['rango_max']
-        
-        # Buscar eventos que inician en este rango
-        eventos_proximos = Evento.objects.filter(
-            fecha_inicio__gte=rango_inicio,
-            fecha_inicio__lte=rango_fin
-        ).select_related('organizador', 'categoria').prefetch_related('inscripciones__usuario')
-        
-        # Procesar cada evento encontrado
-        for evento in eventos_proximos:
-            mensaje = recordatorio['mensaje_template'](evento)
-            if _crear_y_enviar_notificacion(evento, recordatorio['etiqueta'], mensaje):
-                notificaciones_creadas += 1
-    
-    return f"Proceso completado. {notificaciones_creadas} notificaciones creadas."
+    antelacion_maxima = max(config['antelacion'] for config in RECORDATORIOS.values())
+    
+    # Eventos con algún recordatorio entre ahora y el final del horizonte
+    eventos = Evento.objects.filter(
+        fecha_inicio__gt=ahora_utc,
+        fecha_inicio__lte=ahora_utc + HORIZONTE_PROGRAMACION + antelacion_maxima
+    ).only('id', 'fecha_inicio', 'version_recordatorios')
+    
+    programados = 0
+    for evento in eventos.iterator():
+        programados += programar_recordatorios(evento, ahora=ahora_utc)
+    
+    return f"Proceso completado. {programados} recordatorios programados."
 
 
 @shared_task
@@ -165,18 +168,82 @@ def limpiar_notificaciones_eventos_finalizados():
     if cantidad_notificaciones == 0:
         return f"Proceso completado. {cantidad_eventos} eventos finalizados encontrados, pero no hay notificaciones para eliminar."
     
+    # Usuarios afectados, para descartar sus contadores de notificaciones
+    usuarios_afectados = contadores.usuarios_notificados(notificaciones_a_eliminar)
+    
     # Eliminar las notificaciones (por CASCADE también se eliminarán los UsuarioNotificacion)
     notificaciones_a_eliminar.delete()
+    contadores.invalidar(usuarios_afectados)
     
     return f"Proceso completado. {cantidad_notificaciones} notificaciones eliminadas de {cantidad_eventos} eventos finalizados."
 
 
+@shared_task
+def reconciliar_contadores_notificaciones():
+    """
+    Corrige los contadores de notificaciones en caché que difieren de la base
+    de datos. Se ejecuta periódicamente mediante celery beat.
+    """
+    revisados, corregidos = contadores.reconciliar_contadores()
+    return f"Se revisaron {revisados} usuarios y se corrigieron {corregidos} contadores"
+
+
+def _fusionar_o_crear_notificacion_cambio(evento, mensaje):
+    """
+    Dentro de VENTANA_AGRUPACION_CAMBIOS agrega `mensaje` a la notificación de
+    cambio más reciente del evento; fuera de ella crea una nueva.
+    El bloqueo de la fila del evento serializa las tareas de cambio del mismo
+    evento, así que dos cambios simultáneos no crean dos notificaciones.
+    Al agregar líneas, las filas de los destinatarios vuelven a quedar sin
+    leer y con actualizada_en nueva, para que /sync/ y el cursor del
+    WebSocket reflejen el mensaje combinado.
+    Retorna (notificacion, creada, actualizada_en); actualizada_en es None
+    si las filas no se modificaron.
+    """
+    with transaction.atomic():
+        list(Evento.objects.select_for_update().filter(id=evento.id).values_list('id', flat=True))
+        reciente = Notificacion.objects.filter(
+            evento=evento,
+            tipo='evento',
+            etiqueta='general',
+            fecha_envio__gte=timezone.now() - VENTANA_AGRUPACION_CAMBIOS
+        ).order_by('-fecha_envio').first()
+
+        if reciente is None:
+            return Notificacion.objects.create(
+                evento=evento,
+                tipo='evento',  # Tipo 'evento' para cambios de evento
+                etiqueta='general',  # Etiqueta 'general' para todos los cambios
+                mensaje=mensaje
+            ), True, None
+
+        lineas = reciente.mensaje.split('\n')
+        nuevas = [linea for linea in mensaje.split('\n') if linea not in lineas]
+        if not nuevas:
+            return reciente, False, None
+
+        reciente.mensaje = '\n'.join([*lineas, *nuevas])
+        reciente.save(update_fields=['mensaje'])
+
+        actualizada_en = timezone.now()
+        filas = UsuarioNotificacion.objects.filter(notificacion=reciente)
+        releidas = list(filas.filter(leida=True).values_list('usuario_id', flat=True))
+        filas.update(leida=False, actualizada_en=actualizada_en)
+
+    contadores.marcar_no_leidas(releidas)
+    return reciente, False, actualizada_en
+
+
 def _crear_y_enviar_notificacion_cambio(evento, mensaje):
     """
     Función auxiliar para crear una notificación de cambio de evento y enviarla a los usuarios.
     Incluye tanto al organizador como a los usuarios inscritos.
     Usa tipo 'evento' y etiqueta 'general'.
-    Retorna True si se creó y envió, False si hubo error.
+    Los cambios del mismo evento dentro de VENTANA_AGRUPACION_CAMBIOS se
+    fusionan en una sola notificación (un UPDATE del mensaje en lugar de una
+    notificación y sus relaciones nuevas); el WebSocket reenvía la misma
+    notificación con el mensaje combinado y el consumer agrupa esos envíos.
+    Retorna las estadísticas de entrega si se creó y envió, False si hubo error.
     """
     import logging
     logger = logging.getLogger(__name__)
@@ -184,119 +251,74 @@ def _crear_y_enviar_notificacion_cambio(evento, mensaje):
     logger.info(f"🔔 [NOTIF_CAMBIO] Iniciando creación de notificación para evento '{evento.titulo}' (ID: {evento.id})")
     logger.debug(f"📝 [NOTIF_CAMBIO] Mensaje: {mensaje}")
     
-    # Crear la notificación (siempre crear una nueva para cada cambio)
     try:
-        notificacion = Notificacion.objects.create(
-            evento=evento,
-            tipo='evento',  # Tipo 'evento' para cambios de evento
-            etiqueta='general',  # Etiqueta 'general' para todos los cambios
-            mensaje=mensaje
-        )
-        logger.info(f"✅ [NOTIF_CAMBIO] Notificación creada en BD con ID: {notificacion.id}")
+        notificacion, creada, actualizada_en = _fusionar_o_crear_notificacion_cambio(evento, mensaje)
+        if creada:
+            logger.info(f"✅ [NOTIF_CAMBIO] Notificación creada en BD con ID: {notificacion.id}")
+        else:
+            logger.info(f"🧩 [NOTIF_CAMBIO] Cambio agrupado en la notificación {notificacion.id}")
     except Exception as e:
         logger.error(f"❌ [NOTIF_CAMBIO] Error al crear notificación de cambio para evento '{evento.titulo}': {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
         return False
     
-    # Obtener todos los usuarios que deben recibir la notificación
-    usuarios_a_notificar = []
-    
-    # 1. Añadir el organizador
-    usuarios_a_notificar.append(evento.organizador)
-    logger.debug(f"👤 [NOTIF_CAMBIO] Organizador agregado: {evento.organizador.username} (ID: {evento.organizador.id})")
+    # Obtener los IDs de los usuarios que deben recibir la notificación
+    # (organizador + inscritos, sin duplicados)
+    usuario_ids = destinatarios_evento(evento)
+    logger.info(f"📊 [NOTIF_CAMBIO] Total de usuarios a notificar: {len(usuario_ids)} (1 organizador + {len(usuario_ids) - 1} participantes)")
     
-    # 2. Añadir todos los usuarios inscritos
-    inscripciones = evento.inscripciones.select_related('usuario').all()
-    logger.debug(f"📋 [NOTIF_CAMBIO] Total de inscripciones encontradas: {inscripciones.count()}")
+    # Crear las relaciones UsuarioNotificacion en lotes
+    estadisticas = crear_usuario_notificaciones(notificacion, usuario_ids, actualizada_en=actualizada_en)
+    for lote in estadisticas['lotes']:
+        logger.debug(f"💾 [NOTIF_CAMBIO] Lote {lote['lote']}: {lote['filas']} relaciones en {lote['ms']} ms")
     
-    for inscripcion in inscripciones:
-        if inscripcion.usuario not in usuarios_a_notificar:
-            usuarios_a_notificar.append(inscripcion.usuario)
-            logger.debug(f"👤 [NOTIF_CAMBIO] Participante agregado: {inscripcion.usuario.username} (ID: {inscripcion.usuario.id})")
+    # Enviar por WebSocket (una sola pasada del event loop para todos los destinatarios)
+    entrega = entregar_notificacion(_payload_notificacion(notificacion, evento, actualizada_en), usuario_ids)
     
-    logger.info(f"📊 [NOTIF_CAMBIO] Total de usuarios a notificar: {len(usuarios_a_notificar)} (1 organizador + {len(usuarios_a_notificar) - 1} participantes)")
-    
-    # Si no hay usuarios a notificar, no hay nada que hacer
-    if not usuarios_a_notificar:
-        logger.warning(f"⚠️  [NOTIF_CAMBIO] No hay usuarios a notificar para el evento {evento.id}")
-        return False
+    logger.info(f"📊 [NOTIF_CAMBIO] Resumen: {_resumen_entrega(entrega)}")
     
-    # Crear las relaciones UsuarioNotificacion y enviar por WebSocket
-    notificaciones_enviadas = 0
-    notificaciones_fallidas = 0
-    
-    for usuario in usuarios_a_notificar:
-        try:
-            # Crear relación UsuarioNotificacion
-            usuario_notif, created = UsuarioNotificacion.objects.get_or_create(
-                usuario=usuario,
-                notificacion=notificacion,
-                defaults={'leida': False}
-            )
-            logger.debug(f"💾 [NOTIF_CAMBIO] Relación UsuarioNotificacion {'creada' if created else 'ya existía'} para usuario {usuario.username}")
-            
-            # Enviar notificación por WebSocket al grupo del usuario
-            channel_layer = get_channel_layer()
-            grupo_usuario = f"user_{usuario.id}"
-            
-            logger.debug(f"📡 [NOTIF_CAMBIO] Enviando WebSocket al grupo '{grupo_usuario}' para usuario {usuario.username}")
-            
-            async_to_sync(channel_layer.group_send)(
-                grupo_usuario,
-                {
-                    'type': 'send_notification',
-                    'notification': {
-                        'id': notificacion.id,
-                        'tipo': notificacion.tipo,
-                        'mensaje': notificacion.mensaje,
-                        'evento_id': evento.id if evento else None,
-                        'evento_titulo': evento.titulo if evento else None,
-                        'fecha_envio': notificacion.fecha_envio.isoformat(),
-                        'leida': False
-                    }
-                }
-            )
-            notificaciones_enviadas += 1
-            logger.debug(f"✅ [NOTIF_CAMBIO] WebSocket enviado exitosamente a usuario {usuario.username}")
-            
-        except Exception as e:
-            notificaciones_fallidas += 1
-            logger.error(f"⚠️  [NOTIF_CAMBIO] Error al enviar WebSocket a usuario {usuario.username}: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
-    
-    logger.info(f"📊 [NOTIF_CAMBIO] Resumen: {notificaciones_enviadas} notificaciones enviadas, {notificaciones_fallidas} fallidas")
-    
-    return True
+    return entrega
+
+
+# Mensaje de cada campo que genera notificación de cambio
+MENSAJES_CAMBIO = {
+    'ubicacion': lambda e, ant, nuevo: f"El evento '{e.titulo}' ha cambiado de ubicación. Nueva ubicación: {nuevo if nuevo else 'actualizada'}.",
+    'fecha_inicio': lambda e, ant, nuevo: f"El evento '{e.titulo}' ha cambiado su fecha de inicio. Nueva fecha: {nuevo if nuevo else e.fecha_inicio.strftime('%d/%m/%Y %H:%M')}.",
+    'fecha_fin': lambda e, ant, nuevo: f"El evento '{e.titulo}' ha cambiado su fecha de finalización. Nueva fecha: {nuevo if nuevo else e.fecha_fin.strftime('%d/%m/%Y %H:%M')}.",
+}
 
 
 @shared_task
-def notificar_cambio_evento(evento_id, campo_modificado, valor_anterior=None, valor_nuevo=None):
+def notificar_cambios_evento(evento_id, cambios):
     """
-    Tarea Celery para notificar al organizador y a los participantes cuando se modifica:
-    - ubicacion
-    - fecha_inicio
-    - fecha_fin
+    Tarea Celery para notificar al organizador y a los participantes todos
+    los cambios de una edición del evento (ubicacion, fecha_inicio, fecha_fin)
+    en una sola notificación: el evento y los destinatarios se cargan una vez,
+    el mensaje combina una línea por campo y el fan-out se hace una sola vez.
     
     Args:
         evento_id: ID del evento modificado
-        campo_modificado: 'ubicacion', 'fecha_inicio', o 'fecha_fin'
-        valor_anterior: Valor anterior del campo (opcional, para el mensaje)
-        valor_nuevo: Valor nuevo del campo (opcional, para el mensaje)
+        cambios: lista de {'campo', 'valor_anterior', 'valor_nuevo'}
     """
     import logging
     logger = logging.getLogger(__name__)
     
-    logger.info(f"🔔 [CELERY] Iniciando tarea de notificación de cambio para evento ID: {evento_id}")
-    logger.info(f"📋 [CELERY] Campo modificado: {campo_modificado}")
-    logger.debug(f"📋 [CELERY] Valor anterior: {valor_anterior}")
-    logger.debug(f"📋 [CELERY] Valor nuevo: {valor_nuevo}")
+    campos = [cambio['campo'] for cambio in cambios]
+    logger.info(f"🔔 [CELERY] Iniciando tarea de notificación de cambios para evento ID: {evento_id}")
+    logger.info(f"📋 [CELERY] Campos modificados: {', '.join(campos)}")
+    
+    invalidos = [campo for campo in campos if campo not in MENSAJES_CAMBIO]
+    if invalidos:
+        error_msg = f"Error: Campo(s) {', '.join(invalidos)} no válido(s) para notificaciones de cambio."
+        logger.error(f"❌ [CELERY] {error_msg}")
+        return error_msg
+    if not cambios:
+        return "Sin cambios que notificar."
     
     try:
-        evento = Evento.objects.select_related('organizador').prefetch_related('inscripciones__usuario').get(id=evento_id)
+        evento = Evento.objects.select_related('organizador').get(id=evento_id)
         logger.info(f"✅ [CELERY] Evento encontrado: '{evento.titulo}' (ID: {evento.id})")
-        logger.debug(f"👤 [CELERY] Organizador: {evento.organizador.username} (ID: {evento.organizador.id})")
     except Evento.DoesNotExist:
         error_msg = f"Error: Evento con ID {evento_id} no encontrado."
         logger.error(f"❌ [CELERY] {error_msg}")
@@ -308,29 +330,12 @@ def notificar_cambio_evento(evento_id, campo_modificado, valor_anterior=None, va
         logger.error(traceback.format_exc())
         return error_msg
     
-    # Mapear campos a mensajes personalizados
-    mapeo_campos = {
-        'ubicacion': {
-            'mensaje_template': lambda e, ant, nuevo: f"El evento '{e.titulo}' ha cambiado de ubicación. Nueva ubicación: {nuevo if nuevo else 'actualizada'}."
-        },
-        'fecha_inicio': {
-            'mensaje_template': lambda e, ant, nuevo: f"El evento '{e.titulo}' ha cambiado su fecha de inicio. Nueva fecha: {nuevo if nuevo else e.fecha_inicio.strftime('%d/%m/%Y %H:%M')}."
-        },
-        'fecha_fin': {
-            'mensaje_template': lambda e, ant, nuevo: f"El evento '{e.titulo}' ha cambiado su fecha de finalización. Nueva fecha: {nuevo if nuevo else e.fecha_fin.strftime('%d/%m/%Y %H:%M')}."
-        }
-    }
-    
-    if campo_modificado not in mapeo_campos:
-        error_msg = f"Error: Campo '{campo_modificado}' no es válido para notificaciones de cambio."
-        logger.error(f"❌ [CELERY] {error_msg}")
-        return error_msg
-    
-    config_campo = mapeo_campos[campo_modificado]
-    
-    # Crear mensaje personalizado
+    # Una línea por campo cambiado
     try:
-        mensaje = config_campo['mensaje_template'](evento, valor_anterior, valor_nuevo)
+        mensaje = '\n'.join(
+            MENSAJES_CAMBIO[cambio['campo']](evento, cambio.get('valor_anterior'), cambio.get('valor_nuevo'))
+            for cambio in cambios
+        )
         logger.info(f"📝 [CELERY] Mensaje generado: {mensaje}")
     except Exception as e:
         error_msg = f"Error al generar mensaje: {str(e)}"
@@ -339,15 +344,26 @@ def notificar_cambio_evento(evento_id, campo_modificado, valor_anterior=None, va
         logger.error(traceback.format_exc())
         return error_msg
     
-    # Crear y enviar notificación (usa etiqueta 'general')
-    logger.info(f"🚀 [CELERY] Llamando a _crear_y_enviar_notificacion_cambio()...")
     resultado = _crear_y_enviar_notificacion_cambio(evento, mensaje)
     
     if resultado:
-        success_msg = f"Notificación de cambio de {campo_modificado} enviada para el evento '{evento.titulo}'."
+        success_msg = f"Notificación de cambio de {', '.join(campos)} enviada para el evento '{evento.titulo}': {_resumen_entrega(resultado)}."
         logger.info(f"✅ [CELERY] {success_msg}")
         return success_msg
     else:
-        error_msg = f"No se pudo enviar la notificación de cambio de {campo_modificado} para el evento '{evento.titulo}'."
+        error_msg = f"No se pudo enviar la notificación de cambio de {', '.join(campos)} para el evento '{evento.titulo}'."
         logger.error(f"❌ [CELERY] {error_msg}")
-        return error_msg
\ No newline at end of file
+        return error_msg
+
+
+@shared_task
+def notificar_cambio_evento(evento_id, campo_modificado, valor_anterior=None, valor_nuevo=None):
+    """
+    Notificación de un solo campo modificado. Se mantiene para los mensajes
+    ya encolados con la firma anterior; delega en notificar_cambios_evento.
+    """
+    return notificar_cambios_evento(evento_id, [{
+        'campo': campo_modificado,
+        'valor_anterior': valor_anterior,
+        'valor_nuevo': valor_nuevo
+    }])
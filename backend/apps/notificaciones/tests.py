@@ -1,3 +1,843 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from channels.layers import get_channel_layer
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, connections
+from django.utils import timezone
+
+from apps.eventos.models import Evento, Inscripcion
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.usuarios.models import Rol, Usuario
+from . import contadores, identidad_ws, presencia
+from .consumers import NotificationConsumer
+from .fanout import crear_usuario_notificaciones, destinatarios_evento, entregar_notificacion
+from .models import Notificacion, UsuarioNotificacion
+from .recordatorios import programar_recordatorios, reprogramar_recordatorios
+from .sincronizacion import cambios_desde, codificar_cursor, decodificar_cursor
+from .tasks import (
+    _crear_y_enviar_notificacion, _payload_notificacion, enviar_recordatorio, limpiar_notificaciones_eventos_finalizados,
+    notificar_cambio_evento, notificar_cambios_evento, programar_recordatorios_proximos,
+)
+
+CAPA_EN_MEMORIA = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+def crear_usuario(username):
+    """Crea un usuario de prueba con el rol por defecto (pk=1)."""
+    Rol.objects.get_or_create(pk=1, defaults={'nombre': 'estudiante'})
+    return Usuario.objects.create(username=username, email=f'{username}@example.com')
+
+
+def crear_evento(organizador, aforo=50, inicio=None):
+    """Crea un evento futuro de prueba."""
+    inicio = inicio or timezone.now() + timedelta(days=2)
+    return Evento.objects.create(
+        titulo='Evento',
+        descripcion='Descripción',
+        fecha_inicio=inicio,
+        fecha_fin=inicio + timedelta(hours=2),
+        aforo=aforo,
+        ubicacion='Auditorio',
+        organizador=organizador,
+    )
+
+
+@override_settings(CHANNEL_LAYERS=CAPA_EN_MEMORIA, SECURE_SSL_REDIRECT=False)
+class FanoutNotificacionesTests(TestCase):
+    """Creación masiva de UsuarioNotificacion para los destinatarios de un evento."""
+
+    def setUp(self):
+        self.organizador = crear_usuario('organizador')
+        self.evento = crear_evento(self.organizador)
+        self.inscritos = [crear_usuario(f'inscrito_{i}') for i in range(7)]
+        for usuario in self.inscritos:
+            Inscripcion.objects.create(usuario=usuario, evento=self.evento)
+
+    def _notificacion(self):
+        return Notificacion.objects.create(evento=self.evento, tipo='evento', etiqueta='general', mensaje='Cambio')
+
+    def test_destinatarios_sin_duplicados(self):
+        # El organizador también está inscrito en su propio evento
+        Inscripcion.objects.create(usuario=self.organizador, evento=self.evento)
+
+        ids = destinatarios_evento(self.evento)
+
+        self.assertEqual(ids[0], self.organizador.id)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), {self.organizador.id, *(u.id for u in self.inscritos)})
+
+    def test_inserta_por_lotes(self):
+        notificacion = self._notificacion()
+        ids = destinatarios_evento(self.evento)
+
+        with CaptureQueriesContext(connection) as ctx:
+            estadisticas = crear_usuario_notificaciones(notificacion, ids, tamano_lote=3)
+
+        self.assertEqual(estadisticas['destinatarios'], 8)
+        self.assertEqual([lote['filas'] for lote in estadisticas['lotes']], [3, 3, 2])
+        # Relaciones ya existentes + un INSERT por lote
+        self.assertEqual(len(ctx.captured_queries), 4)
+        self.assertEqual(UsuarioNotificacion.objects.filter(notificacion=notificacion, leida=False).count(), 8)
+
+    def test_reintento_no_duplica_relaciones(self):
+        notificacion = self._notificacion()
+        ids = destinatarios_evento(self.evento)
+
+        crear_usuario_notificaciones(notificacion, ids)
+        crear_usuario_notificaciones(notificacion, ids)
+
+        self.assertEqual(UsuarioNotificacion.objects.filter(notificacion=notificacion).count(), 8)
+
+    def test_recordatorio_no_se_repite(self):
+        self.assertTrue(_crear_y_enviar_notificacion(self.evento, 'recordatorio_1h', 'Pronto'))
+        self.assertFalse(_crear_y_enviar_notificacion(self.evento, 'recordatorio_1h', 'Pronto'))
+
+        self.assertEqual(UsuarioNotificacion.objects.filter(notificacion__evento=self.evento).count(), 8)
+
+    def test_notificar_cambio_evento(self):
+        resultado = notificar_cambio_evento(self.evento.id, 'ubicacion', 'Auditorio', 'Sala 2')
+
+        self.assertIn('enviada', resultado)
+        notificacion = Notificacion.objects.get(evento=self.evento, tipo='evento')
+        self.assertIn('Sala 2', notificacion.mensaje)
+        self.assertEqual(notificacion.destinatarios.count(), 8)
+
+    def test_notificar_cambios_evento_una_notificacion(self):
+        cambios = [
+            {'campo': 'ubicacion', 'valor_anterior': 'Auditorio', 'valor_nuevo': 'Sala 2'},
+            {'campo': 'fecha_fin', 'valor_anterior': None, 'valor_nuevo': '01/01/2030 12:00'},
+        ]
+
+        with CaptureQueriesContext(connection) as consultas_dos:
+            notificar_cambios_evento(self.evento.id, cambios)
+        Notificacion.objects.all().delete()
+        with CaptureQueriesContext(connection) as consultas_una:
+            notificar_cambios_evento(self.evento.id, cambios[:1])
+
+        # Dos campos cuestan lo mismo que uno
+        self.assertEqual(len(consultas_dos), len(consultas_una))
+        self.assertEqual(len(Notificacion.objects.get(evento=self.evento).mensaje.split('\n')), 1)
+
+    def test_notificar_cambios_evento_mensaje_combinado(self):
+        notificar_cambios_evento(self.evento.id, [
+            {'campo': 'ubicacion', 'valor_anterior': 'Auditorio', 'valor_nuevo': 'Sala 2'},
+            {'campo': 'fecha_fin', 'valor_anterior': None, 'valor_nuevo': '01/01/2030 12:00'},
+        ])
+
+        notificacion = Notificacion.objects.get(evento=self.evento, tipo='evento')
+        self.assertEqual(len(notificacion.mensaje.split('\n')), 2)
+        self.assertEqual(notificacion.destinatarios.count(), 8)
+        self.assertIn('no válido', notificar_cambios_evento(self.evento.id, [{'campo': 'titulo'}]))
+
+
+class CapaConFallos:
+    """Channel layer de prueba: falla para un grupo y registra la concurrencia máxima."""
+
+    def __init__(self, grupo_fallido):
+        self.grupo_fallido = grupo_fallido
+        self.en_vuelo = 0
+        self.max_en_vuelo = 0
+        self.enviados = []
+
+    async def group_send(self, grupo, mensaje):
+        self.en_vuelo += 1
+        self.max_en_vuelo = max(self.max_en_vuelo, self.en_vuelo)
+        try:
+            await asyncio.sleep(0)
+            if grupo == self.grupo_fallido:
+                raise ConnectionError('Redis no disponible')
+            self.enviados.append(grupo)
+        finally:
+            self.en_vuelo -= 1
+
+
+@override_settings(CHANNEL_LAYERS=CAPA_EN_MEMORIA)
+class EntregaWebSocketTests(TestCase):
+    """Entrega concurrente y acotada de notificaciones al channel layer."""
+
+    def test_entrega_a_los_grupos_de_usuario(self):
+        channel_layer = get_channel_layer()
+        canal = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('user_2', canal)
+
+        estadisticas = entregar_notificacion({'id': 1, 'mensaje': 'Hola'}, [1, 2, 3])
+
+        self.assertEqual(estadisticas, {'entregadas': 3, 'fallidas': 0, 'omitidas': 0})
+        mensaje = async_to_sync(channel_layer.receive)(canal)
+        self.assertEqual(mensaje['type'], 'send_notification')
+        self.assertEqual(mensaje['notification']['mensaje'], 'Hola')
+
+    def test_cuenta_fallos_y_respeta_la_concurrencia(self):
+        capa = CapaConFallos(grupo_fallido='user_5')
+        with mock.patch('apps.notificaciones.fanout.get_channel_layer', return_value=capa):
+            estadisticas = entregar_notificacion({'id': 1}, range(1, 51), concurrencia=4)
+
+        self.assertEqual(estadisticas, {'entregadas': 49, 'fallidas': 1, 'omitidas': 0})
+        self.assertEqual(len(capa.enviados), 49)
+        self.assertEqual(capa.max_en_vuelo, 4)
+
+    def test_sin_destinatarios(self):
+        self.assertEqual(entregar_notificacion({'id': 1}, []), {'entregadas': 0, 'fallidas': 0, 'omitidas': 0})
+
+
+@override_settings(CHANNEL_LAYERS=CAPA_EN_MEMORIA, SECURE_SSL_REDIRECT=False)
+class RecordatoriosTests(TestCase):
+    """Recordatorios programados una sola vez por evento con ETA y token de versión."""
+
+    def setUp(self):
+        cache.clear()
+        self.organizador = crear_usuario('organizador')
+        patcher = mock.patch('apps.notificaciones.tasks.enviar_recordatorio.apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _programados(self):
+        return {
+            llamada.kwargs['args'][1]: llamada.kwargs['eta']
+            for llamada in self.apply_async.call_args_list
+        }
+
+    def test_programa_los_tres_recordatorios_con_eta_exacta(self):
+        inicio = timezone.now() + timedelta(hours=30)
+        evento = crear_evento(self.organizador, inicio=inicio)
+
+        self.assertEqual(programar_recordatorios(evento), 3)
+        self.assertEqual(self._programados(), {
+            'recordatorio_1d': inicio - timedelta(days=1),
+            'recordatorio_1h': inicio - timedelta(hours=1),
+            'recordatorio_15m': inicio - timedelta(minutes=15),
+        })
+
+    def test_omite_recordatorios_pasados_y_lejanos(self):
+        cercano = crear_evento(self.organizador, inicio=timezone.now() + timedelta(minutes=30))
+        lejano = crear_evento(self.organizador, inicio=timezone.now() + timedelta(days=10))
+
+        programar_recordatorios(cercano)
+        programar_recordatorios(lejano)
+
+        self.assertEqual(list(self._programados()), ['recordatorio_15m'])
+
+    def test_programar_es_idempotente(self):
+        evento = crear_evento(self.organizador, inicio=timezone.now() + timedelta(hours=30))
+        programar_recordatorios(evento)
+
+        self.assertEqual(programar_recordatorios(evento), 0)
+        self.assertEqual(programar_recordatorios_proximos(), 'Proceso completado. 0 recordatorios programados.')
+        self.assertEqual(self.apply_async.call_count, 3)
+
+    def test_recordatorio_obsoleto_se_ignora(self):
+        evento = crear_evento(self.organizador)
+        version = evento.version_recordatorios
+        reprogramar_recordatorios(evento)
+
+        resultado = enviar_recordatorio(evento.id, 'recordatorio_1d', version)
+
+        self.assertIn('obsoleta', resultado)
+        self.assertFalse(Notificacion.objects.filter(evento=evento).exists())
+
+        enviar_recordatorio(evento.id, 'recordatorio_1d', evento.version_recordatorios)
+        notificacion = Notificacion.objects.get(evento=evento, etiqueta='recordatorio_1d')
+        self.assertIn('inicia mañana', notificacion.mensaje)
+
+    def test_recordatorio_duplicado_no_se_crea_dos_veces(self):
+        evento = crear_evento(self.organizador)
+        Inscripcion.objects.create(usuario=crear_usuario('inscrito'), evento=evento)
+        enviar_recordatorio(evento.id, 'recordatorio_1d', evento.version_recordatorios)
+
+        # Otra ejecución que pasó la comprobación previa antes de que existiera
+        with mock.patch.object(Notificacion.objects, 'filter') as filtrar:
+            filtrar.return_value.first.return_value = None
+            self.assertFalse(_crear_y_enviar_notificacion(evento, 'recordatorio_1d', 'Otra vez'))
+
+        self.assertEqual(Notificacion.objects.filter(evento=evento, etiqueta='recordatorio_1d').count(), 1)
+        self.assertEqual(UsuarioNotificacion.objects.filter(notificacion__evento=evento).count(), 2)
+
+    @mock.patch('apps.eventos.views.notificar_cambios_evento.delay')
+    def test_actualizar_fecha_inicio_reprograma(self, notificar_cambios):
+        evento = crear_evento(self.organizador)
+        enviar_recordatorio(evento.id, 'recordatorio_1d', evento.version_recordatorios)
+        nuevo_inicio = timezone.now() + timedelta(hours=20)
+
+        client = APIClient()
+        client.force_authenticate(user=self.organizador)
+        response = client.patch(f'/api/events-utils/eventos/{evento.id}/', {
+            'fecha_inicio': nuevo_inicio.isoformat(),
+            'fecha_fin': (nuevo_inicio + timedelta(hours=2)).isoformat(),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        # Una sola tarea con los dos campos cambiados
+        notificar_cambios.assert_called_once()
+        self.assertEqual([c['campo'] for c in notificar_cambios.call_args.args[1]], ['fecha_inicio', 'fecha_fin'])
+        evento.refresh_from_db()
+        self.assertEqual(evento.version_recordatorios, 1)
+        # El recordatorio de la fecha anterior se elimina y se programan los de la nueva
+        self.assertFalse(Notificacion.objects.filter(evento=evento, etiqueta='recordatorio_1d').exists())
+        self.assertEqual(set(self._programados()), {'recordatorio_1h', 'recordatorio_15m'})
+        self.assertTrue(all(
+            llamada.kwargs['args'][2] == 1 for llamada in self.apply_async.call_args_list
+        ))
+
+
+@override_settings(CHANNEL_LAYERS=CAPA_EN_MEMORIA, SECURE_SSL_REDIRECT=False)
+class ContadoresNotificacionesTests(TestCase):
+    """Conteo de notificaciones servido desde contadores en caché."""
+    url_conteo = '/api/notifications-utils/notificaciones/conteo/'
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = crear_usuario('usuario')
+        self.evento = crear_evento(crear_usuario('organizador'))
+        self.notificaciones = [self._notificar() for _ in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+    def _notificar(self):
+        notificacion = Notificacion.objects.create(evento=self.evento, tipo='evento', etiqueta='general', mensaje='Cambio')
+        crear_usuario_notificaciones(notificacion, [self.usuario.id])
+        return notificacion
+
+    def _conteo(self):
+        return self.client.get(self.url_conteo).data
+
+    def test_conteo_desde_cache(self):
+        self.assertEqual(self._conteo(), {'total': 3, 'no_leidas': 3, 'leidas': 0})
+
+        with CaptureQueriesContext(connection) as ctx:
+            contadores.obtener_conteo(self.usuario.id)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    @mock.patch('apps.notificaciones.recordatorios.programar_recordatorios')
+    def test_borrados_en_cascada_invalidan_contadores(self, programar):
+        recordatorio = Notificacion.objects.create(
+            evento=self.evento, tipo='evento', etiqueta='recordatorio_1d', mensaje='Mañana'
+        )
+        crear_usuario_notificaciones(recordatorio, [self.usuario.id])
+        self.assertEqual(self._conteo()['no_leidas'], 4)
+
+        # Reprogramar elimina los recordatorios enviados
+        reprogramar_recordatorios(self.evento)
+        self.assertEqual(self._conteo()['no_leidas'], 3)
+
+        # Eliminar el evento elimina sus notificaciones
+        self.evento.delete()
+        self.assertEqual(self._conteo(), {'total': 0, 'no_leidas': 0, 'leidas': 0})
+
+    def test_fanout_leer_y_eliminar_actualizan_contadores(self):
+        self._conteo()
+        nueva = self._notificar()
+        # Reintentar el fan-out no vuelve a sumar
+        crear_usuario_notificaciones(nueva, [self.usuario.id])
+        self.assertEqual(self._conteo()['no_leidas'], 4)
+
+        url = f'/api/notifications-utils/notificaciones/{nueva.id}/'
+        self.client.patch(url + 'leer/')
+        self.client.patch(url + 'leer/')
+        self.assertEqual(self._conteo(), {'total': 4, 'no_leidas': 3, 'leidas': 1})
+
+        self.client.delete(url + 'eliminar/')
+        self.client.delete(f'/api/notifications-utils/notificaciones/{self.notificaciones[0].id}/eliminar/')
+        self.assertEqual(self._conteo(), {'total': 2, 'no_leidas': 2, 'leidas': 0})
+
+    def test_limpieza_invalida_contadores(self):
+        self._conteo()
+        Evento.objects.filter(id=self.evento.id).update(
+            fecha_inicio=timezone.now() - timedelta(days=2), fecha_fin=timezone.now() - timedelta(days=1)
+        )
+
+        limpiar_notificaciones_eventos_finalizados()
+
+        self.assertEqual(self._conteo(), {'total': 0, 'no_leidas': 0, 'leidas': 0})
+
+    def test_reconciliacion_corrige_desfases(self):
+        self._conteo()
+        # Cambio directo en la BD que no pasa por los contadores
+        UsuarioNotificacion.objects.filter(usuario=self.usuario).update(leida=True)
+
+        revisados, corregidos = contadores.reconciliar_contadores(tamano_lote=1)
+
+        self.assertEqual((revisados, corregidos), (1, 2))
+        self.assertEqual(self._conteo(), {'total': 3, 'no_leidas': 0, 'leidas': 3})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ListadoNotificacionesTests(TestCase):
+    """El listado lee UsuarioNotificacion con JOIN: sin DISTINCT ni consultas por fila."""
+    url = '/api/notifications-utils/notificaciones/'
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = crear_usuario('usuario')
+        self.evento = crear_evento(crear_usuario('organizador'))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+    def _crear(self, cantidad, leidas=0):
+        for i in range(cantidad):
+            notificacion = Notificacion.objects.create(evento=self.evento, tipo='evento', etiqueta='general', mensaje=f'Aviso {i}')
+            UsuarioNotificacion.objects.create(usuario=self.usuario, notificacion=notificacion, leida=i < leidas)
+
+    def _listar(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, ctx.captured_queries
+
+    def test_pagina_en_consultas_constantes(self):
+        self._crear(2)
+        _, pocas = self._listar()
+        self._crear(7, leidas=3)
+        response, muchas = self._listar()
+
+        # COUNT de paginación + página
+        self.assertEqual(len(pocas), len(muchas))
+        self.assertEqual(len(muchas), 2)
+        self.assertFalse(any('DISTINCT' in q['sql'] for q in muchas))
+        self.assertEqual(len(response.data['results']), 9)
+
+        _, por_cursor = self._listar(paginacion='cursor')
+        self.assertEqual(len(por_cursor), 1)
+
+    def test_valores_del_serializer(self):
+        self._crear(2, leidas=1)
+        # Notificación de otro usuario: no aparece
+        otra = Notificacion.objects.create(evento=self.evento, tipo='sistema', mensaje='Ajena')
+        UsuarioNotificacion.objects.create(usuario=crear_usuario('otro'), notificacion=otra)
+
+        response, _ = self._listar(ordering='leida')
+
+        primera, segunda = response.data['results']
+        notificacion = Notificacion.objects.get(mensaje='Aviso 1')
+        self.assertEqual(primera['id'], notificacion.id)
+        self.assertFalse(primera['leida'])
+        self.assertTrue(segunda['leida'])
+        self.assertEqual(primera['evento_id'], self.evento.id)
+        self.assertEqual(primera['evento_titulo'], self.evento.titulo)
+        self.assertEqual(primera['etiqueta'], 'general')
+
+        detalle = self.client.get(f'{self.url}{notificacion.id}/')
+        self.assertEqual(detalle.data['mensaje'], 'Aviso 1')
+        self.assertEqual(self.client.get(f'{self.url}{otra.id}/').status_code, 404)
+
+
+@override_settings(CHANNEL_LAYERS=CAPA_EN_MEMORIA, SECURE_SSL_REDIRECT=False)
+class OperacionesEnLoteTests(TestCase):
+    """Lectura y eliminación de notificaciones en lote con un solo statement."""
+    url = '/api/notifications-utils/notificaciones/'
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = crear_usuario('usuario')
+        otro = crear_usuario('otro')
+        evento = crear_evento(crear_usuario('organizador'))
+        self.notificaciones = []
+        for _ in range(4):
+            notificacion = Notificacion.objects.create(evento=evento, tipo='evento', etiqueta='general', mensaje='Cambio')
+            crear_usuario_notificaciones(notificacion, [self.usuario.id, otro.id])
+            self.notificaciones.append(notificacion)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+        self.channel_layer = get_channel_layer()
+        self.canal = async_to_sync(self.channel_layer.new_channel)()
+        async_to_sync(self.channel_layer.group_add)(f'user_{self.usuario.id}', self.canal)
+
+    def _mensaje_ws(self):
+        return async_to_sync(self.channel_layer.receive)(self.canal)
+
+    def test_leer_todas_en_un_update(self):
+        self.client.get(self.url + 'conteo/')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(self.url + 'leer_todas/')
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(response.data['actualizadas'], 4)
+        self.assertEqual(response.data['conteo'], {'total': 4, 'no_leidas': 0, 'leidas': 4})
+        mensaje = self._mensaje_ws()
+        self.assertEqual(mensaje, {'type': 'send_conteo', 'conteo': response.data['conteo']})
+        # Las notificaciones de otros usuarios no cambian
+        self.assertEqual(UsuarioNotificacion.objects.filter(leida=False).count(), 4)
+
+    def test_leer_lote_ignora_ids_ajenos_y_repetidos(self):
+        ids = [self.notificaciones[0].id, self.notificaciones[1].id, self.notificaciones[1].id, 999999]
+
+        response = self.client.patch(self.url + 'leer_lote/', {'ids': ids}, format='json')
+
+        self.assertEqual(response.data['actualizadas'], 2)
+        self.assertEqual(response.data['conteo']['no_leidas'], 2)
+        self.assertEqual(self._mensaje_ws()['conteo']['leidas'], 2)
+
+    def test_eliminar_lote(self):
+        self.client.patch(self.url + 'leer_lote/', {'ids': [self.notificaciones[0].id]}, format='json')
+        self._mensaje_ws()
+        ids = [n.id for n in self.notificaciones[:3]]
+
+        response = self.client.post(self.url + 'eliminar_lote/', {'ids': ids}, format='json')
+
+        self.assertEqual(response.data['eliminadas'], 3)
+        self.assertEqual(response.data['conteo'], {'total': 1, 'no_leidas': 1, 'leidas': 0})
+        self.assertEqual(self._mensaje_ws()['conteo']['total'], 1)
+        self.assertEqual(Notificacion.objects.count(), 4)
+
+    def test_ids_invalidos(self):
+        for cuerpo in ({}, {'ids': []}, {'ids': ['a']}, {'ids': list(range(501))}):
+            response = self.client.post(self.url + 'eliminar_lote/', cuerpo, format='json')
+            self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SincronizacionTests(TestCase):
+    """Cambios de notificaciones posteriores a un cursor (actualizada_en, id)."""
+    url = '/api/notifications-utils/notificaciones/sync/'
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = crear_usuario('usuario')
+        self.evento = crear_evento(crear_usuario('organizador'))
+        self.notificaciones = []
+        for i in range(3):
+            notificacion = Notificacion.objects.create(evento=self.evento, tipo='evento', etiqueta='general', mensaje=f'Aviso {i}')
+            crear_usuario_notificaciones(notificacion, [self.usuario.id])
+            self.notificaciones.append(notificacion)
+        # Fuera del margen de sincronización
+        UsuarioNotificacion.objects.update(actualizada_en=timezone.now() - timedelta(minutes=1))
+        self.inicio = codificar_cursor(timezone.now() - timedelta(hours=1))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+    def _sync(self, since):
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_solo_entrega_cambios_posteriores(self):
+        data = self._sync(self.inicio)
+        self.assertEqual(len(data['notificaciones']), 3)
+        self.assertEqual(self._sync(data['cursor'])['notificaciones'], [])
+
+        leida = self.notificaciones[1]
+        self.client.patch(f'/api/notifications-utils/notificaciones/{leida.id}/leer/')
+
+        cambios = self._sync(data['cursor'])
+        self.assertEqual([(n['id'], n['leida']) for n in cambios['notificaciones']], [(leida.id, True)])
+        self.assertEqual(cambios['conteo']['no_leidas'], 2)
+        # El cambio está dentro del margen: el cursor no lo deja atrás todavía
+        self.assertEqual(len(self._sync(cambios['cursor'])['notificaciones']), 1)
+
+    def test_paginas_con_marcas_empatadas(self):
+        # leer_todas deja la misma marca en todas las filas
+        self.client.patch('/api/notifications-utils/notificaciones/leer_todas/')
+        UsuarioNotificacion.objects.update(actualizada_en=timezone.now() - timedelta(minutes=1))
+        queryset = UsuarioNotificacion.objects.filter(usuario=self.usuario)
+
+        vistos, cursor, hay_mas = [], self.inicio, True
+        while hay_mas:
+            filas, cursor, hay_mas = cambios_desde(queryset, cursor, limite=2)
+            vistos += [fila.id for fila in filas]
+
+        self.assertEqual(sorted(vistos), sorted(queryset.values_list('id', flat=True)))
+        self.assertEqual(len(vistos), 3)
+
+    def _fila_tardia(self, actualizada_en):
+        """Fila cuya transacción confirma después de una lectura previa a su marca."""
+        notificacion = Notificacion.objects.create(evento=self.evento, tipo='evento', etiqueta='general', mensaje='Tarde')
+        crear_usuario_notificaciones(notificacion, [self.usuario.id], actualizada_en=actualizada_en)
+        return UsuarioNotificacion.objects.get(notificacion=notificacion)
+
+    def test_confirmacion_tardia_entre_paginas(self):
+        ahora = timezone.now()
+        filas = list(UsuarioNotificacion.objects.filter(usuario=self.usuario).order_by('id'))
+        for i, fila in enumerate(filas):
+            UsuarioNotificacion.objects.filter(pk=fila.pk).update(actualizada_en=ahora - timedelta(seconds=3 - i))
+        queryset = UsuarioNotificacion.objects.filter(usuario=self.usuario)
+
+        primeras, cursor, hay_mas = cambios_desde(queryset, self.inicio, limite=2)
+        self.assertTrue(hay_mas)
+        # Confirma ahora, con una marca anterior a la posición del cursor
+        tardia = self._fila_tardia(ahora - timedelta(seconds=2, milliseconds=500))
+        ultimas, cursor, hay_mas = cambios_desde(queryset, cursor, limite=2)
+        self.assertFalse(hay_mas)
+        self.assertNotIn(tardia.id, [f.id for f in primeras + ultimas])
+
+        siguientes, _, _ = cambios_desde(queryset, cursor)
+        self.assertIn(tardia.id, [f.id for f in siguientes])
+
+    def test_confirmacion_tardia_antes_de_un_cursor_reciente(self):
+        # Cursor del payload de una notificación recién enviada
+        cursor = codificar_cursor(timezone.now())
+        tardia = self._fila_tardia(timezone.now() - timedelta(seconds=1))
+
+        filas, cursor, _ = cambios_desde(UsuarioNotificacion.objects.filter(usuario=self.usuario), cursor)
+        self.assertEqual(filas, [])
+
+        filas, _, _ = cambios_desde(UsuarioNotificacion.objects.filter(usuario=self.usuario), cursor)
+        self.assertEqual([f.id for f in filas], [tardia.id])
+
+    def test_cursor_en_payload_y_errores(self):
+        notificacion = self.notificaciones[0]
+        cursor = _payload_notificacion(notificacion, self.evento)['cursor']
+        self.assertEqual(decodificar_cursor(cursor), (notificacion.fecha_envio, 0, None))
+
+        self.assertIn('cursor', self.client.get(self.url).data)
+        for invalido in ('abc', '99999999999999999999999-1', '1-x', '1-2-3-4', '1-2-x'):
+            self.assertEqual(self.client.get(self.url, {'since': invalido}).status_code, 400)
+
+
+@override_settings(WS_IDENTIDAD_TTL=60, WS_IDENTIDAD_CACHE_COMPARTIDA=True)
+class IdentidadWebSocketTests(TestCase):
+    """Una decodificación por token y la identidad en caché por (user_id, jti)."""
+
+    def setUp(self):
+        cache.clear()
+        identidad_ws.identidades_locales.clear()
+        self.usuario = crear_usuario('conectado')
+
+    def _resolver(self, token):
+        datos = identidad_ws.decodificar_token(token)
+        return identidad_ws.identidad_local(datos) or identidad_ws.resolver_identidad(datos)
+
+    def test_reconexiones_sin_consultas(self):
+        token = str(AccessToken.for_user(self.usuario))
+        with self.assertNumQueries(1):
+            identidad = self._resolver(token)
+        self.assertEqual(identidad, identidad_ws.IdentidadWS(id=self.usuario.id, username='conectado'))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._resolver(token), identidad)
+
+        # Otro proceso (sin caché local) la encuentra en la caché compartida
+        identidad_ws.identidades_locales.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._resolver(token), identidad)
+
+        # Un token nuevo (otro jti) se resuelve de nuevo
+        with self.assertNumQueries(1):
+            self._resolver(str(AccessToken.for_user(self.usuario)))
+
+    @override_settings(WS_IDENTIDAD_TTL=0)
+    def test_cache_desactivada(self):
+        token = str(AccessToken.for_user(self.usuario))
+        self._resolver(token)
+        with self.assertNumQueries(1):
+            self._resolver(token)
+
+    def test_tokens_rechazados(self):
+        expirado = AccessToken.for_user(self.usuario)
+        expirado.set_exp(lifetime=-timedelta(minutes=1))
+
+        self.assertIsNone(identidad_ws.decodificar_token('no-es-un-jwt'))
+        self.assertIsNone(identidad_ws.decodificar_token(str(expirado)))
+        self.assertIsNone(identidad_ws.decodificar_token(str(RefreshToken.for_user(self.usuario))))
+
+        datos = identidad_ws.decodificar_token(str(AccessToken.for_user(self.usuario)))
+        self.usuario.delete()
+        self.assertIsNone(identidad_ws.resolver_identidad(datos))
+
+    def test_lru_acotada(self):
+        lru = identidad_ws.CacheLRU(maximo=2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')
+        lru.set('c', 3, 60)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+
+        lru.set('d', 4, -1)
+        self.assertIsNone(lru.get('d'))
+
+
+@override_settings(CHANNEL_LAYERS=CAPA_EN_MEMORIA, WS_PRESENCIA=True)
+class PresenciaTests(TestCase):
+    """Solo se publica por WebSocket a los usuarios con una conexión abierta."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_conexiones_por_usuario(self):
+        async_to_sync(presencia.registrar_conexion)(7, 'canal_a')
+        async_to_sync(presencia.registrar_conexion)(7, 'canal_b')
+        async_to_sync(presencia.registrar_desconexion)(7, 'canal_a')
+        self.assertEqual(presencia.en_linea([7, 8]), ([7], [8]))
+
+        async_to_sync(presencia.registrar_desconexion)(7, 'canal_b')
+        self.assertEqual(presencia.en_linea([7, 8]), ([], [7, 8]))
+
+        # El latido recrea la presencia si expiró con la conexión abierta
+        async_to_sync(presencia.latido)(8, 'canal_c')
+        self.assertEqual(presencia.en_linea([7, 8]), ([8], [7]))
+
+    def test_clave_perdida_no_desconecta_a_otra_conexion(self):
+        async_to_sync(presencia.registrar_conexion)(7, 'canal_a')
+        async_to_sync(presencia.registrar_conexion)(7, 'canal_b')
+        cache.delete(presencia.clave_presencia(7))
+
+        # Cada conexión restaura su propia entrada con su latido
+        async_to_sync(presencia.latido)(7, 'canal_a')
+        async_to_sync(presencia.latido)(7, 'canal_b')
+        async_to_sync(presencia.registrar_desconexion)(7, 'canal_a')
+
+        self.assertEqual(presencia.en_linea([7]), ([7], []))
+
+    def test_entradas_vencidas_no_cuentan(self):
+        async_to_sync(presencia.registrar_conexion)(7, 'canal_a')
+        with mock.patch('apps.notificaciones.presencia.time.time', return_value=time.time() + presencia.PRESENCIA_TTL + 1):
+            self.assertEqual(presencia.en_linea([7]), ([], [7]))
+
+    def test_fanout_omite_fuera_de_linea(self):
+        async_to_sync(presencia.registrar_conexion)(2, 'canal')
+        channel_layer = get_channel_layer()
+        canal = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('user_2', canal)
+
+        with mock.patch.object(channel_layer, 'group_send', wraps=channel_layer.group_send) as group_send:
+            estadisticas = entregar_notificacion({'id': 1}, [1, 2, 3])
+
+        self.assertEqual(estadisticas, {'entregadas': 1, 'fallidas': 0, 'omitidas': 2})
+        self.assertEqual([llamada.args[0] for llamada in group_send.call_args_list], ['user_2'])
+
+    @mock.patch.object(NotificationConsumer, 'get_user_from_token')
+    def test_consumer_registra_presencia(self, get_user_from_token):
+        get_user_from_token.return_value = identidad_ws.IdentidadWS(id=5, username='conectado')
+
+        async def conectar_y_salir():
+            comunicador = WebsocketCommunicator(NotificationConsumer.as_asgi(), '/ws/notifications/?token=x')
+            conectado, _ = await comunicador.connect()
+            self.assertTrue(conectado)
+            mensaje = await comunicador.receive_json_from()
+            en_linea = await asyncio.to_thread(presencia.en_linea, [5])
+            await comunicador.disconnect()
+            return mensaje, en_linea
+
+        mensaje, en_linea = async_to_sync(conectar_y_salir)()
+
+        self.assertEqual(mensaje['type'], 'connection_established')
+        self.assertEqual(en_linea, ([5], []))
+        self.assertEqual(presencia.en_linea([5]), ([], [5]))
+
+
+@override_settings(CHANNEL_LAYERS=CAPA_EN_MEMORIA, SECURE_SSL_REDIRECT=False)
+class AgrupacionCambiosTests(TestCase):
+    """Los cambios seguidos de un evento se agrupan en una notificación y un frame."""
+
+    def setUp(self):
+        cache.clear()
+        self.organizador = crear_usuario('organizador')
+        self.evento = crear_evento(self.organizador)
+        for i in range(3):
+            Inscripcion.objects.create(usuario=crear_usuario(f'inscrito_{i}'), evento=self.evento)
+
+    def test_cambios_en_la_ventana_se_fusionan(self):
+        notificar_cambio_evento(self.evento.id, 'ubicacion', 'Auditorio', 'Sala 2')
+        notificar_cambio_evento(self.evento.id, 'fecha_inicio', None, '2030-01-01T10:00:00Z')
+        notificar_cambio_evento(self.evento.id, 'fecha_fin', None, '2030-01-01T12:00:00Z')
+        # Repetir el mismo cambio no duplica la línea
+        notificar_cambio_evento(self.evento.id, 'ubicacion', 'Auditorio', 'Sala 2')
+
+        notificacion = Notificacion.objects.get(evento=self.evento, tipo='evento')
+        lineas = notificacion.mensaje.split('\n')
+        self.assertEqual(len(lineas), 3)
+        self.assertIn('Sala 2', lineas[0])
+        self.assertEqual(UsuarioNotificacion.objects.filter(notificacion=notificacion).count(), 4)
+        self.assertEqual(contadores.obtener_conteo(self.organizador.id)['no_leidas'], 1)
+
+    def test_cambio_agrupado_vuelve_a_no_leida(self):
+        notificar_cambio_evento(self.evento.id, 'ubicacion', 'Auditorio', 'Sala 2')
+        notificacion = Notificacion.objects.get(evento=self.evento, tipo='evento')
+
+        client = APIClient()
+        client.force_authenticate(user=self.organizador)
+        client.patch(f'/api/notifications-utils/notificaciones/{notificacion.id}/leer/')
+        self.assertEqual(contadores.obtener_conteo(self.organizador.id)['no_leidas'], 0)
+        fila = UsuarioNotificacion.objects.get(usuario=self.organizador, notificacion=notificacion)
+        since = codificar_cursor(fila.actualizada_en, fila.id)
+
+        with mock.patch('apps.notificaciones.tasks.entregar_notificacion', wraps=entregar_notificacion) as entregar:
+            notificar_cambio_evento(self.evento.id, 'fecha_fin', None, '01/01/2030 12:00')
+
+        fila.refresh_from_db()
+        self.assertFalse(fila.leida)
+        self.assertEqual(contadores.obtener_conteo(self.organizador.id), {'total': 1, 'no_leidas': 1, 'leidas': 0})
+        # El payload lleva un cursor posterior al envío original
+        payload = entregar.call_args.args[0]
+        self.assertEqual(payload['cursor'], codificar_cursor(fila.actualizada_en))
+        self.assertGreater(fila.actualizada_en, notificacion.fecha_envio)
+
+        response = client.get('/api/notifications-utils/notificaciones/sync/', {'since': since})
+        self.assertEqual(len(response.data['notificaciones']), 1)
+        sincronizada = response.data['notificaciones'][0]
+        self.assertFalse(sincronizada['leida'])
+        self.assertEqual(len(sincronizada['mensaje'].split('\n')), 2)
+
+    def test_fuera_de_la_ventana_crea_otra(self):
+        notificar_cambio_evento(self.evento.id, 'ubicacion', 'Auditorio', 'Sala 2')
+        Notificacion.objects.update(fecha_envio=timezone.now() - timedelta(minutes=1))
+
+        notificar_cambio_evento(self.evento.id, 'ubicacion', 'Sala 2', 'Sala 3')
+
+        self.assertEqual(Notificacion.objects.filter(evento=self.evento, tipo='evento').count(), 2)
+
+
+@override_settings(CHANNEL_LAYERS=CAPA_EN_MEMORIA)
+class AgrupacionFramesTests(SimpleTestCase):
+    """El consumer envía un solo frame por notificación dentro de su ventana."""
+
+    @mock.patch('apps.notificaciones.consumers.VENTANA_AGRUPACION_WS', 0.05)
+    @mock.patch.object(NotificationConsumer, 'get_user_from_token')
+    def test_consumer_agrupa_frames_de_la_misma_notificacion(self, get_user_from_token):
+        get_user_from_token.return_value = identidad_ws.IdentidadWS(id=9, username='conectado')
+
+        async def recibir():
+            comunicador = WebsocketCommunicator(NotificationConsumer.as_asgi(), '/ws/notifications/?token=x')
+            await comunicador.connect()
+            await comunicador.receive_json_from()
+            channel_layer = get_channel_layer()
+            for datos in ({'id': 1, 'mensaje': 'A'}, {'id': 1, 'mensaje': 'A\nB'}, {'id': 2, 'mensaje': 'C'}):
+                await channel_layer.group_send('user_9', {'type': 'send_notification', 'notification': datos})
+            frames = [await comunicador.receive_json_from(timeout=1) for _ in range(2)]
+            vacio = await comunicador.receive_nothing(timeout=0.2)
+            await comunicador.disconnect()
+            return frames, vacio
+
+        frames, vacio = async_to_sync(recibir)()
+
+        self.assertEqual([frame['data'] for frame in frames], [{'id': 1, 'mensaje': 'A\nB'}, {'id': 2, 'mensaje': 'C'}])
+        self.assertTrue(vacio)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Requiere transacciones concurrentes de PostgreSQL')
+@override_settings(CHANNEL_LAYERS=CAPA_EN_MEMORIA)
+class RecordatoriosConcurrentesTests(TransactionTestCase):
+    """Copias del mismo recordatorio ejecutadas a la vez crean una sola notificación."""
+
+    def test_ejecuciones_simultaneas(self):
+        evento = crear_evento(crear_usuario('organizador'))
+        barrera = threading.Barrier(3)
+        resultados = []
+
+        def ejecutar():
+            try:
+                barrera.wait()
+                resultados.append(enviar_recordatorio(evento.id, 'recordatorio_1d', evento.version_recordatorios))
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=ejecutar) for _ in range(3)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(Notificacion.objects.filter(evento=evento, etiqueta='recordatorio_1d').count(), 1)
+        self.assertEqual(sum('ya enviado' in r for r in resultados), 2)
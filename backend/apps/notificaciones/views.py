@@ -2,20 +2,37 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from .models import Notificacion, UsuarioNotificacion
+from django.db.models import F
+from django.utils import timezone
+from apps.eventos.paginacion import PaginacionSeleccionableMixin
+from . import contadores
+from .fanout import enviar_conteo
+from .models import UsuarioNotificacion
+from .paginacion import NotificacionesCursorPagination
+from .sincronizacion import cambios_desde, cursor_actual
 from .serializer import NotificacionSerializer
 
-class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
+# Máximo de IDs aceptados por una operación en lote
+MAX_IDS_LOTE = 500
+
+
+class NotificacionViewSet(PaginacionSeleccionableMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para notificaciones.
     Solo permite lectura (GET): list y retrieve.
     Solo muestra las notificaciones del usuario autenticado.
+    Con ?paginacion=cursor el feed se pagina por (-fecha_envio, id) sin COUNT.
     """
     serializer_class = NotificacionSerializer
     permission_classes = [IsAuthenticated]
+    cursor_pagination_class = NotificacionesCursorPagination
+    
+    # Las filas son UsuarioNotificacion, pero en la URL se usa el ID de la notificación
+    lookup_field = 'notificacion_id'
+    lookup_url_kwarg = 'pk'
     
     # 🔍 Búsqueda textual (por nombre del evento)
-    search_fields = ['evento__titulo', 'mensaje']
+    search_fields = ['notificacion__evento__titulo', 'notificacion__mensaje']
     
     # 🔢 Ordenamiento
     ordering_fields = ['fecha_envio', 'leida']
@@ -24,16 +41,15 @@ class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         """
         Retorna solo las notificaciones del usuario autenticado.
-        Filtra a través de la tabla UsuarioNotificacion para obtener
-        solo las notificaciones asociadas al usuario.
+        La tabla base es UsuarioNotificacion (una fila por usuario y
+        notificación), así que no hace falta DISTINCT y el estado de lectura
+        viene en la misma fila; la notificación y su evento se traen con JOIN.
         """
-        usuario = self.request.user
-        
-        # Obtener las notificaciones del usuario a través de UsuarioNotificacion
-        # Usamos select_related para optimizar las consultas
-        return Notificacion.objects.filter(
-            destinatarios__usuario=usuario
-        ).select_related('evento').distinct().order_by('-fecha_envio')
+        return UsuarioNotificacion.objects.filter(
+            usuario=self.request.user
+        ).select_related('notificacion__evento').annotate(
+            fecha_envio=F('notificacion__fecha_envio')
+        ).order_by('-fecha_envio')
     
     @action(detail=True, methods=['patch'])
     def leer(self, request, pk=None):
@@ -41,25 +57,18 @@ class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
         Endpoint personalizado para marcar una notificación como leída.
         PATCH /api/notifications-utils/notificaciones/{id}/leer/
         """
-        notificacion = self.get_object()
+        usuario_notificacion = self.get_object()
         
-        try:
-            usuario_notificacion = UsuarioNotificacion.objects.get(
-                usuario=request.user,
-                notificacion=notificacion
-            )
+        if not usuario_notificacion.leida:
             usuario_notificacion.leida = True
-            usuario_notificacion.save()
-            
-            return Response({
-                'detail': 'Notificación marcada como leída',
-                'leida': True
-            }, status=status.HTTP_200_OK)
-        except UsuarioNotificacion.DoesNotExist:
-            return Response(
-                {'detail': 'No tienes acceso a esta notificación'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+            usuario_notificacion.actualizada_en = timezone.now()
+            usuario_notificacion.save(update_fields=['leida', 'actualizada_en'])
+            contadores.marcar_leidas(request.user.id)
+        
+        return Response({
+            'detail': 'Notificación marcada como leída',
+            'leida': True
+        }, status=status.HTTP_200_OK)
     
     # Deshabilitar create, update, destroy
     def create(self, request, *args, **kwargs):
@@ -85,28 +94,39 @@ class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Endpoint para obtener el conteo de notificaciones del usuario.
         Retorna el total de notificaciones y el total de no leídas.
+        Se lee de los contadores en caché; solo si faltan se consulta la BD.
         GET /api/notifications-utils/notificaciones/conteo/
         """
-        usuario = request.user
-        
-        # Obtener todas las notificaciones del usuario
-        notificaciones = Notificacion.objects.filter(
-            destinatarios__usuario=usuario
-        ).distinct()
-        
-        # Contar total y no leídas
-        total = notificaciones.count()
+        return Response(contadores.obtener_conteo(request.user.id), status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        Sincronización incremental: notificaciones nuevas y cambios de lectura
+        posteriores al cursor `since` (recibido en una respuesta anterior o en
+        el payload de una notificación por WebSocket). Sin `since` solo retorna
+        el cursor actual, para usarlo tras cargar el listado completo.
+        GET /api/notifications-utils/notificaciones/sync/?since=<cursor>
+        """
+        since = request.query_params.get('since')
+        if not since:
+            return Response({
+                'cursor': cursor_actual(),
+                'hay_mas': False,
+                'notificaciones': [],
+                'conteo': contadores.obtener_conteo(request.user.id)
+            }, status=status.HTTP_200_OK)
         
-        # Contar no leídas usando UsuarioNotificacion
-        no_leidas = UsuarioNotificacion.objects.filter(
-            usuario=usuario,
-            leida=False
-        ).count()
+        try:
+            filas, cursor, hay_mas = cambios_desde(self.get_queryset(), since)
+        except ValueError:
+            return Response({'detail': 'Cursor inválido.'}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
-            'total': total,
-            'no_leidas': no_leidas,
-            'leidas': total - no_leidas
+            'cursor': cursor,
+            'hay_mas': hay_mas,
+            'notificaciones': self.get_serializer(filas, many=True).data,
+            'conteo': contadores.obtener_conteo(request.user.id)
         }, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['delete'])
@@ -116,20 +136,105 @@ class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
         Elimina el registro UsuarioNotificacion, no la Notificacion en sí.
         DELETE /api/notifications-utils/notificaciones/{id}/eliminar/
         """
-        notificacion = self.get_object()
+        usuario_notificacion = self.get_object()
+        usuario_notificacion.delete()
+        if usuario_notificacion.leida:
+            contadores.restar(request.user.id, leidas=1)
+        else:
+            contadores.restar(request.user.id, no_leidas=1)
         
+        return Response({
+            'detail': 'Notificación eliminada correctamente'
+        }, status=status.HTTP_200_OK)
+    
+    def _ids_lote(self, request):
+        """
+        Lee la lista 'ids' del cuerpo de la solicitud.
+        Retorna (ids, None) o (None, Response de error).
+        """
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return None, Response(
+                {'detail': "Se requiere 'ids': una lista no vacía de IDs de notificación."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > MAX_IDS_LOTE:
+            return None, Response(
+                {'detail': f'Se permiten como máximo {MAX_IDS_LOTE} IDs por solicitud.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         try:
-            usuario_notificacion = UsuarioNotificacion.objects.get(
-                usuario=request.user,
-                notificacion=notificacion
+            return {int(i) for i in ids}, None
+        except (TypeError, ValueError):
+            return None, Response(
+                {'detail': 'Los IDs deben ser números enteros.'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            usuario_notificacion.delete()
-            
-            return Response({
-                'detail': 'Notificación eliminada correctamente'
-            }, status=status.HTTP_200_OK)
-        except UsuarioNotificacion.DoesNotExist:
-            return Response(
-                {'detail': 'No tienes acceso a esta notificación'},
-                status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+    
+    def _responder_lote(self, request, clave, cantidad, mensaje):
+        """
+        Respuesta común de las operaciones en lote: cantidad afectada y
+        contadores nuevos, que también se envían por WebSocket en un solo mensaje.
+        """
+        conteo = contadores.obtener_conteo(request.user.id)
+        enviar_conteo(request.user.id, conteo)
+        return Response({
+            'detail': mensaje,
+            clave: cantidad,
+            'conteo': conteo
+        }, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['patch'])
+    def leer_todas(self, request):
+        """
+        Marca como leídas todas las notificaciones del usuario con un solo UPDATE.
+        PATCH /api/notifications-utils/notificaciones/leer_todas/
+        """
+        actualizadas = UsuarioNotificacion.objects.filter(
+            usuario=request.user,
+            leida=False
+        ).update(leida=True, actualizada_en=timezone.now())
+        contadores.marcar_leidas(request.user.id, actualizadas)
+        
+        return self._responder_lote(request, 'actualizadas', actualizadas, 'Notificaciones marcadas como leídas')
+    
+    @action(detail=False, methods=['patch'])
+    def leer_lote(self, request):
+        """
+        Marca como leídas las notificaciones indicadas con un solo UPDATE.
+        Los IDs que no pertenecen al usuario se ignoran.
+        PATCH /api/notifications-utils/notificaciones/leer_lote/  {"ids": [1, 2, 3]}
+        """
+        ids, error = self._ids_lote(request)
+        if error:
+            return error
+        
+        actualizadas = UsuarioNotificacion.objects.filter(
+            usuario=request.user,
+            notificacion_id__in=ids,
+            leida=False
+        ).update(leida=True, actualizada_en=timezone.now())
+        contadores.marcar_leidas(request.user.id, actualizadas)
+        
+        return self._responder_lote(request, 'actualizadas', actualizadas, 'Notificaciones marcadas como leídas')
+    
+    @action(detail=False, methods=['post'])
+    def eliminar_lote(self, request):
+        """
+        Elimina las notificaciones indicadas del usuario (los registros
+        UsuarioNotificacion, no las Notificacion) con un solo DELETE.
+        POST /api/notifications-utils/notificaciones/eliminar_lote/  {"ids": [1, 2, 3]}
+        """
+        ids, error = self._ids_lote(request)
+        if error:
+            return error
+        
+        eliminadas, _ = UsuarioNotificacion.objects.filter(
+            usuario=request.user,
+            notificacion_id__in=ids
+        ).delete()
+        # El DELETE no dice cuántas estaban leídas: se recalculan los contadores
+        if eliminadas:
+            contadores.invalidar([request.user.id])
+        
+        return self._responder_lote(request, 'eliminadas', eliminadas, 'Notificaciones eliminadas correctamente')
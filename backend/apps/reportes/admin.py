@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import TrabajoReporte
 
-# Register your models here.
+
+@admin.register(TrabajoReporte)
+class TrabajoReporteAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tipo', 'formato', 'estado', 'progreso', 'solicitado_por', 'fecha_creacion')
+    list_filter = ('estado', 'formato', 'tipo')
+    readonly_fields = ('clave', 'fecha_creacion', 'fecha_finalizacion')
@@ -0,0 +1,229 @@
+"""
+Motor de agregación de los reportes del panel de administración.
+Cada sección se calcula con una sola consulta agregada (conteos condicionales
+con Count(filter=Q(...)) cuando hay varios contadores sobre la misma tabla) y
+se guarda en caché por rango de fechas. Las secciones por mes, usuario,
+categoría y rating leen los resúmenes diarios (apps.reportes.resumenes), así
+que su costo depende del número de días y no del de eventos. Los endpoints
+individuales y /api/reportes/dashboard/ leen de las mismas entradas de caché.
+"""
+from datetime import datetime, time
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from apps.eventos.models import Evento
+from .models import ResumenDiarioEventos
+
+# Segundos que se reutiliza una sección ya calculada
+REPORTES_CACHE_TTL = 120
+
+# Reseñas mínimas para entrar al ranking de mejor valorados
+MIN_RESEÑAS_MEJOR_VALORADOS = 3
+
+
+def _eventos(inicio, fin):
+    qs = Evento.objects.all()
+    if inicio:
+        qs = qs.filter(fecha_inicio__date__gte=inicio)
+    if fin:
+        qs = qs.filter(fecha_inicio__date__lte=fin)
+    return qs
+
+
+def _resumenes(inicio, fin):
+    qs = ResumenDiarioEventos.objects.all()
+    if inicio:
+        qs = qs.filter(fecha__gte=inicio)
+    if fin:
+        qs = qs.filter(fecha__lte=fin)
+    return qs
+
+
+def eventos_por_mes(inicio=None, fin=None):
+    datos = (
+        _resumenes(inicio, fin)
+        .annotate(mes=TruncMonth('fecha'))
+        .values('mes')
+        .annotate(total=Sum('eventos'))
+        .order_by('mes')
+    )
+    # El mes se expresa como medianoche local del día 1, igual que TruncMonth
+    # sobre fecha_inicio
+    return [
+        {
+            'mes': timezone.make_aware(datetime.combine(d['mes'], time.min)).isoformat() if d['mes'] else None,
+            'total': d['total']
+        }
+        for d in datos
+    ]
+
+
+def eventos_por_usuario(inicio=None, fin=None):
+    datos = (
+        _resumenes(inicio, fin)
+        .values('organizador__id', 'organizador__username')
+        .annotate(total=Sum('eventos'))
+        .order_by('-total')
+    )
+    return [
+        {
+            'usuario_id': r['organizador__id'],
+            'username': r['organizador__username'] or 'Usuario eliminado',
+            'total': r['total']
+        }
+        for r in datos
+    ]
+
+
+def eventos_por_categoria(inicio=None, fin=None):
+    datos = (
+        _resumenes(inicio, fin)
+        .values('categoria__id', 'categoria__nombre')
+        .annotate(total=Sum('eventos'))
+        .order_by('-total')
+    )
+    return [
+        {
+            'categoria_id': r['categoria__id'],
+            'nombre': r['categoria__nombre'] or 'Sin categoría',
+            'total': r['total']
+        }
+        for r in datos
+    ]
+
+
+def eventos_por_lugar(inicio=None, fin=None):
+    datos = (
+        _eventos(inicio, fin)
+        .values('ubicacion')
+        .annotate(total=Count('id'))
+        .order_by('-total')
+    )
+    return [{'ubicacion': r['ubicacion'], 'total': r['total']} for r in datos]
+
+
+def eventos_por_estado(inicio=None, fin=None):
+    """
+    Futuros, en curso, finalizados y llenos en una sola consulta. "Llenos"
+    usa el contador desnormalizado inscritos_count en lugar de contar
+    inscripciones con un JOIN.
+    """
+    ahora = timezone.now()
+    return _eventos(inicio, fin).aggregate(
+        futuros=Count('id', filter=Q(fecha_inicio__gt=ahora)),
+        en_curso=Count('id', filter=Q(fecha_inicio__lte=ahora, fecha_fin__gte=ahora)),
+        finalizados=Count('id', filter=Q(fecha_fin__lt=ahora)),
+        llenos=Count('id', filter=Q(inscritos_count__gte=F('aforo'))),
+    )
+
+
+def rating_promedio(inicio=None, fin=None):
+    """
+    Promedio global, total, distribución por estrellas y promedio por
+    categoría desde los resúmenes diarios; mejor valorados (por evento)
+    desde las reseñas.
+    """
+    resumenes = _resumenes(inicio, fin)
+
+    stats = resumenes.aggregate(
+        total=Sum('reseñas'),
+        suma=Sum('suma_puntuacion'),
+        **{f'estrellas_{n}': Sum(f'estrellas_{n}') for n in range(1, 6)}
+    )
+    total = stats['total'] or 0
+
+    por_categoria = sorted(
+        (
+            {
+                'categoria': r['categoria__nombre'] or 'Sin categoría',
+                'promedio': round(r['suma'] / r['total_reseñas'], 2),
+                'total_reseñas': r['total_reseñas']
+            }
+            for r in (
+                resumenes
+                .values('categoria__nombre')
+                .annotate(total_reseñas=Sum('reseñas'), suma=Sum('suma_puntuacion'))
+                .filter(total_reseñas__gt=0)
+                .order_by()
+            )
+        ),
+        key=lambda r: r['promedio'],
+        reverse=True
+    )
+
+    filtro_reseñas = Q(reseñas__puntuacion__isnull=False)
+    mejor_valorados = (
+        _eventos(inicio, fin)
+        .annotate(
+            rating_promedio=Avg('reseñas__puntuacion'),
+            num_reseñas=Count('reseñas', filter=filtro_reseñas)
+        )
+        .filter(num_reseñas__gte=MIN_RESEÑAS_MEJOR_VALORADOS)
+        .order_by('-rating_promedio')[:5]
+        .values('id', 'titulo', 'rating_promedio', 'num_reseñas')
+    )
+
+    return {
+        'promedio_global': round(stats['suma'] / total, 2) if total else 0,
+        'total_reseñas': total,
+        'distribucion': [
+            {'estrellas': n, 'cantidad': stats[f'estrellas_{n}'] or 0}
+            for n in range(1, 6)
+        ],
+        'por_categoria': por_categoria,
+        'mejor_valorados': [
+            {
+                'id': e['id'],
+                'titulo': e['titulo'],
+                'rating_promedio': round(e['rating_promedio'], 2),
+                'num_reseñas': e['num_reseñas']
+            }
+            for e in mejor_valorados
+        ],
+    }
+
+
+SECCIONES = {
+    'eventos_por_mes': eventos_por_mes,
+    'eventos_por_usuario': eventos_por_usuario,
+    'eventos_por_categoria': eventos_por_categoria,
+    'eventos_por_lugar': eventos_por_lugar,
+    'eventos_por_estado': eventos_por_estado,
+    'rating_promedio': rating_promedio,
+}
+
+
+def clave_seccion(seccion, inicio=None, fin=None):
+    """Clave de caché de una sección para un rango de fechas (date o None)."""
+    rango = f"{inicio.isoformat() if inicio else '-'}:{fin.isoformat() if fin else '-'}"
+    return f'reportes:{seccion}:{rango}'
+
+
+def obtener_seccion(seccion, inicio=None, fin=None):
+    """Retorna una sección del panel, desde caché o calculándola."""
+    clave = clave_seccion(seccion, inicio, fin)
+    datos = cache.get(clave)
+    if datos is None:
+        datos = SECCIONES[seccion](inicio, fin)
+        cache.set(clave, datos, REPORTES_CACHE_TTL)
+    return datos
+
+
+def obtener_dashboard(inicio=None, fin=None):
+    """
+    Retorna todas las secciones del panel. Las que están en caché se leen
+    con una sola operación y solo se calculan las que faltan.
+    """
+    claves = {seccion: clave_seccion(seccion, inicio, fin) for seccion in SECCIONES}
+    en_cache = cache.get_many(claves.values())
+
+    dashboard, faltantes = {}, {}
+    for seccion, clave in claves.items():
+        if clave in en_cache:
+            dashboard[seccion] = en_cache[clave]
+        else:
+            dashboard[seccion] = faltantes[clave] = SECCIONES[seccion](inicio, fin)
+    if faltantes:
+        cache.set_many(faltantes, REPORTES_CACHE_TTL)
+    return dashboard
@@ -5,3 +5,6 @@ class ReportesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reportes'
 
+    def ready(self):
+        # Registrar las señales que marcan los resúmenes diarios pendientes
+        from . import signals  # noqa: F401
@@ -0,0 +1,152 @@
+"""
+Utilidades de exportación de reportes en streaming.
+Permiten enviar archivos grandes sin construirlos completos en memoria:
+las filas se leen de la BD por bloques y se escriben a la respuesta (CSV) o a
+archivos temporales (XLSX) a medida que se generan.
+"""
+import csv
+import pickle
+import tempfile
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
+
+# Filas que se leen de la BD por viaje (QuerySet.iterator(chunk_size=...))
+# y que se agrupan en cada bloque enviado al cliente
+TAMANO_CHUNK_EXPORTACION = 2000
+
+# Bytes que un archivo temporal mantiene en memoria antes de pasar a disco
+TAMANO_SPOOL_MEMORIA = 5 * 1024 * 1024
+# Bytes por bloque al enviar un archivo temporal al cliente
+TAMANO_BLOQUE_ARCHIVO = 64 * 1024
+
+ANCHO_MAXIMO_COLUMNA = 50
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve lo escrito en lugar de guardarlo."""
+
+    def write(self, valor):
+        return valor
+
+
+def generar_lineas_csv(headers, rows, tamano_bloque=TAMANO_CHUNK_EXPORTACION):
+    """
+    Generador de bloques de texto CSV. El encabezado se emite de inmediato y
+    las filas (diccionarios) se consumen de forma perezosa desde `rows`, en
+    bloques de `tamano_bloque` líneas.
+    """
+    writer = csv.writer(_Eco())
+    yield writer.writerow(headers)
+
+    bloque = []
+    for row in rows:
+        bloque.append(writer.writerow([row.get(h, '') for h in headers]))
+        if len(bloque) >= tamano_bloque:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def _celda_encabezado(ws, valor):
+    celda = WriteOnlyCell(ws, value=valor)
+    celda.font = Font(bold=True, color="FFFFFF", size=12)
+    celda.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    celda.alignment = Alignment(horizontal="center", vertical="center")
+    return celda
+
+
+def _leer_filas(archivo):
+    """Lee de nuevo las filas guardadas con pickle.dump, una a una."""
+    while True:
+        try:
+            yield pickle.load(archivo)
+        except EOFError:
+            return
+
+
+def generar_xlsx(headers, filas, titulo='Reporte'):
+    """
+    Construye un XLSX con un Workbook en modo write-only a partir de `filas`
+    (iterable de listas, consumido una sola vez) y lo retorna en un archivo
+    temporal posicionado al inicio. El llamador debe cerrarlo.
+
+    El ancho de cada columna se calcula llevando la longitud máxima mientras
+    se emiten las filas. Como en modo write-only los anchos deben fijarse
+    antes de escribir la primera fila, las filas se guardan primero en un
+    archivo temporal y luego se vuelcan a la hoja; nada crece en memoria con
+    el número de filas.
+    """
+    anchos = [len(str(h)) for h in headers]
+    with tempfile.SpooledTemporaryFile(max_size=TAMANO_SPOOL_MEMORIA) as filas_spool:
+        for fila in filas:
+            for i, valor in enumerate(fila):
+                anchos[i] = max(anchos[i], len(str(valor)))
+            pickle.dump(fila, filas_spool, protocol=pickle.HIGHEST_PROTOCOL)
+        filas_spool.seek(0)
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(titulo)
+        for i, ancho in enumerate(anchos, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = min(ancho + 2, ANCHO_MAXIMO_COLUMNA)
+
+        ws.append([_celda_encabezado(ws, h) for h in headers])
+        for fila in _leer_filas(filas_spool):
+            ws.append(fila)
+
+    salida = tempfile.SpooledTemporaryFile(max_size=TAMANO_SPOOL_MEMORIA)
+    wb.save(salida)
+    salida.seek(0)
+    return salida
+
+
+def iterar_archivo(archivo, tamano_bloque=TAMANO_BLOQUE_ARCHIVO):
+    """Generador de bloques de un archivo abierto; lo cierra al terminar."""
+    try:
+        while True:
+            bloque = archivo.read(tamano_bloque)
+            if not bloque:
+                return
+            yield bloque
+    finally:
+        archivo.close()
+
+
+async def _iterar_async(contenido):
+    """
+    Recorre un iterador síncrono desde el event loop. Cada bloque se obtiene
+    con sync_to_async (en el hilo síncrono compartido, así el cursor de BD se
+    usa siempre desde la misma conexión).
+    """
+    iterador = iter(contenido)
+    siguiente = sync_to_async(next)
+    fin = object()
+    while True:
+        # next() con valor por defecto: StopIteration no puede cruzar un Future
+        bloque = await siguiente(iterador, fin)
+        if bloque is fin:
+            return
+        yield bloque
+
+
+def respuesta_streaming(request, contenido, content_type, filename):
+    """
+    Envuelve un iterador de bloques en un StreamingHttpResponse con
+    Content-Disposition de descarga.
+
+    En ASGI (daphne) Django acumula en una lista los iteradores síncronos antes
+    de enviarlos, así que en ese caso se entrega un iterador asíncrono para que
+    cada bloque salga en cuanto se genera.
+    """
+    request = getattr(request, '_request', request)
+    if isinstance(request, ASGIRequest):
+        contenido = _iterar_async(contenido)
+
+    response = StreamingHttpResponse(contenido, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
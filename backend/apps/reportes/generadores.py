@@ -0,0 +1,268 @@
+"""
+Generadores de los reportes exportables (CSV, XLSX y PDF).
+Cada formato obtiene sus filas según el tipo de reporte
+(mes, usuarios, categorias, lugares, global). Los usan tanto las vistas de
+exportación síncrona como la tarea Celery de trabajos de reporte.
+"""
+import shutil
+from datetime import datetime
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from apps.eventos.models import Evento
+from .exportacion import TAMANO_CHUNK_EXPORTACION, generar_lineas_csv, generar_xlsx
+from .models import ResumenDiarioEventos
+
+TIPOS = ['mes', 'usuarios', 'categorias', 'lugares', 'global']
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+
+_NOMBRES_CSV = {
+    'mes': 'eventos_por_mes.csv',
+    'usuarios': 'eventos_por_usuario.csv',
+    'categorias': 'eventos_por_categoria.csv',
+    'lugares': 'eventos_por_lugar.csv',
+    'global': 'eventos_global.csv',
+}
+
+
+def nombre_archivo(formato, tipo):
+    """Nombre con el que se descarga el reporte."""
+    if formato == 'csv':
+        return _NOMBRES_CSV.get(tipo, _NOMBRES_CSV['global'])
+    return f'reporte_{tipo}.{formato}'
+
+
+def _por_mes():
+    return (
+        ResumenDiarioEventos.objects
+        .annotate(mes=TruncMonth('fecha'))
+        .values('mes')
+        .annotate(total=Sum('eventos'))
+        .order_by('mes')
+    )
+
+
+def _agrupado(campo):
+    # Organizador y categoría salen de los resúmenes diarios; la ubicación no
+    # es una dimensión del resumen y se agrupa sobre los eventos
+    if campo == 'ubicacion':
+        return Evento.objects.values(campo).annotate(total=Count('id')).order_by('-total')
+    return (
+        ResumenDiarioEventos.objects
+        .values(campo)
+        .annotate(total=Sum('eventos'))
+        .order_by('-total')
+    )
+
+
+def _global():
+    # iterator(): las filas se leen por bloques (cursor de servidor en
+    # PostgreSQL) en lugar de cargar toda la tabla en memoria
+    return Evento.objects.all().values(
+        'id', 'titulo', 'fecha_inicio', 'fecha_fin',
+        'ubicacion', 'aforo', 'organizador__username',
+        'categoria__nombre'
+    ).iterator(chunk_size=TAMANO_CHUNK_EXPORTACION)
+
+
+def filas_csv(tipo):
+    """Retorna (headers, filas) del CSV; las filas son diccionarios."""
+    if tipo == 'mes':
+        return ['mes', 'total'], (
+            {'mes': d['mes'].strftime('%Y-%m') if d['mes'] else '', 'total': d['total']}
+            for d in _por_mes()
+        )
+    if tipo == 'usuarios':
+        return ['username', 'total'], (
+            {'username': r['organizador__username'] or 'Usuario eliminado', 'total': r['total']}
+            for r in _agrupado('organizador__username')
+        )
+    if tipo == 'categorias':
+        return ['categoria', 'total'], (
+            {'categoria': r['categoria__nombre'] or 'Sin categoría', 'total': r['total']}
+            for r in _agrupado('categoria__nombre')
+        )
+    if tipo == 'lugares':
+        return ['ubicacion', 'total'], (
+            {'ubicacion': r['ubicacion'], 'total': r['total']}
+            for r in _agrupado('ubicacion')
+        )
+    # global
+    return ['id', 'titulo', 'organizador', 'categoria',
+            'fecha_inicio', 'fecha_fin', 'ubicacion', 'aforo'], (
+        {
+            'id': r['id'],
+            'titulo': r['titulo'],
+            'organizador': r['organizador__username'],
+            'categoria': r['categoria__nombre'] or 'Sin categoría',
+            'fecha_inicio': r['fecha_inicio'].strftime('%Y-%m-%d %H:%M'),
+            'fecha_fin': r['fecha_fin'].strftime('%Y-%m-%d %H:%M'),
+            'ubicacion': r['ubicacion'],
+            'aforo': r['aforo']
+        }
+        for r in _global()
+    )
+
+
+def filas_xlsx(tipo):
+    """Retorna (headers, filas) del XLSX; las filas son listas."""
+    if tipo == 'mes':
+        return ['Mes', 'Total de Eventos'], (
+            [d['mes'].strftime('%Y-%m') if d['mes'] else '', d['total']]
+            for d in _por_mes()
+        )
+    if tipo == 'usuarios':
+        return ['Usuario', 'Total de Eventos'], (
+            [r['organizador__username'] or 'Usuario eliminado', r['total']]
+            for r in _agrupado('organizador__username')
+        )
+    if tipo == 'categorias':
+        return ['Categoría', 'Total de Eventos'], (
+            [r['categoria__nombre'] or 'Sin categoría', r['total']]
+            for r in _agrupado('categoria__nombre')
+        )
+    if tipo == 'lugares':
+        return ['Ubicación', 'Total de Eventos'], (
+            [r['ubicacion'], r['total']]
+            for r in _agrupado('ubicacion')
+        )
+    # global
+    return ['ID', 'Título', 'Organizador', 'Categoría',
+            'Fecha Inicio', 'Fecha Fin', 'Ubicación', 'Aforo'], (
+        [
+            r['id'],
+            r['titulo'],
+            r['organizador__username'] or 'Usuario eliminado',
+            r['categoria__nombre'] or 'Sin categoría',
+            r['fecha_inicio'].strftime('%Y-%m-%d %H:%M'),
+            r['fecha_fin'].strftime('%Y-%m-%d %H:%M'),
+            r['ubicacion'],
+            r['aforo']
+        ]
+        for r in _global()
+    )
+
+
+def filas_pdf(tipo):
+    """Retorna (titulo, headers, filas) del PDF; las celdas son textos."""
+    if tipo == 'mes':
+        return "Reporte: Eventos por Mes", ['Mes', 'Total de Eventos'], (
+            [d['mes'].strftime('%Y-%m') if d['mes'] else '', str(d['total'])]
+            for d in _por_mes()
+        )
+    if tipo == 'usuarios':
+        return "Reporte: Eventos por Usuario", ['Usuario', 'Total de Eventos'], (
+            [r['organizador__username'] or 'Usuario eliminado', str(r['total'])]
+            for r in _agrupado('organizador__username')
+        )
+    if tipo == 'categorias':
+        return "Reporte: Eventos por Categoría", ['Categoría', 'Total de Eventos'], (
+            [r['categoria__nombre'] or 'Sin categoría', str(r['total'])]
+            for r in _agrupado('categoria__nombre')
+        )
+    if tipo == 'lugares':
+        return "Reporte: Eventos por Ubicación", ['Ubicación', 'Total de Eventos'], (
+            [r['ubicacion'], str(r['total'])]
+            for r in _agrupado('ubicacion')
+        )
+    # global
+    return "Reporte: Listado General de Eventos", \
+        ['ID', 'Título', 'Organizador', 'Categoría', 'Inicio', 'Fin', 'Ubicación', 'Aforo'], (
+            [
+                str(r['id']),
+                r['titulo'][:30] + '...' if len(r['titulo']) > 30 else r['titulo'],
+                (r['organizador__username'] or 'N/A')[:15],
+                (r['categoria__nombre'] or 'N/A')[:15],
+                r['fecha_inicio'].strftime('%d/%m/%Y'),
+                r['fecha_fin'].strftime('%d/%m/%Y'),
+                r['ubicacion'][:20] + '...' if len(r['ubicacion']) > 20 else r['ubicacion'],
+                str(r['aforo'])
+            ]
+            for r in _global()
+        )
+
+
+def escribir_pdf(titulo, headers, filas, destino):
+    """Construye el PDF con reportlab y lo escribe en `destino` (archivo binario)."""
+    doc = SimpleDocTemplate(destino, pagesize=A4)
+    elements = []
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#1a56db'),
+        spaceAfter=30,
+        alignment=1  # centrado
+    )
+
+    elements.append(Paragraph(titulo, title_style))
+    elements.append(Spacer(1, 12))
+
+    # Crear tabla
+    table = Table([headers, *filas])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ]))
+
+    elements.append(table)
+
+    # Pie de página con fecha
+    elements.append(Spacer(1, 30))
+    footer_text = f"Generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+    elements.append(Paragraph(footer_text, styles['Normal']))
+
+    doc.build(elements)
+
+
+def _contar_filas(filas, al_avanzar, cada=TAMANO_CHUNK_EXPORTACION):
+    """Reenvía las filas y llama a al_avanzar(n) cada `cada` filas."""
+    for n, fila in enumerate(filas, start=1):
+        if n % cada == 0:
+            al_avanzar(n)
+        yield fila
+
+
+def renderizar_reporte(formato, tipo, destino, al_avanzar=None):
+    """
+    Escribe el reporte completo en `destino` (archivo binario abierto).
+    `al_avanzar(filas_procesadas)` se llama periódicamente mientras se leen
+    las filas, para informar el progreso.
+    """
+    if formato == 'csv':
+        headers, filas = filas_csv(tipo)
+        if al_avanzar:
+            filas = _contar_filas(filas, al_avanzar)
+        for bloque in generar_lineas_csv(headers, filas):
+            destino.write(bloque.encode('utf-8'))
+    elif formato == 'xlsx':
+        headers, filas = filas_xlsx(tipo)
+        if al_avanzar:
+            filas = _contar_filas(filas, al_avanzar)
+        with generar_xlsx(headers, filas) as archivo:
+            shutil.copyfileobj(archivo, destino)
+    elif formato == 'pdf':
+        titulo, headers, filas = filas_pdf(tipo)
+        if al_avanzar:
+            filas = _contar_filas(filas, al_avanzar)
+        escribir_pdf(titulo, headers, filas, destino)
+    else:
+        raise ValueError(f"Formato de reporte no soportado: {formato}")
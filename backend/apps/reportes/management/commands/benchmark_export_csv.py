@@ -0,0 +1,164 @@
+"""
+Comando de gestión para comparar la exportación CSV en memoria (HttpResponse
+construido con io.StringIO, la implementación anterior) con la exportación en
+streaming de reportes.export_csv.
+
+Para cada tamaño siembra eventos temporales, ejecuta cada estrategia en un
+proceso hijo y reporta el tiempo hasta el primer byte, el tiempo total y el
+pico de memoria residente (RSS). Los datos sembrados se eliminan al final.
+
+Uso:
+    python manage.py benchmark_export_csv --filas 10000 100000 1000000
+"""
+import csv
+import io
+import multiprocessing
+import resource
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.eventos.models import Evento
+from apps.usuarios.models import Usuario
+from apps.reportes.views import export_csv
+
+USERNAME_BENCHMARK = 'benchmark_export_csv'
+TAMANO_LOTE_SIEMBRA = 5000
+HEADERS_GLOBAL = ['id', 'titulo', 'organizador', 'categoria', 'fecha_inicio', 'fecha_fin', 'ubicacion', 'aforo']
+
+
+def _exportar_en_memoria(usuario):
+    """Réplica de la implementación anterior: todas las filas en una lista y un StringIO."""
+    qs = Evento.objects.all().values(
+        'id', 'titulo', 'fecha_inicio', 'fecha_fin',
+        'ubicacion', 'aforo', 'organizador__username', 'categoria__nombre'
+    )
+    rows = [
+        {
+            'id': r['id'],
+            'titulo': r['titulo'],
+            'organizador': r['organizador__username'],
+            'categoria': r['categoria__nombre'] or 'Sin categoría',
+            'fecha_inicio': r['fecha_inicio'].strftime('%Y-%m-%d %H:%M'),
+            'fecha_fin': r['fecha_fin'].strftime('%Y-%m-%d %H:%M'),
+            'ubicacion': r['ubicacion'],
+            'aforo': r['aforo']
+        }
+        for r in qs
+    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADERS_GLOBAL)
+    for row in rows:
+        writer.writerow([row.get(h, '') for h in HEADERS_GLOBAL])
+    response = HttpResponse(buffer.getvalue(), content_type='text/csv; charset=utf-8')
+    yield response.content
+
+
+def _exportar_en_streaming(usuario):
+    """La vista actual, consumiendo su streaming_content bloque a bloque."""
+    request = APIRequestFactory().get('/api/reportes/export/csv/', {'tipo': 'global'})
+    force_authenticate(request, user=usuario)
+    yield from export_csv(request).streaming_content
+
+
+ESTRATEGIAS = {
+    'memoria': _exportar_en_memoria,
+    'streaming': _exportar_en_streaming,
+}
+
+
+def _medir(estrategia, usuario_id, resultados):
+    """Se ejecuta en un proceso hijo para aislar el pico de RSS de cada estrategia."""
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usuario = Usuario.objects.get(pk=usuario_id)
+
+    inicio = time.perf_counter()
+    primer_byte = None
+    total_bytes = 0
+    for bloque in ESTRATEGIAS[estrategia](usuario):
+        if primer_byte is None:
+            primer_byte = time.perf_counter() - inicio
+        total_bytes += len(bloque)
+    total = time.perf_counter() - inicio
+
+    connections.close_all()
+    resultados.put({
+        'ttfb_ms': round(primer_byte * 1000, 1),
+        'total_ms': round(total * 1000, 1),
+        'rss_pico_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'rss_delta_mb': round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_inicial) / 1024, 1),
+        'bytes': total_bytes,
+    })
+
+
+class Command(BaseCommand):
+    help = 'Compara memoria y tiempo al primer byte de la exportación CSV en memoria vs. en streaming'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filas',
+            type=int,
+            nargs='+',
+            default=[10000, 100000, 1000000],
+            help='Tamaños de la tabla de eventos a medir (default: 10000 100000 1000000)',
+        )
+
+    def handle(self, *args, **options):
+        if Evento.objects.exists():
+            self.stderr.write(self.style.WARNING(
+                'La tabla de eventos no está vacía: las mediciones incluirán los eventos existentes.'
+            ))
+
+        usuario, _ = Usuario.objects.get_or_create(
+            username=USERNAME_BENCHMARK,
+            defaults={'email': f'{USERNAME_BENCHMARK}@example.com', 'is_staff': True}
+        )
+        contexto = multiprocessing.get_context('fork')
+        sembrados = 0
+        try:
+            for filas in sorted(options['filas']):
+                sembrados = self._sembrar(usuario, sembrados, filas)
+                self.stdout.write(f'\n{filas} filas')
+                for estrategia in ESTRATEGIAS:
+                    # Ningún proceso hijo debe heredar la conexión abierta del padre
+                    connections.close_all()
+                    resultados = contexto.Queue()
+                    proceso = contexto.Process(target=_medir, args=(estrategia, usuario.id, resultados))
+                    proceso.start()
+                    medicion = resultados.get()
+                    proceso.join()
+                    self.stdout.write(
+                        f"  {estrategia:<10} primer byte={medicion['ttfb_ms']:>9} ms  "
+                        f"total={medicion['total_ms']:>9} ms  "
+                        f"RSS pico={medicion['rss_pico_mb']:>7} MB (+{medicion['rss_delta_mb']} MB)  "
+                        f"{medicion['bytes']} bytes"
+                    )
+        finally:
+            # Elimina el usuario y, en cascada, los eventos sembrados
+            Evento.objects.filter(organizador=usuario).delete()
+            usuario.delete()
+
+        self.stdout.write(self.style.SUCCESS('\nBenchmark completado.'))
+
+    def _sembrar(self, usuario, existentes, objetivo):
+        """Completa la tabla hasta `objetivo` eventos del usuario de benchmark."""
+        ahora = timezone.now()
+        for inicio in range(existentes, objetivo, TAMANO_LOTE_SIEMBRA):
+            Evento.objects.bulk_create([
+                Evento(
+                    titulo=f'Evento de benchmark {i}',
+                    descripcion='Evento generado por benchmark_export_csv',
+                    fecha_inicio=ahora + timedelta(minutes=i),
+                    fecha_fin=ahora + timedelta(minutes=i + 60),
+                    aforo=100,
+                    ubicacion=f'Sala {i % 50}',
+                    organizador=usuario,
+                    codigo_confirmacion=f'B{i:07d}',
+                )
+                for i in range(inicio, min(inicio + TAMANO_LOTE_SIEMBRA, objetivo))
+            ])
+        return objetivo
@@ -0,0 +1,25 @@
+"""
+Comando de gestión para reconstruir desde cero los resúmenes diarios de
+reportes (ResumenDiarioEventos) a partir de eventos, inscripciones y reseñas.
+"""
+from django.core.management.base import BaseCommand
+from apps.reportes.resumenes import reconstruir_todo
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero los resúmenes diarios usados por los reportes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--si-vacio',
+            action='store_true',
+            help='Solo reconstruye si todavía no hay resúmenes (arranque del contenedor)',
+        )
+
+    def handle(self, *args, **options):
+        filas = reconstruir_todo(si_vacio=options['si_vacio'])
+        if filas is None:
+            self.stdout.write('Los resúmenes diarios ya existen; no se reconstruyen.')
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Se reconstruyeron {filas} filas de resúmenes diarios.'))
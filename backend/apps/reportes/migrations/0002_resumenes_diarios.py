@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0004_indices_consultas_frecuentes'),
+        ('reportes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaResumenPendiente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('marcado_en', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Día de resumen pendiente',
+                'verbose_name_plural': 'Días de resumen pendientes',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioEventos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('eventos', models.PositiveIntegerField(default=0)),
+                ('inscripciones', models.PositiveIntegerField(default=0)),
+                ('confirmaciones', models.PositiveIntegerField(default=0)),
+                ('reseñas', models.PositiveIntegerField(default=0)),
+                ('suma_puntuacion', models.PositiveIntegerField(default=0)),
+                ('estrellas_1', models.PositiveIntegerField(default=0)),
+                ('estrellas_2', models.PositiveIntegerField(default=0)),
+                ('estrellas_3', models.PositiveIntegerField(default=0)),
+                ('estrellas_4', models.PositiveIntegerField(default=0)),
+                ('estrellas_5', models.PositiveIntegerField(default=0)),
+                ('categoria', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='eventos.categoriaevento')),
+                ('organizador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen diario de eventos',
+                'verbose_name_plural': 'Resúmenes diarios de eventos',
+                'indexes': [models.Index(fields=['fecha'], name='resumen_diario_fecha_idx')],
+            },
+        ),
+    ]
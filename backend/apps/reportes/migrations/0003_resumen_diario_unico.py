@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+# Dos reconstrucciones simultáneas pudieron insertar el mismo día dos veces.
+# Cada copia tiene las métricas completas, así que se conserva la más antigua.
+def borrar_duplicados(apps, schema_editor):
+    ResumenDiarioEventos = apps.get_model('reportes', 'ResumenDiarioEventos')
+    repetidos = (
+        ResumenDiarioEventos.objects
+        .values('fecha', 'categoria', 'organizador')
+        .annotate(primero=Min('id'), copias=Count('id'))
+        .filter(copias__gt=1)
+        .order_by()
+    )
+    for grupo in repetidos:
+        ResumenDiarioEventos.objects.filter(
+            fecha=grupo['fecha'],
+            categoria=grupo['categoria'],
+            organizador=grupo['organizador'],
+        ).exclude(id=grupo['primero']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0002_resumenes_diarios'),
+    ]
+
+    operations = [
+        migrations.RunPython(borrar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='resumendiarioeventos',
+            constraint=models.UniqueConstraint(
+                fields=('fecha', 'categoria', 'organizador'),
+                name='unique_resumen_diario',
+                nulls_distinct=False,
+            ),
+        ),
+    ]
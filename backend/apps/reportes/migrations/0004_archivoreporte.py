@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0003_resumen_diario_unico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=255, unique=True)),
+                ('contenido', models.BinaryField()),
+                ('tamano', models.PositiveBigIntegerField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo de reporte',
+                'verbose_name_plural': 'Archivos de reporte',
+            },
+        ),
+    ]
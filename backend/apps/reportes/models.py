@@ -1,3 +1,219 @@
+import hashlib
+import io
+import json
+import os
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage
 from django.db import models
 
-# Create your models here.
+Usuario = settings.AUTH_USER_MODEL
+
+
+class AlmacenamientoReportes(FileSystemStorage):
+    """
+    Storage de los archivos generados. Se usa disco local (REPORTES_ROOT) y no
+    el storage por defecto porque en producción éste es Cloudinary, pensado
+    para imágenes públicas; los reportes solo se descargan por la API.
+    La ruta se lee de settings en cada acceso para respetar override_settings.
+    """
+
+    @property
+    def base_location(self):
+        return settings.REPORTES_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+class AlmacenamientoReportesBD(Storage):
+    """
+    Storage de los archivos generados en la base de datos (ArchivoReporte),
+    compartida entre el backend y el worker de Celery aunque se desplieguen
+    como servicios separados. Los reportes son temporales (se borran con su
+    trabajo) y se leen completos en memoria al guardarlos y descargarlos.
+    """
+
+    def _open(self, name, mode='rb'):
+        contenido = ArchivoReporte.objects.filter(nombre=name).values_list('contenido', flat=True).first()
+        if contenido is None:
+            raise FileNotFoundError(name)
+        return File(io.BytesIO(bytes(contenido)), name=name)
+
+    def _save(self, name, content):
+        contenido = b''.join(content.chunks())
+        ArchivoReporte.objects.create(nombre=name, contenido=contenido, tamano=len(contenido))
+        return name
+
+    def exists(self, name):
+        return ArchivoReporte.objects.filter(nombre=name).exists()
+
+    def delete(self, name):
+        ArchivoReporte.objects.filter(nombre=name).delete()
+
+    def size(self, name):
+        tamano = ArchivoReporte.objects.filter(nombre=name).values_list('tamano', flat=True).first()
+        if tamano is None:
+            raise FileNotFoundError(name)
+        return tamano
+
+
+def almacenamiento_reportes():
+    """Storage elegido con REPORTES_ALMACENAMIENTO (se evalúa al cargar los modelos)."""
+    if settings.REPORTES_ALMACENAMIENTO == 'bd':
+        return AlmacenamientoReportesBD()
+    return AlmacenamientoReportes()
+
+
+class ArchivoReporte(models.Model):
+    """Contenido de un archivo de reporte guardado por AlmacenamientoReportesBD."""
+    nombre = models.CharField(max_length=255, unique=True)
+    contenido = models.BinaryField()
+    tamano = models.PositiveBigIntegerField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archivo de reporte"
+        verbose_name_plural = "Archivos de reporte"
+
+    def __str__(self):
+        return self.nombre
+
+
+class TrabajoReporte(models.Model):
+    """
+    Exportación de un reporte ejecutada en segundo plano por Celery.
+    El cliente crea el trabajo, consulta su estado/progreso y descarga el
+    archivo cuando está completado.
+    """
+    FORMATOS = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel'),
+        ('pdf', 'PDF'),
+    ]
+
+    TIPOS = [
+        ('mes', 'Eventos por mes'),
+        ('usuarios', 'Eventos por usuario'),
+        ('categorias', 'Eventos por categoría'),
+        ('lugares', 'Eventos por ubicación'),
+        ('global', 'Listado general'),
+    ]
+
+    PENDIENTE = 'pendiente'
+    PROCESANDO = 'procesando'
+    COMPLETADO = 'completado'
+    ERROR = 'error'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (PROCESANDO, 'Procesando'),
+        (COMPLETADO, 'Completado'),
+        (ERROR, 'Error'),
+    ]
+
+    formato = models.CharField(max_length=10, choices=FORMATOS)
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    # Huella de los parámetros: trabajos con la misma clave producen el mismo archivo
+    clave = models.CharField(max_length=64, db_index=True, editable=False)
+
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    progreso = models.PositiveSmallIntegerField(default=0)  # 0-100
+    archivo = models.FileField(upload_to='trabajos/', storage=almacenamiento_reportes, blank=True)
+    error = models.TextField(blank=True)
+
+    solicitado_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='trabajos_reporte'
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_finalizacion = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-fecha_creacion']
+        verbose_name = "Trabajo de reporte"
+        verbose_name_plural = "Trabajos de reporte"
+
+    def __str__(self):
+        return f"{self.tipo}.{self.formato} ({self.estado})"
+
+    @staticmethod
+    def calcular_clave(formato, tipo):
+        """Huella estable de los parámetros del reporte."""
+        parametros = json.dumps({'formato': formato, 'tipo': tipo}, sort_keys=True)
+        return hashlib.sha256(parametros.encode('utf-8')).hexdigest()
+
+    def save(self, *args, **kwargs):
+        if not self.clave:
+            self.clave = self.calcular_clave(self.formato, self.tipo)
+        super().save(*args, **kwargs)
+
+
+class ResumenDiarioEventos(models.Model):
+    """
+    Agregado diario (rollup) de la actividad de eventos por día × categoría ×
+    organizador. El día es la fecha local de inicio del evento; las
+    inscripciones, confirmaciones y reseñas se atribuyen al día de su evento.
+    Lo mantiene apps.reportes.resumenes y lo leen los reportes agregados.
+    """
+    fecha = models.DateField()
+    categoria = models.ForeignKey(
+        'eventos.CategoriaEvento',
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+    organizador = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+
+    eventos = models.PositiveIntegerField(default=0)
+    inscripciones = models.PositiveIntegerField(default=0)
+    confirmaciones = models.PositiveIntegerField(default=0)
+    # Reseñas con puntuación: cantidad, suma y distribución por estrellas
+    reseñas = models.PositiveIntegerField(default=0)
+    suma_puntuacion = models.PositiveIntegerField(default=0)
+    estrellas_1 = models.PositiveIntegerField(default=0)
+    estrellas_2 = models.PositiveIntegerField(default=0)
+    estrellas_3 = models.PositiveIntegerField(default=0)
+    estrellas_4 = models.PositiveIntegerField(default=0)
+    estrellas_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha'], name='resumen_diario_fecha_idx'),
+        ]
+        constraints = [
+            # Una fila por día × categoría × organizador, también sin categoría
+            models.UniqueConstraint(
+                fields=['fecha', 'categoria', 'organizador'],
+                nulls_distinct=False,
+                name='unique_resumen_diario',
+            ),
+        ]
+        verbose_name = "Resumen diario de eventos"
+        verbose_name_plural = "Resúmenes diarios de eventos"
+
+    def __str__(self):
+        return f"{self.fecha} - {self.eventos} eventos"
+
+
+class DiaResumenPendiente(models.Model):
+    """
+    Día cuyo resumen quedó desactualizado. Las señales lo marcan (o renuevan
+    marcado_en) cuando cambia un evento, inscripción o reseña de ese día.
+    """
+    fecha = models.DateField(unique=True)
+    marcado_en = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Día de resumen pendiente"
+        verbose_name_plural = "Días de resumen pendientes"
+
+    def __str__(self):
+        return f"{self.fecha} (marcado {self.marcado_en})"
@@ -0,0 +1,188 @@
+"""
+Mantenimiento de los resúmenes diarios (ResumenDiarioEventos).
+
+- Las señales de apps.reportes.signals marcan como pendiente el día de cada
+  evento, inscripción o reseña que cambia (DiaResumenPendiente).
+- La tarea actualizar_resumenes_diarios toma como marca de agua el instante
+  en que empieza, recalcula solo los días marcados hasta ese instante y borra
+  esas marcas; los días marcados mientras tanto quedan para la siguiente pasada.
+- El comando reconstruir_resumenes recalcula todos los días desde cero.
+- Las escrituras (borrar y volver a insertar los días) se serializan con un
+  bloqueo consultivo de PostgreSQL: sin él, dos pasadas simultáneas (la tarea
+  periódica solapada consigo misma, o el arranque de varios contenedores) no
+  ven las filas sin confirmar de la otra y ambas insertan el mismo día.
+  La restricción única de ResumenDiarioEventos impide el duplicado si aun así
+  ocurre.
+"""
+from datetime import datetime, time, timedelta
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.eventos.models import Evento, Inscripcion, Reseña
+from .models import DiaResumenPendiente, ResumenDiarioEventos
+
+# Días recalculados por consulta
+TAMANO_LOTE_DIAS = 100
+TAMANO_LOTE_RESUMENES = 1000
+
+# Clave del bloqueo consultivo que serializa la escritura de resúmenes
+BLOQUEO_RESUMENES = 0x52455355  # 'RESU'
+
+CAMPOS_METRICAS = [
+    'eventos', 'inscripciones', 'confirmaciones', 'reseñas', 'suma_puntuacion',
+    'estrellas_1', 'estrellas_2', 'estrellas_3', 'estrellas_4', 'estrellas_5',
+]
+
+
+def dia_de(fecha_hora):
+    """Día local (TIME_ZONE) al que se atribuye un datetime."""
+    return timezone.localdate(fecha_hora)
+
+
+def marcar_dias(*fechas_hora):
+    """
+    Marca como pendientes los días de los datetimes indicados. La escritura
+    se hace al confirmar la transacción, para que la tarea no recalcule el día
+    antes de que los datos nuevos sean visibles.
+    """
+    dias = {dia_de(f) for f in fechas_hora if f is not None}
+    if not dias:
+        return
+
+    def _marcar():
+        ahora = timezone.now()
+        DiaResumenPendiente.objects.bulk_create(
+            [DiaResumenPendiente(fecha=dia, marcado_en=ahora) for dia in dias],
+            update_conflicts=True,
+            unique_fields=['fecha'],
+            update_fields=['marcado_en'],
+        )
+
+    transaction.on_commit(_marcar)
+
+
+def _bloquear_resumenes():
+    """
+    Espera el bloqueo de escritura de resúmenes; se libera al terminar la
+    transacción en curso. SQLite ya serializa las escrituras.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [BLOQUEO_RESUMENES])
+
+
+def _filtro_dias(campo, dias):
+    """
+    Q con un rango [00:00, 24:00) local por día, para que el filtro use el
+    índice sobre el datetime en lugar de convertir cada fila a fecha.
+    """
+    filtro = Q()
+    for dia in dias:
+        desde = timezone.make_aware(datetime.combine(dia, time.min))
+        filtro |= Q(**{f'{campo}__gte': desde, f'{campo}__lt': desde + timedelta(days=1)})
+    return filtro
+
+
+def _agrupar(queryset, campo_fecha, prefijo, **metricas):
+    """Agrupa por día × categoría × organizador del evento."""
+    return (
+        queryset
+        .values(
+            dia=TruncDate(campo_fecha),
+            id_categoria=F(f'{prefijo}categoria_id'),
+            id_organizador=F(f'{prefijo}organizador_id'),
+        )
+        .annotate(**metricas)
+        .order_by()
+    )
+
+
+def _calcular(dias=None):
+    """
+    Calcula las filas de resumen de los días indicados (o de todos) con tres
+    consultas agregadas: eventos, inscripciones y reseñas.
+    """
+    eventos = Evento.objects.all()
+    inscripciones = Inscripcion.objects.all()
+    reseñas = Reseña.objects.filter(puntuacion__isnull=False)
+    if dias is not None:
+        eventos = eventos.filter(_filtro_dias('fecha_inicio', dias))
+        inscripciones = inscripciones.filter(_filtro_dias('evento__fecha_inicio', dias))
+        reseñas = reseñas.filter(_filtro_dias('evento__fecha_inicio', dias))
+
+    consultas = [
+        _agrupar(eventos, 'fecha_inicio', '', eventos=Count('id')),
+        _agrupar(
+            inscripciones, 'evento__fecha_inicio', 'evento__',
+            inscripciones=Count('id'),
+            confirmaciones=Count('id', filter=Q(asistencia_confirmada=True)),
+        ),
+        _agrupar(
+            reseñas, 'evento__fecha_inicio', 'evento__',
+            reseñas=Count('id'),
+            suma_puntuacion=Sum('puntuacion'),
+            **{f'estrellas_{n}': Count('id', filter=Q(puntuacion=n)) for n in range(1, 6)}
+        ),
+    ]
+
+    filas = {}
+    for consulta in consultas:
+        for r in consulta:
+            clave = (r.pop('dia'), r.pop('id_categoria'), r.pop('id_organizador'))
+            filas.setdefault(clave, {}).update(r)
+
+    return [
+        ResumenDiarioEventos(fecha=fecha, categoria_id=categoria_id, organizador_id=organizador_id, **metricas)
+        for (fecha, categoria_id, organizador_id), metricas in filas.items()
+    ]
+
+
+def recalcular_dias(dias):
+    """Reemplaza los resúmenes de los días indicados. Retorna las filas escritas."""
+    dias = sorted(set(dias))
+    escritas = 0
+    for i in range(0, len(dias), TAMANO_LOTE_DIAS):
+        lote = dias[i:i + TAMANO_LOTE_DIAS]
+        with transaction.atomic():
+            _bloquear_resumenes()
+            ResumenDiarioEventos.objects.filter(fecha__in=lote).delete()
+            filas = ResumenDiarioEventos.objects.bulk_create(
+                _calcular(lote), batch_size=TAMANO_LOTE_RESUMENES
+            )
+        escritas += len(filas)
+    return escritas
+
+
+def actualizar_pendientes():
+    """
+    Recalcula los días marcados hasta ahora (marca de agua) y retorna
+    (días, filas escritas).
+    """
+    marca_agua = timezone.now()
+    pendientes = DiaResumenPendiente.objects.filter(marcado_en__lte=marca_agua)
+    dias = list(pendientes.values_list('fecha', flat=True))
+    if not dias:
+        return 0, 0
+
+    escritas = recalcular_dias(dias)
+    # Las marcas renovadas después de la marca de agua se conservan
+    pendientes.filter(fecha__in=dias).delete()
+    return len(dias), escritas
+
+
+def reconstruir_todo(si_vacio=False):
+    """
+    Borra y recalcula todos los resúmenes. Retorna las filas escritas, o None
+    si `si_vacio` y ya había resúmenes (comprobado con el bloqueo tomado, para
+    que varios contenedores que arrancan a la vez reconstruyan una sola vez).
+    """
+    marca_agua = timezone.now()
+    with transaction.atomic():
+        _bloquear_resumenes()
+        if si_vacio and ResumenDiarioEventos.objects.exists():
+            return None
+        ResumenDiarioEventos.objects.all().delete()
+        filas = ResumenDiarioEventos.objects.bulk_create(_calcular(), batch_size=TAMANO_LOTE_RESUMENES)
+        DiaResumenPendiente.objects.filter(marcado_en__lte=marca_agua).delete()
+    return len(filas)
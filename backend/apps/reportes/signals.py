@@ -0,0 +1,44 @@
+"""
+Señales de la app reportes.
+Marcan como pendientes los días cuyo resumen diario (ResumenDiarioEventos)
+cambia al crear, editar o eliminar eventos, inscripciones y reseñas.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.eventos.models import Evento, Inscripcion, Reseña
+from .resumenes import marcar_dias
+
+
+@receiver(pre_save, sender=Evento)
+def recordar_fecha_anterior(sender, instance, **kwargs):
+    """Guarda la fecha de inicio previa: si cambia, el día anterior también se recalcula."""
+    if instance.pk:
+        instance._fecha_inicio_anterior = (
+            Evento.objects.filter(pk=instance.pk).values_list('fecha_inicio', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Evento)
+def marcar_dia_evento(sender, instance, **kwargs):
+    marcar_dias(instance.fecha_inicio, getattr(instance, '_fecha_inicio_anterior', None))
+
+
+@receiver(post_delete, sender=Evento)
+def marcar_dia_evento_eliminado(sender, instance, **kwargs):
+    marcar_dias(instance.fecha_inicio)
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+@receiver(post_save, sender=Reseña)
+@receiver(post_delete, sender=Reseña)
+def marcar_dia_del_evento(sender, instance, **kwargs):
+    """Inscripciones y reseñas cuentan en el día de su evento."""
+    if sender._meta.get_field('evento').is_cached(instance):
+        fecha_inicio = instance.evento.fecha_inicio
+    else:
+        # Si el evento ya se eliminó (borrado en cascada) su propia señal marca el día
+        fecha_inicio = (
+            Evento.objects.filter(pk=instance.evento_id).values_list('fecha_inicio', flat=True).first()
+        )
+    marcar_dias(fecha_inicio)
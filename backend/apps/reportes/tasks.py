@@ -0,0 +1,82 @@
+import logging
+import tempfile
+import traceback
+from celery import shared_task
+from django.core.files import File
+from django.utils import timezone
+from apps.eventos.models import Evento
+from .exportacion import TAMANO_SPOOL_MEMORIA
+from .generadores import nombre_archivo, renderizar_reporte
+from .models import TrabajoReporte
+from .resumenes import actualizar_pendientes
+from .trabajos import eliminar_trabajos_antiguos, marcar_error
+
+logger = logging.getLogger(__name__)
+
+# El progreso se reserva hasta este valor mientras se leen filas; el resto
+# corresponde a guardar el archivo
+PROGRESO_MAXIMO_FILAS = 95
+
+
+@shared_task
+def generar_reporte(trabajo_id):
+    """
+    Genera el archivo de un TrabajoReporte pendiente y lo guarda en el storage
+    de reportes, actualizando estado y progreso en el camino.
+    """
+    trabajo = TrabajoReporte.objects.filter(id=trabajo_id).first()
+    if trabajo is None or trabajo.estado != TrabajoReporte.PENDIENTE:
+        return f"Trabajo {trabajo_id} inexistente o ya procesado"
+
+    trabajo.estado = TrabajoReporte.PROCESANDO
+    trabajo.save(update_fields=['estado'])
+    logger.info(f"📄 [REPORTES] Generando {trabajo.tipo}.{trabajo.formato} (trabajo {trabajo.id})")
+
+    # Solo el listado global tiene tamaño relevante; los agregados son pocas filas
+    total = Evento.objects.count() if trabajo.tipo == 'global' else 0
+
+    def al_avanzar(filas):
+        if total:
+            progreso = min(PROGRESO_MAXIMO_FILAS, filas * 100 // total)
+            TrabajoReporte.objects.filter(id=trabajo.id).update(progreso=progreso)
+
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=TAMANO_SPOOL_MEMORIA) as destino:
+            renderizar_reporte(trabajo.formato, trabajo.tipo, destino, al_avanzar)
+            destino.seek(0)
+            nombre = f"{trabajo.id}_{nombre_archivo(trabajo.formato, trabajo.tipo)}"
+            trabajo.archivo.save(nombre, File(destino), save=False)
+    except Exception as e:
+        logger.error(f"❌ [REPORTES] Error generando el trabajo {trabajo.id}: {e}")
+        logger.error(traceback.format_exc())
+        marcar_error(trabajo, str(e))
+        return f"Trabajo {trabajo.id} con error"
+
+    trabajo.estado = TrabajoReporte.COMPLETADO
+    trabajo.progreso = 100
+    trabajo.fecha_finalizacion = timezone.now()
+    trabajo.save(update_fields=['archivo', 'estado', 'progreso', 'fecha_finalizacion'])
+    logger.info(f"✅ [REPORTES] Trabajo {trabajo.id} completado: {trabajo.archivo.name}")
+    return f"Trabajo {trabajo.id} completado"
+
+
+@shared_task
+def limpiar_trabajos_reporte():
+    """
+    Elimina los trabajos de reporte antiguos y sus archivos.
+    Se ejecuta periódicamente mediante celery beat.
+    """
+    count = eliminar_trabajos_antiguos()
+    return f"Se eliminaron {count} trabajos de reporte antiguos"
+
+
+@shared_task
+def actualizar_resumenes_diarios():
+    """
+    Recalcula los resúmenes diarios de los días marcados como pendientes
+    desde la última pasada. Se ejecuta periódicamente mediante celery beat.
+    """
+    dias, filas = actualizar_pendientes()
+    if dias:
+        logger.info(f"📊 [RESUMENES] {dias} días recalculados ({filas} filas)")
+    return f"Se recalcularon {dias} días de resúmenes ({filas} filas)"
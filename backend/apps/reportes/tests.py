@@ -1,3 +1,492 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
+import threading
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from openpyxl import load_workbook
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.eventos.models import CategoriaEvento, Evento, Inscripcion, Reseña
+from .agregados import SECCIONES, obtener_dashboard
+from apps.usuarios.models import Rol, Usuario
+from .exportacion import generar_lineas_csv, generar_xlsx, respuesta_streaming
+from .models import (
+    AlmacenamientoReportesBD, ArchivoReporte, DiaResumenPendiente, ResumenDiarioEventos, TrabajoReporte,
+)
+from .resumenes import actualizar_pendientes, recalcular_dias, reconstruir_todo
+from .tasks import generar_reporte
+from .trabajos import RETENCION_TRABAJOS_REPORTE, eliminar_trabajos_antiguos
+
+
+def crear_usuario(username, **extra):
+    """Crea un usuario de prueba con el rol por defecto (pk=1)."""
+    Rol.objects.get_or_create(pk=1, defaults={'nombre': 'estudiante'})
+    return Usuario.objects.create(username=username, email=f'{username}@example.com', **extra)
+
+
+class ExportacionTestMixin:
+    """Datos sembrados comunes a los tests de exportación."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = crear_usuario('admin', is_staff=True)
+        categoria = CategoriaEvento.objects.create(nombre='Tecnología')
+        inicio = timezone.now() + timedelta(days=1)
+        Evento.objects.bulk_create([
+            Evento(
+                titulo=f'Evento, "{i}"',
+                descripcion='Descripción',
+                fecha_inicio=inicio + timedelta(days=31 * (i % 2)),
+                fecha_fin=inicio + timedelta(days=31 * (i % 2), hours=2),
+                aforo=10,
+                ubicacion='Auditorio' if i % 3 else 'Sala 1',
+                organizador=cls.admin,
+                categoria=categoria if i % 2 else None,
+                codigo_confirmacion=f'X{i:05d}',
+            )
+            for i in range(25)
+        ])
+        # bulk_create no dispara señales: los resúmenes se construyen a mano
+        reconstruir_todo()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class DashboardTests(ExportacionTestMixin, TestCase):
+    """Panel de reportes calculado con consultas agregadas y caché por rango."""
+    url = '/api/reportes/dashboard/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        evento = Evento.objects.order_by('id').first()
+        Evento.objects.filter(id=evento.id).update(inscritos_count=10)
+        usuarios = [crear_usuario(f'resenador{i}') for i in range(4)]
+        Reseña.objects.bulk_create([
+            Reseña(evento=evento, usuario=u, puntuacion=p)
+            for u, p in zip(usuarios, [5, 4, 4, None])
+        ])
+        reconstruir_todo()
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_todas_las_secciones_en_pocas_consultas(self):
+        # mes, usuario, categoría, lugar, estado y 3 de rating (resumen, por categoría, top)
+        with self.assertNumQueries(8):
+            datos = obtener_dashboard()
+        self.assertEqual(set(datos), set(SECCIONES))
+
+        self.assertEqual(datos['eventos_por_estado'], {'futuros': 25, 'en_curso': 0, 'finalizados': 0, 'llenos': 1})
+        rating = datos['rating_promedio']
+        self.assertEqual(rating['total_reseñas'], 3)
+        self.assertEqual(rating['promedio_global'], 4.33)
+        self.assertEqual([d['cantidad'] for d in rating['distribucion']], [0, 0, 0, 2, 1])
+        self.assertEqual(rating['mejor_valorados'][0]['num_reseñas'], 3)
+
+        # Segunda lectura completa desde caché
+        with self.assertNumQueries(0):
+            self.assertEqual(obtener_dashboard(), datos)
+
+    def test_endpoints_comparten_la_cache_del_dashboard(self):
+        datos = self.client.get(self.url).data
+
+        with self.assertNumQueries(0):
+            lugares = self.client.get('/api/reportes/eventos-por-lugar/')
+            estado = self.client.get('/api/reportes/eventos-por-estado/')
+        self.assertEqual(lugares.data, datos['eventos_por_lugar'])
+        self.assertEqual(estado.data, datos['eventos_por_estado'])
+
+    def test_rango_de_fechas(self):
+        manana = (timezone.localdate() + timedelta(days=1)).isoformat()
+        datos = self.client.get(self.url, {'inicio': manana, 'fin': manana}).data
+
+        # Con un rango solo cuentan los eventos que inician en él (los pares)
+        self.assertEqual(sum(d['total'] for d in datos['eventos_por_mes']), 13)
+        self.assertEqual(datos['eventos_por_estado']['futuros'], 13)
+
+        self.assertEqual(self.client.get(self.url, {'inicio': '2025-13-01'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/reportes/eventos-por-mes/', {'fin': 'ayer'}).status_code, 400)
+
+    def test_solo_administradores(self):
+        self.client.force_authenticate(user=crear_usuario('normal'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class ResumenesDiariosTests(TestCase):
+    """Resúmenes diarios: marcas por señales, recálculo incremental y reconstrucción."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = crear_usuario('organizador')
+        cls.asistente = crear_usuario('asistente')
+        cls.categoria = CategoriaEvento.objects.create(nombre='Música')
+        cls.dia1 = timezone.now() + timedelta(days=3)
+        cls.dia2 = cls.dia1 + timedelta(days=1)
+
+    def _crear_evento(self, fecha_inicio, titulo='Concierto'):
+        return Evento.objects.create(
+            titulo=titulo,
+            descripcion='Descripción',
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_inicio + timedelta(hours=2),
+            aforo=10,
+            ubicacion='Teatro',
+            organizador=self.organizador,
+            categoria=self.categoria,
+        )
+
+    def _resumen(self, fecha_hora):
+        return ResumenDiarioEventos.objects.filter(fecha=timezone.localdate(fecha_hora)).first()
+
+    def test_incremental_recalcula_solo_dias_marcados(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            evento = self._crear_evento(self.dia1)
+            inscripcion = Inscripcion.inscribir(self.asistente, evento)
+            inscripcion.asistencia_confirmada = True
+            inscripcion.save()
+            Reseña.objects.create(evento=evento, usuario=self.asistente, puntuacion=4)
+        self.assertEqual(DiaResumenPendiente.objects.count(), 1)
+
+        self.assertEqual(actualizar_pendientes(), (1, 1))
+        resumen = self._resumen(self.dia1)
+        self.assertEqual(
+            (resumen.eventos, resumen.inscripciones, resumen.confirmaciones,
+             resumen.reseñas, resumen.suma_puntuacion, resumen.estrellas_4),
+            (1, 1, 1, 1, 4, 1)
+        )
+        self.assertFalse(DiaResumenPendiente.objects.exists())
+
+        # Sin marcas no se recalcula nada, aunque los datos cambien sin señales
+        Evento.objects.bulk_create([Evento(
+            titulo='Sin señal', descripcion='', fecha_inicio=self.dia1,
+            fecha_fin=self.dia1 + timedelta(hours=1), aforo=5, ubicacion='Teatro',
+            organizador=self.organizador, categoria=self.categoria, codigo_confirmacion='SINSEN',
+        )])
+        self.assertEqual(actualizar_pendientes(), (0, 0))
+        self.assertEqual(self._resumen(self.dia1).eventos, 1)
+
+    def test_mover_evento_actualiza_ambos_dias(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            evento = self._crear_evento(self.dia1)
+        actualizar_pendientes()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            evento.fecha_inicio = self.dia2
+            evento.fecha_fin = self.dia2 + timedelta(hours=2)
+            evento.save()
+        self.assertEqual(actualizar_pendientes()[0], 2)
+
+        self.assertIsNone(self._resumen(self.dia1))
+        self.assertEqual(self._resumen(self.dia2).eventos, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            evento.delete()
+        actualizar_pendientes()
+        self.assertFalse(ResumenDiarioEventos.objects.exists())
+
+    def test_reconstruir_coincide_con_incremental(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i, fecha in enumerate([self.dia1, self.dia1, self.dia2]):
+                Inscripcion.inscribir(self.asistente if i else self.organizador, self._crear_evento(fecha, f'E{i}'))
+        actualizar_pendientes()
+        incremental = sorted(ResumenDiarioEventos.objects.values_list('fecha', 'eventos', 'inscripciones'))
+
+        call_command('reconstruir_resumenes', stdout=io.StringIO())
+        self.assertEqual(
+            sorted(ResumenDiarioEventos.objects.values_list('fecha', 'eventos', 'inscripciones')),
+            incremental
+        )
+        self.assertEqual(incremental[0][1:], (2, 2))
+
+        salida = io.StringIO()
+        call_command('reconstruir_resumenes', '--si-vacio', stdout=salida)
+        self.assertIn('ya existen', salida.getvalue())
+
+    def test_segunda_pasada_no_duplica(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._crear_evento(self.dia1)
+            self._crear_evento(self.dia2)
+            sin_categoria = self._crear_evento(self.dia2, 'Sin categoría')
+        Evento.objects.filter(pk=sin_categoria.pk).update(categoria=None)
+        dias = [timezone.localdate(self.dia1), timezone.localdate(self.dia2)]
+
+        reconstruir_todo()
+        filas = ResumenDiarioEventos.objects.count()
+        self.assertEqual(filas, 3)
+
+        reconstruir_todo()
+        recalcular_dias(dias)
+        recalcular_dias(dias)
+        self.assertEqual(ResumenDiarioEventos.objects.count(), filas)
+        self.assertIsNone(reconstruir_todo(si_vacio=True))
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Requiere bloqueos consultivos de PostgreSQL')
+class ResumenesConcurrentesTests(TransactionTestCase):
+    """Pasadas simultáneas de los resúmenes no deben duplicar filas."""
+
+    def test_reconstrucciones_concurrentes(self):
+        organizador = crear_usuario('organizador')
+        inicio = timezone.now() + timedelta(days=3)
+        for i in range(3):
+            Evento.objects.create(
+                titulo=f'E{i}', descripcion='', fecha_inicio=inicio + timedelta(days=i),
+                fecha_fin=inicio + timedelta(days=i, hours=1), aforo=5, ubicacion='Teatro',
+                organizador=organizador,
+            )
+        dias = [timezone.localdate(inicio + timedelta(days=i)) for i in range(3)]
+        pasadas = [reconstruir_todo, lambda: recalcular_dias(dias)] * 3
+        barrera = threading.Barrier(len(pasadas))
+        errores = []
+
+        def ejecutar(pasada):
+            try:
+                barrera.wait()
+                pasada()
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=ejecutar, args=(p,)) for p in pasadas]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        self.assertEqual(ResumenDiarioEventos.objects.count(), 3)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ExportCSVTests(ExportacionTestMixin, TestCase):
+    """Exportación CSV en streaming."""
+    url = '/api/reportes/export/csv/'
+
+    def _filas(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        contenido = b''.join(response.streaming_content).decode('utf-8')
+        return list(csv.reader(io.StringIO(contenido)))
+
+    def test_global_en_streaming(self):
+        response = self.client.get(self.url, {'tipo': 'global'})
+
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="eventos_global.csv"')
+        filas = self._filas(response)
+        self.assertEqual(filas[0], ['id', 'titulo', 'organizador', 'categoria', 'fecha_inicio', 'fecha_fin', 'ubicacion', 'aforo'])
+        self.assertEqual(len(filas), 26)
+        # csv.writer escapa comas y comillas de los títulos
+        self.assertIn('Evento, "0"', {fila[1] for fila in filas[1:]})
+        self.assertIn('Sin categoría', {fila[3] for fila in filas[1:]})
+
+    def test_reportes_agregados(self):
+        self.assertEqual(len(self._filas(self.client.get(self.url, {'tipo': 'mes'}))), 3)
+        self.assertEqual(
+            self._filas(self.client.get(self.url, {'tipo': 'lugares'})),
+            [['ubicacion', 'total'], ['Auditorio', '16'], ['Sala 1', '9']]
+        )
+
+    def test_solo_administradores(self):
+        self.client.force_authenticate(user=crear_usuario('normal'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_bloques_de_lineas(self):
+        filas = ({'a': i, 'b': 'x'} for i in range(5))
+        bloques = list(generar_lineas_csv(['a', 'b'], filas, tamano_bloque=2))
+        self.assertEqual(bloques, ['a,b\r\n', '0,x\r\n1,x\r\n', '2,x\r\n3,x\r\n', '4,x\r\n'])
+
+    def test_asgi_recibe_iterador_asincrono(self):
+        request = ASGIRequest({'type': 'http', 'method': 'GET', 'path': '/', 'headers': []}, io.BytesIO())
+        response = respuesta_streaming(request, iter(['a\r\n', 'b\r\n']), 'text/csv', 'x.csv')
+
+        self.assertTrue(response.is_async)
+
+        async def consumir():
+            return [bloque async for bloque in response]
+        self.assertEqual(async_to_sync(consumir)(), [b'a\r\n', b'b\r\n'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ExportXLSXTests(ExportacionTestMixin, TestCase):
+    """Exportación XLSX con Workbook en modo write-only."""
+    url = '/api/reportes/export/xlsx/'
+
+    def _hoja(self, response):
+        self.assertEqual(response.status_code, 200)
+        contenido = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(contenido))
+        return load_workbook(io.BytesIO(contenido))['Reporte']
+
+    def test_global(self):
+        hoja = self._hoja(self.client.get(self.url, {'tipo': 'global'}))
+
+        filas = list(hoja.iter_rows(values_only=True))
+        self.assertEqual(filas[0][:2], ('ID', 'Título'))
+        self.assertEqual(len(filas), 26)
+        # Los números se conservan como números
+        self.assertIsInstance(filas[1][0], int)
+        self.assertIsInstance(filas[1][7], int)
+        self.assertTrue(hoja['A1'].font.b)
+        self.assertEqual(hoja['A1'].fill.start_color.rgb, '004472C4')
+
+    def test_agregado(self):
+        hoja = self._hoja(self.client.get(self.url, {'tipo': 'lugares'}))
+        self.assertEqual(
+            list(hoja.iter_rows(values_only=True)),
+            [('Ubicación', 'Total de Eventos'), ('Auditorio', 16), ('Sala 1', 9)]
+        )
+
+    def test_anchos_por_longitud_maxima(self):
+        filas = iter([['corto', 1], ['x' * 80, 22]])
+        with generar_xlsx(['Nombre', 'N'], filas) as archivo:
+            hoja = load_workbook(archivo)['Reporte']
+
+        self.assertEqual(hoja.column_dimensions['A'].width, 50)
+        self.assertEqual(hoja.column_dimensions['B'].width, 4)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TrabajosReporteTests(ExportacionTestMixin, TestCase):
+    """Exportación en segundo plano: creación, estado, descarga y reutilización."""
+    url = '/api/reportes/trabajos/'
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = self.settings(REPORTES_ROOT=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        cache.clear()
+        # El worker no corre en los tests: la tarea se ejecuta a mano
+        parche = mock.patch('apps.reportes.tasks.generar_reporte.delay')
+        self.delay = parche.start()
+        self.addCleanup(parche.stop)
+
+    def _crear(self, **datos):
+        return self.client.post(self.url, datos, format='json')
+
+    def test_ciclo_completo_csv(self):
+        response = self._crear(formato='csv', tipo='global')
+        self.assertEqual(response.status_code, 202)
+        trabajo_id = response.data['id']
+        self.assertEqual(response.data['estado'], 'pendiente')
+        self.delay.assert_called_once_with(trabajo_id)
+
+        descarga = f'{self.url}{trabajo_id}/descargar/'
+        self.assertEqual(self.client.get(descarga).status_code, 409)
+
+        generar_reporte(trabajo_id)
+
+        estado = self.client.get(f'{self.url}{trabajo_id}/')
+        self.assertEqual(estado.data['estado'], 'completado')
+        self.assertEqual(estado.data['progreso'], 100)
+        self.assertTrue(estado.data['url_descarga'].endswith(descarga))
+
+        response = self.client.get(descarga)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="eventos_global.csv"')
+        contenido = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(contenido))
+        self.assertEqual(len(list(csv.reader(io.StringIO(contenido.decode('utf-8'))))), 26)
+
+    def test_xlsx_y_pdf(self):
+        for formato in ('xlsx', 'pdf'):
+            trabajo_id = self._crear(formato=formato, tipo='lugares').data['id']
+            generar_reporte(trabajo_id)
+            contenido = b''.join(self.client.get(f'{self.url}{trabajo_id}/descargar/').streaming_content)
+            if formato == 'xlsx':
+                self.assertEqual(
+                    list(load_workbook(io.BytesIO(contenido))['Reporte'].iter_rows(values_only=True)),
+                    [('Ubicación', 'Total de Eventos'), ('Auditorio', 16), ('Sala 1', 9)]
+                )
+            else:
+                self.assertTrue(contenido.startswith(b'%PDF'))
+
+    def test_parametros_repetidos_reutilizan_el_trabajo(self):
+        primero = self._crear(formato='csv', tipo='mes')
+        segundo = self._crear(formato='csv', tipo='mes')
+
+        self.assertEqual(segundo.status_code, 200)
+        self.assertTrue(segundo.data['reutilizado'])
+        self.assertEqual(segundo.data['id'], primero.data['id'])
+        self.assertEqual(self.delay.call_count, 1)
+
+        # Otros parámetros o forzar generan un trabajo nuevo
+        self.assertEqual(self._crear(formato='xlsx', tipo='mes').status_code, 202)
+        forzado = self._crear(formato='csv', tipo='mes', forzar=True)
+        self.assertEqual(forzado.status_code, 202)
+        self.assertNotEqual(forzado.data['id'], primero.data['id'])
+
+    def test_trabajo_con_error_no_se_reutiliza(self):
+        trabajo_id = self._crear(formato='csv', tipo='global').data['id']
+        with mock.patch('apps.reportes.tasks.renderizar_reporte', side_effect=RuntimeError('falló')):
+            generar_reporte(trabajo_id)
+
+        estado = self.client.get(f'{self.url}{trabajo_id}/')
+        self.assertEqual(estado.data['estado'], 'error')
+        self.assertEqual(estado.data['error'], 'falló')
+        self.assertEqual(self._crear(formato='csv', tipo='global').status_code, 202)
+
+    def test_validacion_y_permisos(self):
+        self.assertEqual(self._crear(formato='doc', tipo='global').status_code, 400)
+        self.assertEqual(self._crear(formato='csv', tipo='otro').status_code, 400)
+
+        self.client.force_authenticate(user=crear_usuario('normal'))
+        self.assertEqual(self._crear(formato='csv', tipo='global').status_code, 403)
+
+    def test_limpieza_elimina_archivos_antiguos(self):
+        trabajo_id = self._crear(formato='csv', tipo='mes').data['id']
+        generar_reporte(trabajo_id)
+        ruta = TrabajoReporte.objects.get(id=trabajo_id).archivo.path
+        self.assertTrue(os.path.exists(ruta))
+
+        self.assertEqual(eliminar_trabajos_antiguos(), 0)
+        self.assertEqual(eliminar_trabajos_antiguos(timezone.now() + RETENCION_TRABAJOS_REPORTE * 2), 1)
+        self.assertFalse(os.path.exists(ruta))
+        self.assertFalse(TrabajoReporte.objects.exists())
+
+    def test_archivo_no_disponible_responde_410(self):
+        trabajo_id = self._crear(formato='csv', tipo='mes').data['id']
+        generar_reporte(trabajo_id)
+        # El worker escribió en un disco que el backend no ve
+        os.remove(TrabajoReporte.objects.get(id=trabajo_id).archivo.path)
+
+        response = self.client.get(f'{self.url}{trabajo_id}/descargar/')
+
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(TrabajoReporte.objects.get(id=trabajo_id).estado, TrabajoReporte.ERROR)
+        # El siguiente pedido genera el archivo de nuevo
+        self.assertEqual(self._crear(formato='csv', tipo='mes').status_code, 202)
+
+    def test_almacenamiento_en_base_de_datos(self):
+        campo = TrabajoReporte._meta.get_field('archivo')
+        with mock.patch.object(campo, 'storage', AlmacenamientoReportesBD()):
+            trabajo_id = self._crear(formato='csv', tipo='global').data['id']
+            generar_reporte(trabajo_id)
+            self.assertEqual(ArchivoReporte.objects.count(), 1)
+
+            response = self.client.get(f'{self.url}{trabajo_id}/descargar/')
+            contenido = b''.join(response.streaming_content)
+            self.assertEqual(int(response['Content-Length']), len(contenido))
+            self.assertEqual(len(list(csv.reader(io.StringIO(contenido.decode('utf-8'))))), 26)
+
+            eliminar_trabajos_antiguos(timezone.now() + RETENCION_TRABAJOS_REPORTE * 2)
+            self.assertFalse(ArchivoReporte.objects.exists())
@@ -0,0 +1,97 @@
+"""
+Trabajos de reporte en segundo plano.
+Un trabajo se crea desde la API, la tarea generar_reporte escribe el archivo y
+el cliente lo descarga cuando está completado. Las solicitudes con los mismos
+parámetros dentro de TRABAJO_REPORTE_TTL reutilizan el trabajo (en curso o ya
+terminado) en lugar de volver a generar el archivo.
+"""
+import logging
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from .models import TrabajoReporte
+
+logger = logging.getLogger(__name__)
+
+# Segundos durante los que un trabajo se reutiliza para los mismos parámetros
+TRABAJO_REPORTE_TTL = 600
+# Antigüedad a partir de la cual se eliminan trabajos y archivos
+RETENCION_TRABAJOS_REPORTE = timedelta(days=1)
+
+
+def clave_cache_trabajo(clave):
+    return f'reportes:trabajo:{clave}'
+
+
+def _trabajo_reutilizable(trabajo_id):
+    if trabajo_id is None:
+        return None
+    return (
+        TrabajoReporte.objects
+        .filter(id=trabajo_id)
+        .exclude(estado=TrabajoReporte.ERROR)
+        .first()
+    )
+
+
+def solicitar_trabajo(formato, tipo, usuario=None, forzar=False):
+    """
+    Retorna (trabajo, reutilizado). Si hay un trabajo reciente con los mismos
+    parámetros se retorna ese; si no, se crea uno y se encola su generación.
+    Con forzar=True siempre se genera un archivo nuevo.
+    """
+    clave = TrabajoReporte.calcular_clave(formato, tipo)
+    clave_cache = clave_cache_trabajo(clave)
+
+    if not forzar:
+        existente = _trabajo_reutilizable(cache.get(clave_cache))
+        if existente:
+            return existente, True
+
+    trabajo = TrabajoReporte.objects.create(
+        formato=formato,
+        tipo=tipo,
+        clave=clave,
+        solicitado_por=usuario,
+    )
+
+    if forzar:
+        cache.set(clave_cache, trabajo.id, TRABAJO_REPORTE_TTL)
+    elif not cache.add(clave_cache, trabajo.id, TRABAJO_REPORTE_TTL):
+        # Otra solicitud simultánea registró su trabajo primero: usar ese
+        existente = _trabajo_reutilizable(cache.get(clave_cache))
+        if existente:
+            trabajo.delete()
+            return existente, True
+        cache.set(clave_cache, trabajo.id, TRABAJO_REPORTE_TTL)
+
+    from .tasks import generar_reporte
+    try:
+        generar_reporte.delay(trabajo.id)
+    except Exception as e:
+        logger.error(f"❌ [REPORTES] No se pudo encolar el trabajo {trabajo.id}: {e}")
+        marcar_error(trabajo, f"No se pudo encolar el trabajo: {e}")
+
+    return trabajo, False
+
+
+def marcar_error(trabajo, mensaje):
+    """Marca el trabajo como fallido y lo retira de la caché de reutilización."""
+    trabajo.estado = TrabajoReporte.ERROR
+    trabajo.error = mensaje
+    trabajo.fecha_finalizacion = timezone.now()
+    trabajo.save(update_fields=['estado', 'error', 'fecha_finalizacion'])
+    cache.delete(clave_cache_trabajo(trabajo.clave))
+
+
+def eliminar_trabajos_antiguos(ahora=None):
+    """Elimina los trabajos más antiguos que la retención junto con sus archivos."""
+    limite = (ahora or timezone.now()) - RETENCION_TRABAJOS_REPORTE
+    antiguos = TrabajoReporte.objects.filter(fecha_creacion__lt=limite)
+    eliminados = 0
+    for trabajo in antiguos.iterator():
+        if trabajo.archivo:
+            trabajo.archivo.delete(save=False)
+        trabajo.delete()
+        eliminados += 1
+    return eliminados
@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     # Endpoints de consulta de datos
+    path("dashboard/", views.dashboard, name="dashboard"),
     path("eventos-por-mes/", views.eventos_por_mes, name="eventos_por_mes"),
     path("eventos-por-usuarios/", views.eventos_por_usuario, name="eventos_por_usuario"),
     path("eventos-por-categoria/", views.eventos_por_categoria, name="eventos_por_categoria"),
@@ -14,4 +15,9 @@ urlpatterns = [
     path("export/csv/", views.export_csv, name="export_csv"),
     path("export/xlsx/", views.export_xlsx, name="export_xlsx"),
     path("export/pdf/", views.export_pdf, name="export_pdf"),
+
+    # Exportación en segundo plano (Celery)
+    path("trabajos/", views.crear_trabajo_reporte, name="crear_trabajo_reporte"),
+    path("trabajos/<int:trabajo_id>/", views.estado_trabajo_reporte, name="estado_trabajo_reporte"),
+    path("trabajos/<int:trabajo_id>/descargar/", views.descargar_trabajo_reporte, name="descargar_trabajo_reporte"),
 ]
\ No newline at end of file
@@ -2,22 +2,57 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
-from django.db.models.functions import TruncMonth
-from django.db.models import Count, F, Avg, Q 
 from django.http import HttpResponse
-from django.utils import timezone
-from apps.eventos.models import Evento, CategoriaEvento, Reseña
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from .agregados import obtener_dashboard, obtener_seccion
+from .exportacion import generar_lineas_csv, generar_xlsx, iterar_archivo, respuesta_streaming
+from .generadores import FORMATOS, TIPOS, nombre_archivo, filas_csv, filas_xlsx, filas_pdf, escribir_pdf
+from .models import TrabajoReporte
+from .trabajos import marcar_error, solicitar_trabajo
 import io
-import csv
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _rango_fechas(request):
+    """
+    Lee los query params opcionales inicio/fin (YYYY-MM-DD).
+    Retorna (inicio, fin, error); error es un mensaje si alguna fecha es inválida.
+    """
+    fechas = {}
+    for param in ('inicio', 'fin'):
+        valor = request.GET.get(param)
+        fecha = None
+        if valor:
+            try:
+                fecha = parse_date(valor)
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                return None, None, f'Formato de fecha {param} inválido'
+        fechas[param] = fecha
+    return fechas['inicio'], fechas['fin'], None
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    """
+    Retorna todas las secciones del panel de reportes en una sola respuesta:
+    eventos por mes, usuario, categoría, lugar y estado, y estadísticas de rating.
+    Query params opcionales: inicio (YYYY-MM-DD), fin (YYYY-MM-DD), sobre fecha_inicio del evento.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied("Solo administradores pueden acceder a los reportes.")
+    
+    inicio, fin, error = _rango_fechas(request)
+    if error:
+        return Response({'error': error}, status=400)
+    
+    return Response(obtener_dashboard(inicio, fin))
 
 
 @api_view(['GET'])
@@ -31,41 +66,11 @@ def eventos_por_mes(request):
     if not request.user.is_staff:
         raise PermissionDenied("Solo administradores pueden acceder a los reportes.")
     
-    qs = Evento.objects.all()
-    
-    # Filtros opcionales de fecha
-    inicio = request.GET.get('inicio')
-    fin = request.GET.get('fin')
-    
-    if inicio:
-        try:
-            qs = qs.filter(fecha_inicio__date__gte=inicio)
-        except ValueError:
-            return Response({'error': 'Formato de fecha inicio inválido'}, status=400)
-    
-    if fin:
-        try:
-            qs = qs.filter(fecha_inicio__date__lte=fin)
-        except ValueError:
-            return Response({'error': 'Formato de fecha fin inválido'}, status=400)
-
-    # Agrupar por mes y contar
-    datos = (
-        qs.annotate(mes=TruncMonth('fecha_inicio'))
-          .values('mes')
-          .annotate(total=Count('id'))
-          .order_by('mes')
-    )
-    
-    out = [
-        {
-            'mes': d['mes'].isoformat() if d['mes'] else None, 
-            'total': d['total']
-        } 
-        for d in datos
-    ]
+    inicio, fin, error = _rango_fechas(request)
+    if error:
+        return Response({'error': error}, status=400)
     
-    return Response(out)
+    return Response(obtener_seccion('eventos_por_mes', inicio, fin))
 
 
 @api_view(['GET'])
@@ -78,23 +83,7 @@ def eventos_por_usuario(request):
     if not request.user.is_staff:
         raise PermissionDenied("Solo administradores pueden acceder a los reportes.")
     
-    qs = (
-        Evento.objects
-        .values('organizador__id', 'organizador__username')
-        .annotate(total=Count('id'))
-        .order_by('-total')
-    )
-    
-    out = [
-        {
-            'usuario_id': r['organizador__id'], 
-            'username': r['organizador__username'] or 'Usuario eliminado', 
-            'total': r['total']
-        } 
-        for r in qs
-    ]
-    
-    return Response(out)
+    return Response(obtener_seccion('eventos_por_usuario'))
 
 
 @api_view(['GET'])
@@ -107,23 +96,7 @@ def eventos_por_categoria(request):
     if not request.user.is_staff:
         raise PermissionDenied("Solo administradores pueden acceder a los reportes.")
     
-    qs = (
-        Evento.objects
-        .values('categoria__id', 'categoria__nombre')
-        .annotate(total=Count('id'))
-        .order_by('-total')
-    )
-    
-    out = [
-        {
-            'categoria_id': r['categoria__id'], 
-            'nombre': r['categoria__nombre'] or 'Sin categoría', 
-            'total': r['total']
-        } 
-        for r in qs
-    ]
-    
-    return Response(out)
+    return Response(obtener_seccion('eventos_por_categoria'))
 
 
 @api_view(['GET'])
@@ -135,22 +108,7 @@ def eventos_por_lugar(request):
     if not request.user.is_staff:
         raise PermissionDenied("Solo administradores pueden acceder a los reportes.")
     
-    qs = (
-        Evento.objects
-        .values('ubicacion')
-        .annotate(total=Count('id'))
-        .order_by('-total')
-    )
-    
-    out = [
-        {
-            'ubicacion': r['ubicacion'], 
-            'total': r['total']
-        } 
-        for r in qs
-    ]
-    
-    return Response(out)
+    return Response(obtener_seccion('eventos_por_lugar'))
 
 
 @api_view(['GET'])
@@ -166,48 +124,20 @@ def eventos_por_estado(request):
     if not request.user.is_staff:
         raise PermissionDenied("Solo administradores pueden acceder a los reportes.")
     
-    ahora = timezone.now()
-    
-    futuros = Evento.objects.filter(fecha_inicio__gt=ahora).count()
-    en_curso = Evento.objects.filter(
-        fecha_inicio__lte=ahora, 
-        fecha_fin__gte=ahora
-    ).count()
-    finalizados = Evento.objects.filter(fecha_fin__lt=ahora).count()
-    
-    # Eventos llenos (inscripciones >= aforo)
-    llenos = (
-        Evento.objects
-        .annotate(insc=Count('inscripciones'))
-        .filter(insc__gte=F('aforo'))
-        .count()
-    )
-    
-    return Response({
-        'futuros': futuros,
-        'en_curso': en_curso,
-        'finalizados': finalizados,
-        'llenos': llenos
-    })
-
-def generar_csv_response(filename, headers, rows):
+    return Response(obtener_seccion('eventos_por_estado'))
+
+def generar_csv_response(request, filename, headers, rows):
     """
-    Genera una respuesta HTTP con un archivo CSV.
+    Genera una respuesta HTTP en streaming con un archivo CSV.
+    `rows` puede ser cualquier iterable de diccionarios; se consume de forma
+    perezosa, así que la memoria no crece con el número de filas.
     """
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(headers)
-    
-    for row in rows:
-        writer.writerow([row.get(h, '') for h in headers])
-    
-    response = HttpResponse(
-        buffer.getvalue(), 
-        content_type='text/csv; charset=utf-8'
+    return respuesta_streaming(
+        request,
+        generar_lineas_csv(headers, rows),
+        FORMATOS['csv'],
+        filename
     )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -221,113 +151,9 @@ def export_csv(request):
         raise PermissionDenied("Solo administradores pueden exportar reportes.")
     
     tipo = request.GET.get('tipo', 'global')
+    headers, rows = filas_csv(tipo)
     
-    if tipo == 'mes':
-        datos = list(
-            Evento.objects
-            .annotate(mes=TruncMonth('fecha_inicio'))
-            .values('mes')
-            .annotate(total=Count('id'))
-            .order_by('mes')
-        )
-        rows = [
-            {
-                'mes': d['mes'].strftime('%Y-%m') if d['mes'] else '', 
-                'total': d['total']
-            } 
-            for d in datos
-        ]
-        return generar_csv_response(
-            'eventos_por_mes.csv', 
-            ['mes', 'total'], 
-            rows
-        )
-    
-    elif tipo == 'usuarios':
-        qs = (
-            Evento.objects
-            .values('organizador__username')
-            .annotate(total=Count('id'))
-            .order_by('-total')
-        )
-        rows = [
-            {
-                'username': r['organizador__username'] or 'Usuario eliminado', 
-                'total': r['total']
-            } 
-            for r in qs
-        ]
-        return generar_csv_response(
-            'eventos_por_usuario.csv', 
-            ['username', 'total'], 
-            rows
-        )
-    
-    elif tipo == 'categorias':
-        qs = (
-            Evento.objects
-            .values('categoria__nombre')
-            .annotate(total=Count('id'))
-            .order_by('-total')
-        )
-        rows = [
-            {
-                'categoria': r['categoria__nombre'] or 'Sin categoría', 
-                'total': r['total']
-            } 
-            for r in qs
-        ]
-        return generar_csv_response(
-            'eventos_por_categoria.csv', 
-            ['categoria', 'total'], 
-            rows
-        )
-    
-    elif tipo == 'lugares':
-        qs = (
-            Evento.objects
-            .values('ubicacion')
-            .annotate(total=Count('id'))
-            .order_by('-total')
-        )
-        rows = [
-            {
-                'ubicacion': r['ubicacion'], 
-                'total': r['total']
-            } 
-            for r in qs
-        ]
-        return generar_csv_response(
-            'eventos_por_lugar.csv', 
-            ['ubicacion', 'total'], 
-            rows
-        )
-    
-    else:  # global
-        qs = Evento.objects.all().values(
-            'id', 'titulo', 'fecha_inicio', 'fecha_fin', 
-            'ubicacion', 'aforo', 'organizador__username', 
-            'categoria__nombre'
-        )
-        rows = [
-            {
-                'id': r['id'],
-                'titulo': r['titulo'],
-                'organizador': r['organizador__username'],
-                'categoria': r['categoria__nombre'] or 'Sin categoría',
-                'fecha_inicio': r['fecha_inicio'].strftime('%Y-%m-%d %H:%M'),
-                'fecha_fin': r['fecha_fin'].strftime('%Y-%m-%d %H:%M'),
-                'ubicacion': r['ubicacion'],
-                'aforo': r['aforo']
-            } 
-            for r in qs
-        ]
-        return generar_csv_response(
-            'eventos_global.csv', 
-            ['id', 'titulo', 'organizador', 'categoria', 
-             'fecha_inicio', 'fecha_fin', 'ubicacion', 'aforo'], 
-            rows
-        )
+    return generar_csv_response(request, nombre_archivo('csv', tipo), headers, rows)
 
 
 @api_view(['GET'])
@@ -342,149 +168,20 @@ def export_xlsx(request):
         raise PermissionDenied("Solo administradores pueden exportar reportes.")
     
     tipo = request.GET.get('tipo', 'global')
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte"
-    
-    # Estilos
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    if tipo == 'mes':
-        datos = list(
-            Evento.objects
-            .annotate(mes=TruncMonth('fecha_inicio'))
-            .values('mes')
-            .annotate(total=Count('id'))
-            .order_by('mes')
-        )
-        
-        ws.append(['Mes', 'Total de Eventos'])
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        for d in datos:
-            ws.append([
-                d['mes'].strftime('%Y-%m') if d['mes'] else '', 
-                d['total']
-            ])
-    
-    elif tipo == 'usuarios':
-        qs = (
-            Evento.objects
-            .values('organizador__username')
-            .annotate(total=Count('id'))
-            .order_by('-total')
-        )
-        
-        ws.append(['Usuario', 'Total de Eventos'])
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        for r in qs:
-            ws.append([
-                r['organizador__username'] or 'Usuario eliminado', 
-                r['total']
-            ])
-    
-    elif tipo == 'categorias':
-        qs = (
-            Evento.objects
-            .values('categoria__nombre')
-            .annotate(total=Count('id'))
-            .order_by('-total')
-        )
-        
-        ws.append(['Categoría', 'Total de Eventos'])
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        for r in qs:
-            ws.append([
-                r['categoria__nombre'] or 'Sin categoría', 
-                r['total']
-            ])
-    
-    elif tipo == 'lugares':
-        qs = (
-            Evento.objects
-            .values('ubicacion')
-            .annotate(total=Count('id'))
-            .order_by('-total')
-        )
-        
-        ws.append(['Ubicación', 'Total de Eventos'])
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        for r in qs:
-            ws.append([r['ubicacion'], r['total']])
-    
-    else:  # global
-        qs = Evento.objects.all().values(
-            'id', 'titulo', 'organizador__username', 'categoria__nombre',
-            'fecha_inicio', 'fecha_fin', 'ubicacion', 'aforo'
-        )
-        
-        ws.append([
-            'ID', 'Título', 'Organizador', 'Categoría', 
-            'Fecha Inicio', 'Fecha Fin', 'Ubicación', 'Aforo'
-        ])
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        for r in qs:
-            ws.append([
-                r['id'],
-                r['titulo'],
-                r['organizador__username'] or 'Usuario eliminado',
-                r['categoria__nombre'] or 'Sin categoría',
-                r['fecha_inicio'].strftime('%Y-%m-%d %H:%M'),
-                r['fecha_fin'].strftime('%Y-%m-%d %H:%M'),
-                r['ubicacion'],
-                r['aforo']
-            ])
-    
-    # Ajustar ancho de columnas
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Guardar en memoria
-    stream = io.BytesIO()
-    wb.save(stream)
-    stream.seek(0)
-    
-    response = HttpResponse(
-        stream.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    headers, filas = filas_xlsx(tipo)
+    
+    # Workbook write-only sobre archivos temporales: la memoria no crece con las filas
+    archivo = generar_xlsx(headers, filas)
+    tamano = archivo.seek(0, io.SEEK_END)
+    archivo.seek(0)
+    
+    response = respuesta_streaming(
+        request,
+        iterar_archivo(archivo),
+        FORMATOS['xlsx'],
+        nombre_archivo('xlsx', tipo)
     )
-    response['Content-Disposition'] = f'attachment; filename="reporte_{tipo}.xlsx"'
+    response['Content-Length'] = tamano
     
     return response
 
@@ -503,149 +200,107 @@ def export_pdf(request):
     tipo = request.GET.get('tipo', 'global')
     
     buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    elements = []
-    
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#1a56db'),
-        spaceAfter=30,
-        alignment=1  # centrado
-    )
-    
-    # Selección de datos según tipo
-    if tipo == 'mes':
-        datos = list(
-            Evento.objects
-            .annotate(mes=TruncMonth('fecha_inicio'))
-            .values('mes')
-            .annotate(total=Count('id'))
-            .order_by('mes')
-        )
-        
-        title = Paragraph("Reporte: Eventos por Mes", title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-        
-        table_data = [['Mes', 'Total de Eventos']]
-        for d in datos:
-            table_data.append([
-                d['mes'].strftime('%Y-%m') if d['mes'] else '',
-                str(d['total'])
-            ])
-    
-    elif tipo == 'usuarios':
-        qs = list(
-            Evento.objects
-            .values('organizador__username')
-            .annotate(total=Count('id'))
-            .order_by('-total')
-        )
-        
-        title = Paragraph("Reporte: Eventos por Usuario", title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-        
-        table_data = [['Usuario', 'Total de Eventos']]
-        for r in qs:
-            table_data.append([
-                r['organizador__username'] or 'Usuario eliminado',
-                str(r['total'])
-            ])
+    escribir_pdf(*filas_pdf(tipo), buffer)
     
-    elif tipo == 'categorias':
-        qs = list(
-            Evento.objects
-            .values('categoria__nombre')
-            .annotate(total=Count('id'))
-            .order_by('-total')
-        )
-        
-        title = Paragraph("Reporte: Eventos por Categoría", title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-        
-        table_data = [['Categoría', 'Total de Eventos']]
-        for r in qs:
-            table_data.append([
-                r['categoria__nombre'] or 'Sin categoría',
-                str(r['total'])
-            ])
+    pdf = buffer.getvalue()
+    buffer.close()
     
-    elif tipo == 'lugares':
-        qs = list(
-            Evento.objects
-            .values('ubicacion')
-            .annotate(total=Count('id'))
-            .order_by('-total')
-        )
-        
-        title = Paragraph("Reporte: Eventos por Ubicación", title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-        
-        table_data = [['Ubicación', 'Total de Eventos']]
-        for r in qs:
-            table_data.append([r['ubicacion'], str(r['total'])])
+    response = HttpResponse(pdf, content_type=FORMATOS['pdf'])
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo("pdf", tipo)}"'
     
-    else:  # global
-        qs = list(
-            Evento.objects.all().values(
-                'id', 'titulo', 'organizador__username', 'categoria__nombre',
-                'fecha_inicio', 'fecha_fin', 'ubicacion', 'aforo'
-            )
+    return response
+
+def _serializar_trabajo(request, trabajo):
+    datos = {
+        'id': trabajo.id,
+        'formato': trabajo.formato,
+        'tipo': trabajo.tipo,
+        'estado': trabajo.estado,
+        'progreso': trabajo.progreso,
+        'error': trabajo.error or None,
+        'fecha_creacion': trabajo.fecha_creacion.isoformat(),
+        'fecha_finalizacion': trabajo.fecha_finalizacion.isoformat() if trabajo.fecha_finalizacion else None,
+        'url_estado': request.build_absolute_uri(reverse('estado_trabajo_reporte', args=[trabajo.id])),
+        'url_descarga': None,
+    }
+    if trabajo.estado == TrabajoReporte.COMPLETADO:
+        datos['url_descarga'] = request.build_absolute_uri(
+            reverse('descargar_trabajo_reporte', args=[trabajo.id])
         )
-        
-        title = Paragraph("Reporte: Listado General de Eventos", title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-        
-        table_data = [['ID', 'Título', 'Organizador', 'Categoría', 'Inicio', 'Fin', 'Ubicación', 'Aforo']]
-        for r in qs:
-            table_data.append([
-                str(r['id']),
-                r['titulo'][:30] + '...' if len(r['titulo']) > 30 else r['titulo'],
-                (r['organizador__username'] or 'N/A')[:15],
-                (r['categoria__nombre'] or 'N/A')[:15],
-                r['fecha_inicio'].strftime('%d/%m/%Y'),
-                r['fecha_fin'].strftime('%d/%m/%Y'),
-                r['ubicacion'][:20] + '...' if len(r['ubicacion']) > 20 else r['ubicacion'],
-                str(r['aforo'])
-            ])
+    return datos
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def crear_trabajo_reporte(request):
+    """
+    Solicita la generación en segundo plano de un reporte.
+    Body: formato (csv, xlsx, pdf), tipo (mes, usuarios, categorias, lugares, global),
+    forzar (opcional, ignora un archivo reciente con los mismos parámetros).
+    Responde 202 con el trabajo creado, o 200 si se reutiliza uno reciente.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied("Solo administradores pueden exportar reportes.")
     
-    # Crear tabla
-    table = Table(table_data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-    ]))
+    formato = request.data.get('formato')
+    tipo = request.data.get('tipo', 'global')
+    forzar = str(request.data.get('forzar', '')).lower() in ('1', 'true')
     
-    elements.append(table)
+    if formato not in FORMATOS:
+        return Response({'error': f"Formato inválido. Opciones: {', '.join(FORMATOS)}"}, status=400)
+    if tipo not in TIPOS:
+        return Response({'error': f"Tipo inválido. Opciones: {', '.join(TIPOS)}"}, status=400)
     
-    # Pie de página con fecha
-    elements.append(Spacer(1, 30))
-    footer_text = f"Generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-    footer = Paragraph(footer_text, styles['Normal'])
-    elements.append(footer)
+    trabajo, reutilizado = solicitar_trabajo(formato, tipo, request.user, forzar=forzar)
     
-    doc.build(elements)
+    datos = _serializar_trabajo(request, trabajo)
+    datos['reutilizado'] = reutilizado
+    return Response(datos, status=200 if reutilizado else 202)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def estado_trabajo_reporte(request, trabajo_id):
+    """
+    Retorna el estado y el progreso (0-100) de un trabajo de reporte.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied("Solo administradores pueden acceder a los reportes.")
     
-    pdf = buffer.getvalue()
-    buffer.close()
+    trabajo = get_object_or_404(TrabajoReporte, id=trabajo_id)
+    return Response(_serializar_trabajo(request, trabajo))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def descargar_trabajo_reporte(request, trabajo_id):
+    """
+    Descarga el archivo de un trabajo de reporte completado.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied("Solo administradores pueden exportar reportes.")
     
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="reporte_{tipo}.pdf"'
+    trabajo = get_object_or_404(TrabajoReporte, id=trabajo_id)
+    if trabajo.estado != TrabajoReporte.COMPLETADO or not trabajo.archivo:
+        return Response({'error': 'El reporte aún no está disponible.', 'estado': trabajo.estado}, status=409)
+    
+    try:
+        tamano = trabajo.archivo.size
+        archivo = trabajo.archivo.open('rb')
+    except FileNotFoundError:
+        # El archivo se escribió en un almacenamiento que este servicio no ve
+        # (REPORTES_ALMACENAMIENTO='disco' sin volumen compartido) o se borró
+        logger.error(f"❌ [REPORTES] Archivo del trabajo {trabajo.id} no encontrado: {trabajo.archivo.name}")
+        marcar_error(trabajo, 'El archivo del reporte no está disponible. Vuelve a generarlo.')
+        return Response({'error': 'El archivo del reporte ya no está disponible.', 'estado': trabajo.estado}, status=410)
+    
+    response = respuesta_streaming(
+        request,
+        iterar_archivo(archivo),
+        FORMATOS[trabajo.formato],
+        nombre_archivo(trabajo.formato, trabajo.tipo)
+    )
+    response['Content-Length'] = tamano
     
     return response
 
@@ -663,73 +318,4 @@ def rating_promedio(request):
     if not request.user.is_staff:
         raise PermissionDenied("Solo administradores pueden acceder a los reportes.")
     
-    # Calcular promedio global y total de reseñas
-    reseñas_stats = Reseña.objects.filter(
-        puntuacion__isnull=False
-    ).aggregate(
-        promedio=Avg('puntuacion'),
-        total=Count('id')
-    )
-    
-    promedio_global = round(reseñas_stats['promedio'], 2) if reseñas_stats['promedio'] else 0
-    total_reseñas = reseñas_stats['total']
-    
-    # Distribución por estrellas (1-5)
-    distribucion = []
-    for estrellas in range(1, 6):
-        cantidad = Reseña.objects.filter(puntuacion=estrellas).count()
-        distribucion.append({
-            'estrellas': estrellas,
-            'cantidad': cantidad
-        })
-    
-    # Rating promedio por categoría
-    rating_por_categoria = (
-        Reseña.objects
-        .filter(puntuacion__isnull=False)
-        .values('evento__categoria__nombre')
-        .annotate(
-            promedio=Avg('puntuacion'),
-            total_reseñas=Count('id')
-        )
-        .order_by('-promedio')
-    )
-    
-    por_categoria = [
-        {
-            'categoria': r['evento__categoria__nombre'] or 'Sin categoría',
-            'promedio': round(r['promedio'], 2),
-            'total_reseñas': r['total_reseñas']
-        }
-        for r in rating_por_categoria
-    ]
-    
-    # Top 5 eventos mejor valorados (con al menos 3 reseñas para ser significativo)
-    mejor_valorados = (
-        Evento.objects
-        .annotate(
-            rating_promedio=Avg('reseñas__puntuacion'),
-            num_reseñas=Count('reseñas', filter=Q(reseñas__puntuacion__isnull=False))
-        )
-        .filter(num_reseñas__gte=3)  # Al menos 3 reseñas
-        .order_by('-rating_promedio')[:5]
-        .values('id', 'titulo', 'rating_promedio', 'num_reseñas')
-    )
-    
-    mejor_valorados_list = [
-        {
-            'id': e['id'],
-            'titulo': e['titulo'],
-            'rating_promedio': round(e['rating_promedio'], 2),
-            'num_reseñas': e['num_reseñas']
-        }
-        for e in mejor_valorados
-    ]
-    
-    return Response({
-        'promedio_global': promedio_global,
-        'total_reseñas': total_reseñas,
-        'distribucion': distribucion,
-        'por_categoria': por_categoria,
-        'mejor_valorados': mejor_valorados_list
-    })
\ No newline at end of file
+    return Response(obtener_seccion('rating_promedio'))
@@ -296,19 +296,9 @@ class PerfilPublicoSerializer(serializers.ModelSerializer):
         return representation
 
 
-class EstadisticasUsuariosSerializer(serializers.ModelSerializer):
+class EstadisticasUsuariosSerializer(serializers.Serializer):
     """
     Serializador para estadísticas de usuarios.
-    Extiende del modelo Usuario para tener acceso a las consultas.
+    Recibe el diccionario de apps.eventos.cache.obtener_estadisticas_plataforma().
     """
-    total_usuarios = serializers.SerializerMethodField()
-
-    class Meta:
-        model = Usuario
-        fields = ['total_usuarios']
-
-    def get_total_usuarios(self, obj):
-        """
-        Retorna el total de usuarios registrados en el sistema.
-        """
-        return Usuario.objects.count()
\ No newline at end of file
+    total_usuarios = serializers.IntegerField(read_only=True)
\ No newline at end of file
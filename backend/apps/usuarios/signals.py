@@ -0,0 +1,21 @@
+"""
+Señales de la app usuarios.
+Mantienen coherentes las estadísticas públicas en caché (apps.eventos.cache).
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.eventos.cache import invalidar_estadisticas_plataforma
+from .models import Usuario
+
+
+@receiver(post_save, sender=Usuario)
+def invalidar_estadisticas_por_registro(sender, instance, created, **kwargs):
+    """Un usuario nuevo cambia el total de usuarios."""
+    if created:
+        invalidar_estadisticas_plataforma()
+
+
+@receiver(post_delete, sender=Usuario)
+def invalidar_estadisticas_por_baja(sender, instance, **kwargs):
+    """Un usuario eliminado cambia el total de usuarios."""
+    invalidar_estadisticas_plataforma()
@@ -10,6 +10,7 @@ from django.contrib.auth.models import AnonymousUser
 from .models import Usuario, Rol
 from .serializer import UsuarioSerializer, RolSerializer, EstadisticasUsuariosSerializer, PerfilPublicoSerializer
 from .tasks import send_email_user_created
+from apps.eventos.cache import obtener_estadisticas_plataforma
 
 class RolViewSet(viewsets.ModelViewSet):
     """
@@ -61,10 +62,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         Endpoint para obtener estadísticas de usuarios.
         Accesible públicamente sin autenticación.
         """
-        # Crear una instancia ficticia para el serializer
-        usuario = Usuario.objects.first() if Usuario.objects.exists() else None
-        
-        serializer = EstadisticasUsuariosSerializer(usuario)
+        serializer = EstadisticasUsuariosSerializer(obtener_estadisticas_plataforma())
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     
@@ -116,7 +114,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def count_users(self, request):
         """Retorna el total de usuarios registrados."""
-        total = Usuario.objects.count()
+        total = obtener_estadisticas_plataforma()['total_usuarios']
         return Response({'total': total})
     
     @action(detail=False, methods=['get', 'patch'], permission_classes=[IsAuthenticated])
@@ -8,6 +8,7 @@ import environ
 from datetime import timedelta
 import dj_database_url
 from celery.schedules import crontab, schedule
+from django.core.exceptions import ImproperlyConfigured
 
 # ============================================
 # CONFIGURACIÓN BÁSICA
@@ -197,6 +198,18 @@ else:
     except ImportError as e:
         print(f"   ❌ Error importando cloudinary_storage: {e}")
 
+# Archivos generados por los trabajos de reporte (apps.reportes). Los escribe el
+# worker de Celery y los sirve el backend a través de la API (solo staff), no
+# por MEDIA_URL, así que ambos servicios deben ver el mismo almacenamiento:
+# - 'disco': REPORTES_ROOT, que debe ser un volumen compartido entre el backend
+#   y el worker (docker-compose monta el mismo directorio en ambos).
+# - 'bd': en la base de datos (ArchivoReporte), para servicios desplegados por
+#   separado sin disco compartido (Railway).
+REPORTES_ALMACENAMIENTO = env('REPORTES_ALMACENAMIENTO', default='disco' if DEBUG else 'bd')
+if REPORTES_ALMACENAMIENTO not in ('disco', 'bd'):
+    raise ImproperlyConfigured("REPORTES_ALMACENAMIENTO debe ser 'disco' o 'bd'")
+REPORTES_ROOT = env('REPORTES_ROOT', default=str(BASE_DIR / 'media' / 'reportes'))
+
 # ============================================
 # CORS & CSRF (Configuración Cross-Site)
 # ============================================
@@ -309,22 +322,57 @@ CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'America/Bogota'
+# Los recordatorios se encolan con ETA de hasta 36 horas (HORIZONTE_PROGRAMACION).
+# Redis reentrega los mensajes no confirmados tras visibility_timeout (1 hora por
+# defecto), así que debe superar ese horizonte para no duplicar recordatorios.
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': 60 * 60 * 48}
 
 CELERY_BEAT_SCHEDULE = {
-    'notificar-eventos-proximos': {
-        'task': 'apps.notificaciones.tasks.notificar_eventos_proximos',
-        'schedule': schedule(run_every=timedelta(seconds=15)),
+    # Los recordatorios se programan con ETA al crear/reprogramar cada evento;
+    # esta tarea solo encola los de eventos que entran en el horizonte de 36 horas.
+    'programar-recordatorios-proximos': {
+        'task': 'apps.notificaciones.tasks.programar_recordatorios_proximos',
+        'schedule': schedule(run_every=timedelta(hours=6)),
     },
     'limpiar-notificaciones-eventos-finalizados': {
         'task': 'apps.notificaciones.tasks.limpiar_notificaciones_eventos_finalizados',
         'schedule': schedule(run_every=timedelta(hours=12)),
     },
+    # Los contadores de notificaciones viven en caché; esta tarea corrige desfases.
+    'reconciliar-contadores-notificaciones': {
+        'task': 'apps.notificaciones.tasks.reconciliar_contadores_notificaciones',
+        'schedule': schedule(run_every=timedelta(minutes=15)),
+    },
+    # Los reportes agregados leen los resúmenes diarios; solo se recalculan
+    # los días que cambiaron desde la pasada anterior.
+    'actualizar-resumenes-diarios': {
+        'task': 'apps.reportes.tasks.actualizar_resumenes_diarios',
+        'schedule': schedule(run_every=timedelta(minutes=5)),
+    },
+    'limpiar-trabajos-reporte': {
+        'task': 'apps.reportes.tasks.limpiar_trabajos_reporte',
+        'schedule': schedule(run_every=timedelta(hours=6)),
+    },
     'limpiar-intentos-login': {
         'task': 'apps.usuarios.tasks.limpiar_intentos_login',
         'schedule': schedule(run_every=timedelta(days=1)),
     },
 }
 
+# ============================================
+# CACHÉ
+# ============================================
+
+# En desarrollo: caché en memoria del proceso
+# En producción: Redis (base 1, separada del broker) para que la invalidación
+# por señales llegue a todos los workers. Se puede sobrescribir con CACHE_URL.
+CACHES = {
+    'default': env.cache(
+        'CACHE_URL',
+        default='locmemcache://' if DEBUG else f'{REDIS_URL}/1'
+    ),
+}
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -334,6 +382,19 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Capa en memoria para pruebas locales de un solo proceso (p. ej. benchmark_ws_connect)
+if env.bool('CHANNEL_LAYER_EN_MEMORIA', default=False):
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+# Presencia de usuarios conectados por WebSocket (apps.notificaciones.presencia).
+# Requiere una caché compartida entre el servidor ASGI y el worker de Celery.
+WS_PRESENCIA = env.bool('WS_PRESENCIA', default='locmem' not in CACHES['default']['BACKEND'])
+
+# Identidad de los usuarios de WebSocket por (user_id, jti) en caché
+# (apps.notificaciones.identidad_ws). 0 desactiva la caché.
+WS_IDENTIDAD_TTL = env.int('WS_IDENTIDAD_TTL', default=60)
+WS_IDENTIDAD_CACHE_COMPARTIDA = env.bool('WS_IDENTIDAD_CACHE_COMPARTIDA', default=True)
+
 # Configuración de Proxy SSL para Railway (Obligatorio)
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 SECURE_SSL_REDIRECT = env.bool('SECURE_SSL_REDIRECT', default=True) # Forzamos True en producción
@@ -34,6 +34,24 @@ python manage.py migrate --noinput || {
     echo "El servicio continuará y reintentará en el próximo ciclo."
 }
 
+# Sincronizar contadores desnormalizados (Evento.inscritos_count)
+echo "Recalculando contadores de inscritos..."
+python manage.py recalcular_inscritos || {
+    echo "⚠ No se pudieron recalcular los contadores de inscritos."
+}
+
+# Construir los resúmenes diarios de reportes si aún no existen
+echo "Verificando resúmenes diarios de reportes..."
+python manage.py reconstruir_resumenes --si-vacio || {
+    echo "⚠ No se pudieron construir los resúmenes diarios."
+}
+
+# Encolar los recordatorios de eventos próximos (1 día / 1 hora / 15 minutos)
+echo "Programando recordatorios de eventos próximos..."
+python manage.py programar_recordatorios || {
+    echo "⚠ No se pudieron programar los recordatorios. La tarea periódica los encolará."
+}
+
 echo "Migraciones completadas. Iniciando servicio..."
 
 # Si no se proporciona un comando, usar daphne con el puerto correcto
@@ -160,47 +160,59 @@ export const getSharedAttendedEventsRequest = (userId) => {
 // REPORTES PARA ORGANIZADORES
 // ============================================================================
 
-export const getReporteOrganizadorRequest = (eventoId) => {
-  return apiClient.get(`/events-utils/eventos/${eventoId}/reporte_organizador/`);
+export const getReporteOrganizadorRequest = (eventoId, params = {}) => {
+  return apiClient.get(`/events-utils/eventos/${eventoId}/reporte_organizador/`, { params });
 };
 
-export const getMisEventosReportesRequest = () => {
-  return apiClient.get("/events-utils/eventos/mis_eventos_reportes/");
+ //* Cursor de la siguiente página de inscritos a partir de paginacion.next (o null si no hay más)
+export const cursorSiguienteInscritos = (paginacion) => {
+  if (!paginacion?.next) return null;
+  return new URL(paginacion.next, window.location.origin).searchParams.get('cursor');
 };
 
+export const getMisEventosReportesRequest = (params = {}) => {
+  return apiClient.get("/events-utils/eventos/mis_eventos_reportes/", { params });
+};
+
+// Tamaño de página máximo aceptado por mis_eventos_reportes
+const PAGE_SIZE_REPORTES = 200;
+
+ //* Reportes de todos los eventos del organizador: recorre todas las páginas del listado.
+ //* El resumen cubre todos los eventos, así que se toma de la primera página.
+export const getTodosMisEventosReportesRequest = async () => {
+  let page = 1;
+  let response = await getMisEventosReportesRequest({ page, page_size: PAGE_SIZE_REPORTES });
+  const { resumen } = response.data;
+  const eventos = [...response.data.eventos];
 
- //* Exporta el reporte de un evento a CSV
+  while (response.data.paginacion?.next) {
+    page += 1;
+    response = await getMisEventosReportesRequest({ page, page_size: PAGE_SIZE_REPORTES });
+    eventos.push(...response.data.eventos);
+  }
+
+  return { resumen, eventos };
+};
+
+
+ //* Exporta el reporte de un evento a CSV (el backend lo genera en streaming con todos los inscritos)
 export const exportarReporteCSV = async (eventoId) => {
   try {
-    const response = await getReporteOrganizadorRequest(eventoId);
-    const data = response.data;
-    
-    // Convertir a CSV
-    const headers = ['Nombre', 'Email', 'Código Estudiantil', 'Fecha Inscripción', 'Asistencia Confirmada', 'Fecha Confirmación'];
-    const rows = data.inscritos.map(inscrito => [
-      inscrito.nombre_completo,
-      inscrito.email,
-      inscrito.codigo_estudiantil || 'N/A',
-      new Date(inscrito.fecha_inscripcion).toLocaleDateString(),
-      inscrito.asistencia_confirmada ? 'Sí' : 'No',
-      inscrito.fecha_confirmacion ? new Date(inscrito.fecha_confirmacion).toLocaleDateString() : 'N/A'
-    ]);
-    
-    const csvContent = [
-      headers.join(','),
-      ...rows.map(row => row.map(cell => `"${cell}"`).join(','))
-    ].join('\n');
+    const response = await apiClient.get(`/events-utils/eventos/${eventoId}/reporte_organizador/`, {
+      params: { formato: 'csv' },
+      responseType: 'blob',
+    });
     
     // Descargar archivo
-    const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
+    const url = URL.createObjectURL(response.data);
     const link = document.createElement('a');
-    const url = URL.createObjectURL(blob);
     link.setAttribute('href', url);
-    link.setAttribute('download', `reporte_${data.evento.titulo}_${Date.now()}.csv`);
+    link.setAttribute('download', `reporte_evento_${eventoId}_${Date.now()}.csv`);
     link.style.visibility = 'hidden';
     document.body.appendChild(link);
     link.click();
     document.body.removeChild(link);
+    URL.revokeObjectURL(url);
     
     return response;
   } catch (error) {
@@ -68,4 +68,41 @@ export const getNotificationCountRequest = () => {
  */
 export const eliminarNotificationRequest = (id) => {
     return apiClient.delete(`/notifications-utils/notificaciones/${id}/eliminar/`);
-};
\ No newline at end of file
+};
+
+/**
+ * Marcar todas las notificaciones del usuario como leídas
+ * @returns {Promise} - Respuesta con la cantidad actualizada y el conteo nuevo
+ */
+export const leerTodasNotificationsRequest = () => {
+    return apiClient.patch('/notifications-utils/notificaciones/leer_todas/');
+};
+
+/**
+ * Marcar varias notificaciones como leídas
+ * @param {number[]} ids - IDs de las notificaciones
+ * @returns {Promise} - Respuesta con la cantidad actualizada y el conteo nuevo
+ */
+export const leerLoteNotificationsRequest = (ids) => {
+    return apiClient.patch('/notifications-utils/notificaciones/leer_lote/', { ids });
+};
+
+/**
+ * Eliminar varias notificaciones del usuario
+ * @param {number[]} ids - IDs de las notificaciones
+ * @returns {Promise} - Respuesta con la cantidad eliminada y el conteo nuevo
+ */
+export const eliminarLoteNotificationsRequest = (ids) => {
+    return apiClient.post('/notifications-utils/notificaciones/eliminar_lote/', { ids });
+};
+
+/**
+ * Obtener los cambios de notificaciones posteriores a un cursor
+ * @param {string} [since] - Cursor de la última sincronización o del último mensaje del WebSocket
+ * @returns {Promise} - Respuesta con cursor, hay_mas, notificaciones y conteo
+ */
+export const syncNotificationsRequest = (since) => {
+    return apiClient.get('/notifications-utils/notificaciones/sync/', {
+        params: since ? { since } : {}
+    });
+};
@@ -27,8 +27,9 @@ import {
   getPastSubscribedEventsRequest,
   getPastCreatedEventsRequest,
   getFavoriteEventsRequest,
-  getMisEventosReportesRequest,
+  getTodosMisEventosReportesRequest,
   getReporteOrganizadorRequest,
+  cursorSiguienteInscritos,
   exportarReporteCSV
 } from "@/api/events";
 
@@ -114,6 +115,7 @@ const MisEventos = () => {
   const [reporteDetallado, setReporteDetallado] = useState<any>(null);
   const [loadingReportes, setLoadingReportes] = useState(true);
   const [loadingDetalle, setLoadingDetalle] = useState(false);
+  const [loadingMasInscritos, setLoadingMasInscritos] = useState(false);
   const [errorReportes, setErrorReportes] = useState<string | null>(null);
 
   // Formatear fecha: "2024-01-15T14:30:00Z" → "15 de enero, 2024"
@@ -302,11 +304,13 @@ const MisEventos = () => {
       try {
         setLoadingReportes(true);
         setErrorReportes(null);
-        const response = await getMisEventosReportesRequest();
-        setReportesData(response.data);
+        // El listado viene paginado: se recorren todas las páginas para que
+        // la gráfica y el selector incluyan todos los eventos
+        const reportes = await getTodosMisEventosReportesRequest();
+        setReportesData(reportes);
         
-        if (response.data.eventos.length > 0) {
-          setEventoSeleccionado(response.data.eventos[0].evento_id);
+        if (reportes.eventos.length > 0) {
+          setEventoSeleccionado(reportes.eventos[0].evento_id);
         }
       } catch (error: any) {
         console.error('Error al cargar reportes:', error);
@@ -338,6 +342,28 @@ const MisEventos = () => {
     fetchDetalle();
   }, [eventoSeleccionado]);
 
+  // Los inscritos vienen paginados por cursor: agrega la siguiente página a la lista
+  const cargarMasInscritos = async () => {
+    const cursor = cursorSiguienteInscritos(reporteDetallado?.paginacion);
+    if (!eventoSeleccionado || !cursor) return;
+
+    try {
+      setLoadingMasInscritos(true);
+      const response = await getReporteOrganizadorRequest(eventoSeleccionado, { cursor });
+      // Si mientras tanto se eligió otro evento, la página ya no corresponde
+      setReporteDetallado((actual: any) => actual?.evento?.id !== response.data.evento.id ? actual : {
+        ...actual,
+        inscritos: [...actual.inscritos, ...response.data.inscritos],
+        paginacion: response.data.paginacion
+      });
+    } catch (error: any) {
+      console.error('Error al cargar más inscritos:', error);
+      toast.error('Error al cargar más inscritos. Por favor, intenta de nuevo.');
+    } finally {
+      setLoadingMasInscritos(false);
+    }
+  };
+
   const COLORS = ['#3b82f6', '#10b981', '#f59e0b', '#ef4444', '#8b5cf6'];
 
   const prepararDatosOcupacion = () => {
@@ -1170,9 +1196,9 @@ const MisEventos = () => {
                           <div>
                             <div className="flex items-center justify-between mb-4">
                               <h4 className="font-semibold">
-                                Lista de Inscritos ({reporteDetallado.inscritos.length})
+                                Lista de Inscritos ({reporteDetallado.estadisticas.total_inscritos})
                               </h4>
-                              {reporteDetallado.inscritos.length > 0 && (
+                              {reporteDetallado.estadisticas.total_inscritos > 0 && (
                                 <Button
                                   size="sm"
                                   onClick={() => exportarReporteCSV(eventoSeleccionado!)}
@@ -1220,6 +1246,23 @@ const MisEventos = () => {
                                     </tbody>
                                   </table>
                                 </div>
+                                {reporteDetallado.paginacion?.next && (
+                                  <div className="flex items-center justify-between border-t bg-gray-50 px-4 py-3">
+                                    <span className="text-sm text-gray-600">
+                                      Mostrando {reporteDetallado.inscritos.length} de {reporteDetallado.estadisticas.total_inscritos}
+                                    </span>
+                                    <Button
+                                      size="sm"
+                                      variant="outline"
+                                      onClick={cargarMasInscritos}
+                                      disabled={loadingMasInscritos}
+                                      className="flex items-center gap-2"
+                                    >
+                                      {loadingMasInscritos && <Loader2 className="h-4 w-4 animate-spin" />}
+                                      Cargar más inscritos
+                                    </Button>
+                                  </div>
+                                )}
                               </div>
                             ) : (
                               <div className="border rounded-lg p-8 text-center text-gray-400">